@@ -0,0 +1,89 @@
+"""Per-packet decode cost of the LOOP and HILOWS packets.
+
+Compares the pyvantagepro parsers plus the second raw DataParser pass and
+the regex based "no data" filtering the client used to run with the
+precompiled decoders. Run from the repository
+root: python -m benchmarks.decode
+"""
+
+import os
+import re
+import struct
+import timeit
+from datetime import datetime
+
+from pyvantagepro.parser import (
+    DataParser,
+    HighLowParserRevB,
+    LoopDataParserRevB,
+    VantageProCRC,
+)
+
+from custom_components.davis_vantage.decoder import HILOWS_DECODER, LOOP_DECODER
+
+LOOP_ARRAYS = ("HumExtra", "ExtraTemps", "SoilMoist", "SoilTemps", "LeafWetness", "LeafTemps")
+
+
+def make_loop_packet() -> bytes:
+    data = bytearray(os.urandom(97))
+    data[:3] = b"LOO"
+    # pyvantagepro can't parse set alarm bits
+    data[70:86] = bytes(16)
+    return VantageProCRC(bytes(data)).data_with_checksum
+
+
+def make_hilows_packet() -> bytes:
+    return VantageProCRC(os.urandom(436)).data_with_checksum
+
+
+def remove_incorrect_data(raw_data, data_format, data) -> None:
+    data_info = {key: value for key, value in data_format}
+    for key in data.keys():
+        info_key = re.sub(r"\d+$", "", key)
+        data_type = data_info.get(info_key, "")
+        raw_value = raw_data.get(info_key, 0)
+        if (
+            ((data_type in ["B", "7s"]) and (raw_value == 255))
+            or ((data_type == "H") and (raw_value in [32767, 65535]))
+            or ((data_type == "h") and (raw_value in [32767, -32768]))
+        ):
+            data[key] = None
+
+
+def parse_loop(data: bytes) -> None:
+    loop = LoopDataParserRevB(data, datetime.now())
+    raw_data = DataParser(data, LoopDataParserRevB.LOOP_FORMAT)
+    for key in LOOP_ARRAYS:
+        raw_data[key] = struct.unpack(f"{len(raw_data[key])}B", raw_data[key])
+        raw_data.tuple_to_dict(key)
+    remove_incorrect_data(raw_data, LoopDataParserRevB.LOOP_FORMAT, loop)
+
+
+def parse_hilows(data: bytes) -> None:
+    hilows = HighLowParserRevB(data, datetime.now())
+    raw_data = DataParser(data, HighLowParserRevB.HILOWS_FORMAT)
+    remove_incorrect_data(raw_data, HighLowParserRevB.HILOWS_FORMAT, hilows)
+
+
+def measure(name: str, function, data: bytes, number: int = 5000) -> float:
+    cost = min(timeit.repeat(lambda: function(data), number=number, repeat=5))
+    cost = cost / number * 1e6
+    print(f"{name:<24}{cost:8.1f} us/packet")
+    return cost
+
+
+def main() -> None:
+    loop = make_loop_packet()
+    hilows = make_hilows_packet()
+    before = measure("LOOP pyvantagepro", parse_loop, loop)
+    after = measure("LOOP decoder", lambda data: LOOP_DECODER.decode(data, datetime.now()), loop)
+    print(f"{'':<24}{before / after:8.1f} x")
+    before = measure("HILOWS pyvantagepro", parse_hilows, hilows)
+    after = measure(
+        "HILOWS decoder", lambda data: HILOWS_DECODER.decode(data, datetime.now()), hilows
+    )
+    print(f"{'':<24}{before / after:8.1f} x")
+
+
+if __name__ == "__main__":
+    main()
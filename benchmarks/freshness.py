@@ -0,0 +1,76 @@
+"""Age of the archive values when a new archive record is read.
+
+Simulates a day of polling a console that writes a record every archive
+period by its own clock, which runs ahead of, in step with or behind the
+Home Assistant clock. The RefreshScheduler decides on every readout
+whether the archive is read. Without a known console clock the readouts
+follow the interval and the archive is read after the local period
+boundary. With the clock offset learned, the readout is moved to just
+after the console writes the next record. Reports the average and worst
+delay between a record being written and being read, for a few intervals.
+Run from the repository root: python -m benchmarks.freshness
+"""
+
+from datetime import datetime, timedelta
+
+from custom_components.davis_vantage.const import COMMAND_ARCHIVES
+from custom_components.davis_vantage.scheduler import RefreshScheduler
+
+ARCHIVE_PERIOD = 10  # minutes
+INTERVALS = (30, 60, 120)  # seconds
+CLOCK_OFFSETS = (-90, 0, 90)  # seconds the console clock runs ahead
+DURATION = timedelta(days=1)
+START = datetime(2026, 1, 1, 0, 3, 17)
+
+
+def simulate(interval: int, offset: int, aligned: bool) -> list[float]:
+    """Return the delays in seconds between writing and reading each record."""
+    scheduler = RefreshScheduler({})
+    clock_offset = timedelta(seconds=offset)
+    period = timedelta(minutes=ARCHIVE_PERIOD)
+    now = START
+    # Console time of the newest record read, the cursor of the client
+    last_record = (now + clock_offset).replace(second=0) - timedelta(
+        minutes=(now + clock_offset).minute % ARCHIVE_PERIOD
+    )
+    if aligned:
+        scheduler.set_clock_offset(now + clock_offset, now)
+    scheduler.mark_done(COMMAND_ARCHIVES, now)
+    delays = []
+    while now < START + DURATION:
+        wait = float(interval)
+        next_record = scheduler.get_next_archive_time(last_record, ARCHIVE_PERIOD)
+        if next_record is not None:
+            until = (next_record - now).total_seconds()
+            if 0 < until < wait:
+                wait = until
+        now += timedelta(seconds=wait)
+        if scheduler.is_due(COMMAND_ARCHIVES, now, ARCHIVE_PERIOD, last_record):
+            scheduler.mark_done(COMMAND_ARCHIVES, now)
+            # The records the console wrote by now, by its own clock
+            while last_record + period <= now + clock_offset:
+                last_record += period
+                written = last_record - clock_offset
+                delays.append((now - written).total_seconds())
+    return delays
+
+
+def main() -> None:
+    print(f"{'interval':<10}{'clock':>8}{'boundary':>24}{'learned':>24}")
+    for interval in INTERVALS:
+        for offset in CLOCK_OFFSETS:
+            columns = []
+            for aligned in (False, True):
+                delays = simulate(interval, offset, aligned)
+                columns.append(
+                    f"{sum(delays) / len(delays):6.0f} / {max(delays):4.0f} s"
+                )
+            print(
+                f"{interval:>6} s  {offset:>+6} s"
+                + "".join(f"{c:>24}" for c in columns)
+            )
+    print("(average / worst delay between writing and reading a record)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Readout duration with command pipelining on a high-latency TCP link.
+
+Polls a simulated console behind a link with a fixed round trip time,
+like a remote station attached over a VPN, through
+DavisVantageClient.async_get_current_data. Every poll reads the LOOP
+packet and the highs and lows, the first one the console setup as well.
+The commands are sent one after the other as on a serial link, and
+back-to-back after one wake-up on a pipelining link.
+Run from the repository root: python -m benchmarks.pipeline
+"""
+
+import asyncio
+import types
+
+from pyvantagepro.parser import VantageProCRC
+
+from custom_components.davis_vantage.client import DavisVantageClient
+from custom_components.davis_vantage.commands import CommandQueue
+from custom_components.davis_vantage.console import AsyncVantagePro2
+from custom_components.davis_vantage.const import (
+    COMMAND_HILOWS,
+    EEPROM_ARCHIVE_PERIOD,
+    EEPROM_CONFIG_SIZE,
+    PROTOCOL_NETWORK,
+)
+from custom_components.davis_vantage.transport import AsyncLink
+
+from .readout import make_hilows_packet, make_loop_packet
+
+ROUND_TRIP_TIMES = (0.02, 0.1, 0.3)  # seconds
+POLLS = 5
+
+
+class LatencyLink(AsyncLink):
+    """Link to a simulated console, replies arrive a round trip later."""
+
+    def __init__(self, round_trip: float, pipelining: bool) -> None:
+        self.round_trip = round_trip
+        self.pipelining = pipelining
+        self.url = f"latency:{round_trip}"
+        self._buffer = bytearray()
+        self._line = b""
+        self._received = asyncio.Event()
+        config = bytearray(EEPROM_CONFIG_SIZE)
+        config[EEPROM_ARCHIVE_PERIOD] = 0  # no archive reads
+        self._replies = {
+            b"": b"\n\r",
+            b"LOOP 1": b"\x06" + make_loop_packet(),
+            b"HILOWS": b"\x06" + make_hilows_packet(),
+            b"NVER": b"\n\rOK\n\r3.88\n\r",
+            b"EEBRD 00 2E": b"\x06" + VantageProCRC(bytes(config)).data_with_checksum,
+        }
+
+    @property
+    def is_open(self) -> bool:
+        return True
+
+    async def open(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    async def write(self, data: bytes) -> None:
+        *lines, self._line = (self._line + data).split(b"\n")
+        reply = b"".join(self._replies[line] for line in lines)
+        asyncio.get_running_loop().call_later(self.round_trip, self._receive, reply)
+
+    def _receive(self, data: bytes) -> None:
+        self._buffer += data
+        self._received.set()
+
+    async def read(self, size: int, timeout: float) -> bytes:
+        try:
+            async with asyncio.timeout(timeout):
+                while len(self._buffer) < size:
+                    self._received.clear()
+                    await self._received.wait()
+        except TimeoutError:
+            pass
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+
+def make_client(link: AsyncLink) -> DavisVantageClient:
+    """Client reading the highs and lows on every readout over the link."""
+    loop = asyncio.get_running_loop()
+    hass = types.SimpleNamespace(
+        loop=loop,
+        config=types.SimpleNamespace(time_zone="Europe/Amsterdam"),
+        async_create_background_task=lambda coro, name: loop.create_task(coro),
+    )
+    client = DavisVantageClient(
+        hass, PROTOCOL_NETWORK, "127.0.0.1:22222", True, cadences={COMMAND_HILOWS: 0}  # type: ignore
+    )
+    console = AsyncVantagePro2(link)
+    client._queue = CommandQueue(hass, console, True)  # type: ignore  # pylint: disable=protected-access
+    return client
+
+
+async def measure(round_trip: float, pipelining: bool) -> tuple[float, float]:
+    """Return the duration of the first and of the following readouts."""
+    client = make_client(LatencyLink(round_trip, pipelining))
+    durations = []
+    for _ in range(POLLS):
+        data = await client.async_get_current_data()
+        assert not data["LastError"], data["LastError"]
+        durations.append(data["LastReadoutDuration"])
+    return durations[0], sum(durations[1:]) / (POLLS - 1)
+
+
+async def main() -> None:
+    print(f"{'round trip':<12}{'sequential':>22}{'pipelined':>22}")
+    for round_trip in ROUND_TRIP_TIMES:
+        columns = []
+        for pipelining in (False, True):
+            first, average = await measure(round_trip, pipelining)
+            columns.append(f"{first * 1000:7.0f} / {average * 1000:5.0f} ms")
+        print(f"{round_trip * 1000:7.0f} ms  " + "".join(f"{c:>22}" for c in columns))
+    print("(first readout with the console setup / following readouts)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,103 @@
+"""State writes per poll with changed-key publishing.
+
+Runs an hour of 30 second polls of a drifting station through
+DavisVantageClient.process_current_data and counts the entity state
+writes: every entity enabled by default on every poll as before, only the
+changed keys, and the changed keys with the deadbands and the heartbeat.
+Run from the repository root: python -m benchmarks.publish
+"""
+
+import random
+import timeit
+
+from custom_components.davis_vantage.binary_sensor import DESCRIPTIONS
+from custom_components.davis_vantage.const import (
+    DEFAULT_PUBLISH_HEARTBEAT,
+    MODEL_VANTAGE_PRO2,
+    PUBLISH_DEADBANDS,
+)
+from custom_components.davis_vantage.coordinator import StatePublisher
+from custom_components.davis_vantage.decoder import HILOWS_DECODER
+from custom_components.davis_vantage.sensor import get_sensor_descriptions
+
+from .readout import make_archives, make_client, make_hilows_packet, make_loop_packet
+
+POLL_INTERVAL = 30  # seconds
+POLLS = 120
+
+
+def make_readouts(seed: int = 1) -> list[bytes]:
+    """LOOP packets of a station with slowly drifting values and gusty wind."""
+    rng = random.Random(seed)
+    fields = {
+        "TempOut": 615,
+        "TempIn": 702,
+        "HumOut": 81,
+        "Barometer": 29921,
+        "SolarRad": 310,
+        "WindDir": 225,
+    }
+    packets = []
+    for _ in range(POLLS):
+        fields["TempOut"] += rng.choice((-1, 0, 0, 1))
+        fields["TempIn"] += rng.choice((0, 0, 0, 1))
+        fields["HumOut"] += rng.choice((-1, 0, 0, 0, 1))
+        fields["Barometer"] += rng.choice((-1, 0, 0, 1))
+        fields["SolarRad"] = max(0, fields["SolarRad"] + rng.randint(-8, 8))
+        fields["WindDir"] = (fields["WindDir"] + rng.randint(-15, 15)) % 360
+        packets.append(
+            make_loop_packet(
+                **fields,
+                WindSpeed=rng.randint(3, 9),
+                WindSpeed10Min=rng.choice((5, 5, 6)),
+            )
+        )
+    return packets
+
+
+def count_writes(readouts: list[dict], keys: list[str], publisher: StatePublisher) -> int:
+    return sum(
+        len(publisher.select(data, keys, poll * POLL_INTERVAL))
+        for poll, data in enumerate(readouts)
+    )
+
+
+def main() -> None:
+    descriptions = [
+        description
+        for description in get_sensor_descriptions(MODEL_VANTAGE_PRO2) + DESCRIPTIONS
+        if description.entity_registry_enabled_default
+    ]
+    keys = [description.key for description in descriptions]
+    client = make_client()
+    archives = make_archives()
+    hilows = HILOWS_DECODER.decode(make_hilows_packet())
+    readouts = [
+        client.process_current_data(packet, archives, hilows)
+        for packet in make_readouts()
+    ]
+
+    deadbands = StatePublisher(DEFAULT_PUBLISH_HEARTBEAT)
+    deadbands.deadbands = {
+        description.key: PUBLISH_DEADBANDS[description.device_class]
+        for description in descriptions
+        if description.device_class in PUBLISH_DEADBANDS
+    }
+    results = (
+        ("every entity", len(keys) * len(readouts)),
+        ("changed keys", count_writes(readouts, keys, StatePublisher())),
+        ("deadband + heartbeat", count_writes(readouts, keys, deadbands)),
+    )
+    print(f"{len(keys)} entities, {len(readouts)} polls")
+    for name, writes in results:
+        print(f"{name:<24}{writes / len(readouts):8.1f} writes/poll")
+
+    publisher = StatePublisher()
+    cost = min(
+        timeit.repeat(lambda: count_writes(readouts, keys, publisher), number=20, repeat=5)
+    ) / 20 / len(readouts) * 1e6
+    print(f"{'selecting keys':<24}{cost:8.1f} us/poll")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""Per-poll CPU cost and memory allocation of processing a readout.
+
+Runs a LOOP packet, the highs and lows and the latest archive record
+through DavisVantageClient.process_current_data, as every poll does: with
+new highs and lows, with one changed LOOP field and with an identical LOOP
+packet. The first two are repeated limited to the keys of the entities
+enabled by default, after adding those entities one by one as at setup.
+Run from the repository root: python -m benchmarks.readout
+"""
+
+import itertools
+import struct
+import timeit
+import tracemalloc
+import types
+
+from pyvantagepro.parser import (
+    ArchiveDataParserRevB,
+    HighLowParserRevB,
+    LoopDataParserRevB,
+    VantageProCRC,
+)
+from pyvantagepro.utils import ListDict
+
+from custom_components.davis_vantage.client import DavisVantageClient
+from custom_components.davis_vantage.binary_sensor import DESCRIPTIONS
+from custom_components.davis_vantage.const import (
+    EEPROM_ARCHIVE_PERIOD,
+    EEPROM_CONFIG_SIZE,
+    EEPROM_SETUP_BITS,
+    MODEL_VANTAGE_PRO2,
+    PROTOCOL_NETWORK,
+)
+from custom_components.davis_vantage.decoder import HILOWS_DECODER
+from custom_components.davis_vantage.sensor import get_sensor_descriptions
+
+
+def make_client() -> DavisVantageClient:
+    hass = types.SimpleNamespace(
+        config=types.SimpleNamespace(time_zone="Europe/Amsterdam")
+    )
+    client = DavisVantageClient(hass, PROTOCOL_NETWORK, "127.0.0.1:22222", True)  # type: ignore
+    config = bytearray(EEPROM_CONFIG_SIZE)
+    config[EEPROM_SETUP_BITS] = 0x10
+    config[EEPROM_ARCHIVE_PERIOD] = 10
+    client._config._data = config  # pylint: disable=protected-access
+    client._rain_collector = client.get_rain_collector()  # pylint: disable=protected-access
+    return client
+
+
+def pack_packet(data_format, size: int, values: dict[str, int | bytes]) -> bytes:
+    """Pack a packet with the given fields set, the other fields 0."""
+    data = bytearray(size)
+    offset = 0
+    for name, field_format in data_format:
+        if name in values:
+            struct.pack_into("<" + field_format, data, offset, values[name])
+        offset += struct.calcsize("<" + field_format)
+    return VantageProCRC(bytes(data)).data_with_checksum
+
+
+def make_loop_packet(**fields: int | bytes) -> bytes:
+    return pack_packet(
+        LoopDataParserRevB.LOOP_FORMAT,
+        97,
+        {
+            "BarTrend": 20,
+            "Barometer": 29921,
+            "TempIn": 702,
+            "HumIn": 45,
+            "TempOut": 615,
+            "WindSpeed": 6,
+            "WindSpeed10Min": 5,
+            "WindDir": 225,
+            "HumOut": 81,
+            "RainRate": 12,
+            "UV": 24,
+            "SolarRad": 310,
+            "StormStartDate": 0xFFFF,
+            "RainDay": 15,
+            "RainMonth": 230,
+            "RainYear": 1270,
+            "SunRise": 721,
+            "SunSet": 1835,
+            # No extra, soil or leaf sensors
+            "ExtraTemps": b"\xff" * 7,
+            "SoilTemps": b"\xff" * 4,
+            "LeafTemps": b"\xff" * 4,
+            "HumExtra": b"\xff" * 7,
+            "SoilMoist": b"\xff" * 4,
+            "LeafWetness": b"\xff" * 4,
+            **fields,
+        },
+    )
+
+
+def make_hilows_packet() -> bytes:
+    return pack_packet(
+        HighLowParserRevB.HILOWS_FORMAT,
+        436,
+        {
+            name: 1342
+            for name, field_format in HighLowParserRevB.HILOWS_FORMAT
+            if name.endswith("Time")
+        },
+    )
+
+
+def make_archives() -> ListDict:
+    data = bytearray(52)
+    struct.pack_into("<HH", data, 0, (26 << 9) | (10 << 5) | 18, 1230)
+    data[24] = 4
+    data[27] = 3
+    return ListDict([ArchiveDataParserRevB(bytes(data))])
+
+
+def measure(name: str, poll, number: int) -> None:
+    cost = min(timeit.repeat(poll, number=number, repeat=5)) / number * 1e6
+    print(f"{name:<24}{cost:8.1f} us/poll")
+
+
+def main(number: int = 5000) -> None:
+    client = make_client()
+    loop = make_loop_packet()
+    # Only the outside temperature differs
+    loop_changed = make_loop_packet(TempOut=616)
+    hilows = make_hilows_packet()
+    archives = make_archives()
+    last_hilows = HILOWS_DECODER.decode(hilows)
+    packets = itertools.cycle((loop, loop_changed))
+
+    def poll_new() -> None:
+        # New highs and lows, everything is processed
+        client.process_current_data(loop, archives, HILOWS_DECODER.decode(hilows))
+
+    def poll_changed() -> None:
+        client.process_current_data(next(packets), archives, last_hilows)
+
+    def poll_identical() -> None:
+        client.process_current_data(loop, archives, last_hilows)
+
+    measure("full", poll_new, number)
+    measure("changed field", poll_changed, number)
+    measure("identical packet", poll_identical, number)
+
+    poll_new()
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.take_snapshot()
+    poll_new()
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    print(f"{'peak allocated':<24}{peak / 1024:8.1f} KiB/poll")
+    print(f"{'blocks retained':<24}{blocks:8d} /poll")
+
+    # Only the keys of the entities enabled by default
+    keys = [
+        description.key
+        for description in get_sensor_descriptions(MODEL_VANTAGE_PRO2) + DESCRIPTIONS
+        if description.entity_registry_enabled_default
+    ]
+
+    def add_entities() -> None:
+        # The entities are added one by one at setup, then the first poll
+        for count in range(1, len(keys) + 1):
+            client.set_entity_keys(keys[:count])
+        poll_new()
+
+    measure("adding entities", add_entities, 10)
+    measure("full, enabled keys", poll_new, number)
+    measure("changed, enabled keys", poll_changed, number)
+
+
+if __name__ == "__main__":
+    main()
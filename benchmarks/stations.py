@@ -0,0 +1,50 @@
+"""Setup time and poll overhead with many weather stations.
+
+Sets up 1 to 48 simulated stations side by side, each with its own client
+and command queue, the way every config entry gets its own, and polls them
+all at once through DavisVantageClient.async_get_current_data. With no
+shared state the time per station stays the same as stations are added.
+Run from the repository root: python -m benchmarks.stations
+"""
+
+import asyncio
+import time
+
+from .pipeline import LatencyLink, make_client
+
+STATION_COUNTS = (1, 4, 12, 48)
+ROUND_TRIP = 0.0  # seconds, only the integration's own overhead is measured
+POLLS = 20
+
+
+async def measure(stations: int) -> tuple[float, float]:
+    """Return the setup time and the time of one poll of all stations."""
+    start = time.perf_counter()
+    clients = [
+        make_client(LatencyLink(ROUND_TRIP, pipelining=True)) for _ in range(stations)
+    ]
+    await asyncio.gather(*(client.get_station_info() for client in clients))
+    setup = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(POLLS):
+        readouts = await asyncio.gather(
+            *(client.async_get_current_data() for client in clients)
+        )
+        assert all(not data["LastError"] for data in readouts)
+    poll = (time.perf_counter() - start) / POLLS
+    return setup, poll
+
+
+async def main() -> None:
+    print(f"{'stations':<10}{'setup':>10}{'per station':>14}{'poll':>10}{'per station':>14}")
+    for stations in STATION_COUNTS:
+        setup, poll = await measure(stations)
+        print(
+            f"{stations:<10}{setup * 1000:8.1f}ms{setup / stations * 1000:12.2f}ms"
+            f"{poll * 1000:8.1f}ms{poll / stations * 1000:12.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
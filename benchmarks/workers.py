@@ -0,0 +1,81 @@
+"""Job latency of fast stations next to slow ones in the I/O worker pool.
+
+Runs the blocking reads of 50 simulated stations: a few behind a slow
+serial link that blocks a thread for 200 ms per read, the others 5 ms.
+Every station reads back-to-back for a while. The reads either go through
+one shared first-come first-served executor of the same size, as with the
+default executor, or through IOWorkerPool, which runs one read per station
+at a time and takes the stations in turn. Reports the average and worst
+wait of the fast stations and the utilization per station.
+Run from the repository root: python -m benchmarks.workers
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import statistics
+import time
+
+from custom_components.davis_vantage.const import IO_WORKERS
+from custom_components.davis_vantage.workers import IOWorkerPool
+
+STATIONS = 50
+SLOW_STATIONS = 5
+SLOW_READ = 0.2  # seconds
+FAST_READ = 0.005  # seconds
+READS = 8  # per station
+BURST = 4  # reads a slow station queues at once, like an archive download
+
+
+async def run_station(run, slow: bool, waits: list[float]) -> None:
+    for _ in range(READS // BURST if slow else READS):
+        start = time.perf_counter()
+        if slow:
+            await asyncio.gather(*(run(time.sleep, SLOW_READ) for _ in range(BURST)))
+        else:
+            await run(time.sleep, FAST_READ)
+            waits.append(time.perf_counter() - start - FAST_READ)
+
+
+async def measure(runs) -> list[float]:
+    """Run all stations, return the waits of the reads of the fast ones."""
+    waits: list[float] = []
+    await asyncio.gather(
+        *(run_station(run, index < SLOW_STATIONS, waits) for index, run in enumerate(runs))
+    )
+    return waits
+
+
+async def main() -> None:
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(IO_WORKERS)
+
+    async def run_shared(func, *args):
+        return await loop.run_in_executor(executor, func, *args)
+
+    pool = IOWorkerPool(IO_WORKERS)
+    stations = [pool.station(f"station {index}") for index in range(STATIONS)]
+    for station in stations:
+        station.utilization(reset=True)
+    results = (
+        ("shared executor", await measure([run_shared] * STATIONS)),
+        ("I/O worker pool", await measure([s.async_run for s in stations])),
+    )
+    executor.shutdown()
+
+    print(f"{STATIONS} stations, {SLOW_STATIONS} slow, {IO_WORKERS} workers")
+    for name, waits in results:
+        print(
+            f"{name:<18}fast station wait {statistics.mean(waits) * 1000:7.1f} ms"
+            f" average {max(waits) * 1000:8.1f} ms worst"
+        )
+    utilization = [station.utilization() for station in stations]
+    print(
+        f"{'utilization':<18}slow station {statistics.mean(utilization[:SLOW_STATIONS]):5.1f} %"
+        f", fast station {statistics.mean(utilization[SLOW_STATIONS:]):5.1f} %"
+        f", pool {sum(utilization) / IO_WORKERS:5.1f} %"
+    )
+    pool.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -2,28 +2,48 @@
 
 from __future__ import annotations
 from dataclasses import dataclass
+from functools import partial
 import logging
+from pathlib import Path
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import Event, HomeAssistant
+import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.device_registry import DeviceInfo
-from homeassistant.const import Platform
+from homeassistant.helpers.storage import STORAGE_DIR
+from homeassistant.helpers.typing import ConfigType
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP, Platform
+from .archive_store import ArchiveStore
 from .client import DavisVantageClient
 from .const import (
     DOMAIN,
-    NAME,
     MANUFACTURER,
     CONFIG_STATION_MODEL,
-    CONFIG_INTERVAL,
     CONFIG_PROTOCOL,
     CONFIG_LINK,
     CONFIG_PERSISTENT_CONNECTION,
+    CONFIG_LOOP_STREAMING,
+    CONFIG_LOOP2,
+    CONFIG_HILOWS_INTERVAL,
+    CONFIG_ARCHIVE_INTERVAL,
+    CONFIG_SETUP_INTERVAL,
+    DEFAULT_HILOWS_INTERVAL,
+    DEFAULT_ARCHIVE_INTERVAL,
+    DEFAULT_SETUP_INTERVAL,
+    COMMAND_HILOWS,
+    COMMAND_ARCHIVES,
+    COMMAND_SETUP,
+    IO_WORKERS,
 )
 from .coordinator import DavisVantageDataUpdateCoordinator
 from .services import DavisServicesSetup
+from .statistics import ArchiveStatisticsImporter
+from .workers import IO_WORKER_POOL, IOWorkerPool
 
 PLATFORMS: list[Platform] = [Platform.SENSOR, Platform.BINARY_SENSOR]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 
 
@@ -34,29 +54,75 @@ class RuntimeData:
 
 type DavisConfigEntry = ConfigEntry[RuntimeData]
 
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the actions and the I/O workers, shared by all weather stations."""
+    pool = hass.data[IO_WORKER_POOL] = IOWorkerPool(IO_WORKERS)
+
+    def shutdown_pool(_: Event) -> None:
+        pool.shutdown()
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, shutdown_pool)
+    DavisServicesSetup(hass)
+    return True
+
 async def async_setup_entry(
     hass: HomeAssistant, config_entry: DavisConfigEntry
 ) -> bool:
-    """Set up Davis Vantage from a config entry."""
-    if hass.data.get(DOMAIN) is None:
-        hass.data.setdefault(DOMAIN, {})
+    """Set up Davis Vantage from a config entry.
 
+    Everything of a weather station lives in the runtime data of its entry,
+    so any number of stations can be set up side by side.
+    """
     _LOGGER.debug("entry.data: %s", config_entry.data)
 
     protocol = config_entry.data.get(CONFIG_PROTOCOL, "")
     link = config_entry.data.get(CONFIG_LINK, "")
     persistent_connection = config_entry.data.get(CONFIG_PERSISTENT_CONNECTION, False)
-
-    hass.data[DOMAIN]["interval"] = config_entry.data.get(CONFIG_INTERVAL, 30)
-
-    client = DavisVantageClient(hass, protocol, link, persistent_connection)
+    loop_streaming = config_entry.data.get(CONFIG_LOOP_STREAMING, False)
+    loop2 = config_entry.data.get(CONFIG_LOOP2, False)
+    cadences = {
+        COMMAND_HILOWS: config_entry.data.get(
+            CONFIG_HILOWS_INTERVAL, DEFAULT_HILOWS_INTERVAL
+        ),
+        COMMAND_ARCHIVES: config_entry.data.get(
+            CONFIG_ARCHIVE_INTERVAL, DEFAULT_ARCHIVE_INTERVAL
+        ),
+        COMMAND_SETUP: config_entry.data.get(
+            CONFIG_SETUP_INTERVAL, DEFAULT_SETUP_INTERVAL
+        ),
+    }
+
+    workers = hass.data[IO_WORKER_POOL].station(config_entry.entry_id)
+    archive_store = ArchiveStore(
+        hass, get_archive_store_path(hass, config_entry), workers
+    )
+    try:
+        await archive_store.async_open()
+        config_entry.async_on_unload(archive_store.async_close)
+    except Exception as e:
+        _LOGGER.error("Couldn't open archive store %s: %s", archive_store.path, e)
+        archive_store = None
+
+    client = DavisVantageClient(
+        hass,
+        protocol,
+        link,
+        persistent_connection,
+        loop_streaming,
+        cadences,
+        archive_store,
+        loop2,
+        workers,
+    )
     await client.connect_to_station()
+    config_entry.async_on_unload(client.async_disconnect)
+    await client.async_restore_archive_cursor()
     await client.get_station_info()
 
     device_info = DeviceInfo(
         identifiers={(DOMAIN, config_entry.entry_id)},
         manufacturer=MANUFACTURER,
-        name=NAME,
+        name=config_entry.title,
         model=config_entry.data.get(CONFIG_STATION_MODEL, "Unknown"),
         sw_version=client.firmware_version,
         hw_version=None,
@@ -72,14 +138,27 @@ async def async_setup_entry(
 
     config_entry.runtime_data = RuntimeData(coordinator)
 
+    if client.streaming:
+        coordinator.async_start_streaming()
+        config_entry.async_on_unload(client.async_stop_streaming)
+
+    if archive_store is not None and "recorder" in hass.config.components:
+        importer = ArchiveStatisticsImporter(hass, config_entry, client, archive_store)
+        config_entry.async_on_unload(
+            client.async_add_archive_listener(importer.async_handle_archives)
+        )
+        config_entry.async_on_unload(importer.async_stop)
+        importer.async_schedule_import()
+
+    config_entry.async_on_unload(client.async_stop_archive_download)
+    await client.async_resume_archive_download()
+
     await hass.config_entries.async_forward_entry_setups(config_entry, PLATFORMS)
 
     config_entry.async_on_unload(
         config_entry.add_update_listener(async_reload_entry)
     )
 
-    DavisServicesSetup(hass, config_entry)
-
     return True
 
 
@@ -89,6 +168,14 @@ async def async_unload_entry(hass: HomeAssistant, config_entry: DavisConfigEntry
         config_entry, PLATFORMS
     )
 
+async def async_remove_entry(hass: HomeAssistant, config_entry: DavisConfigEntry) -> None:
+    """Remove the archive store of a removed config entry."""
+    path = Path(get_archive_store_path(hass, config_entry))
+    await hass.async_add_executor_job(partial(path.unlink, missing_ok=True))
+
+def get_archive_store_path(hass: HomeAssistant, config_entry: ConfigEntry) -> str:
+    return hass.config.path(STORAGE_DIR, f"{DOMAIN}.{config_entry.entry_id}.db")
+
 async def async_reload_entry(hass: HomeAssistant, config_entry: DavisConfigEntry) -> None:
     """Reload config entry."""
     await hass.config_entries.async_reload(config_entry.entry_id)
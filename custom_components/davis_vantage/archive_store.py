@@ -0,0 +1,145 @@
+"""Local append-only store of console archive records."""
+
+from datetime import datetime
+import json
+import logging
+import os
+import sqlite3
+from typing import Any
+
+from pyvantagepro.parser import ArchiveDataParserRevB
+from pyvantagepro.utils import ListDict
+from homeassistant.core import HomeAssistant
+
+from .workers import StationWorkers
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M"
+
+
+class ArchiveStore:
+    """SQLite store of the raw 52 byte archive records, keyed by timestamp.
+
+    Records are only ever added, a timestamp that is already stored is
+    ignored. A small key/value table keeps state like the position of an
+    archive download. All database access runs in the station's I/O
+    workers, or the executor without them.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, path: str, workers: StationWorkers | None = None
+    ) -> None:
+        self._hass = hass
+        self._path = path
+        self._run = workers.async_run if workers else hass.async_add_executor_job
+        self._connection: sqlite3.Connection | None = None
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def _open(self) -> None:
+        os.makedirs(os.path.dirname(self._path), exist_ok=True)
+        connection = sqlite3.connect(self._path, check_same_thread=False)
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS archive "
+            "(datetime TEXT PRIMARY KEY, record BLOB NOT NULL) WITHOUT ROWID"
+        )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT)"
+        )
+        connection.commit()
+        self._connection = connection
+
+    async def async_open(self) -> None:
+        await self._run(self._open)
+
+    async def async_close(self) -> None:
+        if self._connection is not None:
+            connection = self._connection
+            self._connection = None
+            await self._run(connection.close)
+
+    def _execute(self, sql: str, *args) -> list[tuple]:  # type: ignore
+        if self._connection is None:
+            raise RuntimeError("Archive store is not open")
+        return self._connection.execute(sql, *args).fetchall()
+
+    def _latest(self) -> datetime | None:
+        rows = self._execute("SELECT MAX(datetime) FROM archive")
+        if not rows or rows[0][0] is None:
+            return None
+        return datetime.strptime(rows[0][0], DATETIME_FORMAT)
+
+    async def async_latest(self) -> datetime | None:
+        """Return the timestamp of the most recent stored record."""
+        return await self._run(self._latest)
+
+    def _append(self, records: list[ArchiveDataParserRevB]) -> int:
+        if self._connection is None:
+            raise RuntimeError("Archive store is not open")
+        with self._connection:
+            cursor = self._connection.executemany(
+                "INSERT OR IGNORE INTO archive (datetime, record) VALUES (?, ?)",
+                [
+                    (record["Datetime"].strftime(DATETIME_FORMAT), record.raw_bytes)
+                    for record in records
+                ],
+            )
+        return cursor.rowcount
+
+    async def async_append(self, records: list[ArchiveDataParserRevB]) -> int:
+        """Store the records, returns the number of records that were new."""
+        if not records:
+            return 0
+        return await self._run(self._append, list(records))
+
+    def _get_records(
+        self, start_date: datetime | None, stop_date: datetime | None, limit: int
+    ) -> ListDict:
+        rows = self._execute(
+            "SELECT record FROM archive WHERE datetime > ? AND datetime <= ? "
+            "ORDER BY datetime LIMIT ?",
+            (
+                start_date.strftime(DATETIME_FORMAT) if start_date else "",
+                stop_date.strftime(DATETIME_FORMAT) if stop_date else "9999",
+                limit,
+            ),
+        )
+        return ListDict(ArchiveDataParserRevB(row[0]) for row in rows)
+
+    async def async_get_records(
+        self,
+        start_date: datetime | None = None,
+        stop_date: datetime | None = None,
+        limit: int = -1,
+    ) -> ListDict:
+        """Return the stored records after start_date up to stop_date."""
+        return await self._run(
+            self._get_records, start_date, stop_date, limit
+        )
+
+    def _get_state(self, key: str) -> Any:
+        rows = self._execute("SELECT value FROM state WHERE key = ?", (key,))
+        return json.loads(rows[0][0]) if rows else None
+
+    async def async_get_state(self, key: str) -> Any:
+        """Return the stored state value for key, or None."""
+        return await self._run(self._get_state, key)
+
+    def _set_state(self, key: str, value: Any) -> None:
+        if self._connection is None:
+            raise RuntimeError("Archive store is not open")
+        with self._connection:
+            if value is None:
+                self._connection.execute("DELETE FROM state WHERE key = ?", (key,))
+            else:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)",
+                    (key, json.dumps(value)),
+                )
+
+    async def async_set_state(self, key: str, value: Any) -> None:
+        """Store a JSON serializable state value for key, None removes it."""
+        await self._run(self._set_state, key, value)
@@ -75,10 +75,11 @@ class DavisVantageBinarySensor(
         description: DavisVantageBinarySensorEntityDescription,
     ) -> None:
         """Initialize Davis Vantage sensor."""
-        super().__init__(coordinator=coordinator)
+        super().__init__(coordinator=coordinator, context=description.key)
         self.entity_description = description
         self.entity_id = make_safe_entity_id(
-            f"{BINARY_SENSOR_DOMAIN}.{DEFAULT_NAME} {description.entity_name}"
+            f"{BINARY_SENSOR_DOMAIN}.{coordinator.config_entry.title} "
+            f"{description.entity_name}"
         )
         self._attr_unique_id = (
             f"{entry_id}-{DEFAULT_NAME} {description.entity_name}"
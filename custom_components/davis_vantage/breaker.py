@@ -0,0 +1,74 @@
+"""Circuit breaker backing off from an unreachable weather station."""
+
+from pyvantagepro.device import NoDeviceException
+
+from .const import (
+    BREAKER_BACKOFF_MAX,
+    BREAKER_BACKOFF_MIN,
+    BREAKER_CLOSED,
+    BREAKER_FAILURES,
+    BREAKER_HALF_OPEN,
+    BREAKER_OPEN,
+)
+
+# Failures meaning the console didn't answer at all, a bad packet did arrive
+UNREACHABLE_EXCEPTIONS = (NoDeviceException, TimeoutError, OSError)
+
+
+class CircuitBreaker:
+    """Stop reading a station that doesn't answer, probe it now and then.
+
+    After failures readouts in a row fail because the station can't be
+    reached, the breaker opens: readouts are skipped until a probe is due.
+    The wait before the next probe starts at backoff_min seconds and
+    doubles with every failed probe, up to backoff_max. While a probe runs
+    the breaker is half open. Any answer of the station closes it again.
+    """
+
+    def __init__(
+        self,
+        failures: int = BREAKER_FAILURES,
+        backoff_min: float = BREAKER_BACKOFF_MIN,
+        backoff_max: float = BREAKER_BACKOFF_MAX,
+    ) -> None:
+        self._failures = failures
+        self._backoff_min = backoff_min
+        self._backoff_max = backoff_max
+        self.state = BREAKER_CLOSED
+        self.consecutive_failures = 0
+        self.next_probe: float | None = None  # monotonic time
+        self._backoff = 0.0
+
+    @property
+    def is_closed(self) -> bool:
+        return self.state == BREAKER_CLOSED
+
+    def is_probe_due(self, now: float) -> bool:
+        """Return True if an open breaker may probe the station."""
+        return self.next_probe is not None and now >= self.next_probe
+
+    def start_probe(self) -> None:
+        self.state = BREAKER_HALF_OPEN
+
+    def record_success(self) -> bool:
+        """Register an answer, returns True if the breaker was open."""
+        was_open = not self.is_closed
+        self.state = BREAKER_CLOSED
+        self.consecutive_failures = 0
+        self.next_probe = None
+        self._backoff = 0.0
+        return was_open
+
+    def record_failure(self, now: float) -> bool:
+        """Register an unreachable station, returns True if the breaker opened."""
+        self.consecutive_failures += 1
+        if self.is_closed and self.consecutive_failures < self._failures:
+            return False
+        opened = self.is_closed
+        self._backoff = min(
+            self._backoff * 2 if self._backoff else self._backoff_min,
+            self._backoff_max,
+        )
+        self.state = BREAKER_OPEN
+        self.next_probe = now + self._backoff
+        return opened
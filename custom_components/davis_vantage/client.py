@@ -1,38 +1,80 @@
 """All client function"""
 
-from typing import Any
+from typing import Any, Callable, Collection, Iterable
 from functools import cached_property
-from datetime import datetime, timedelta, time, date
+from contextlib import aclosing
+from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 import logging
 import asyncio
+import math
 import struct
-import re
-from pyvantagepro import VantagePro2
-from pyvantagepro.parser import HighLowParserRevB, LoopDataParserRevB, DataParser
+import time
+from pyvantagepro.device import BadAckException, BadCRCException, BadDataException
 from pyvantagepro.utils import ListDict
 from homeassistant.core import HomeAssistant
 
-from .utils import (
-    calc_dew_point,
-    calc_feels_like,
-    calc_wind_chill,
-    contains_correct_raw_data,
-    calc_heat_index,
-    convert_kmh_to_bft,
-    convert_to_iso_datetime,
-    convert_to_kmh,
-    get_baro_trend,
-    get_solar_rad,
-    get_uv,
-    get_wind_rose,
-)
+from .utils import convert_to_iso_datetime
 from .const import (
     RAIN_COLLECTOR_IMPERIAL,
     RAIN_COLLECTOR_METRIC,
     RAIN_COLLECTOR_METRIC_0_1,
+    RAIN_COLLECTOR_FACTOR,
     PROTOCOL_NETWORK,
+    LOOP_PACKET_INTERVAL,
+    DEADLINE_LOOP,
+    DEADLINE_HILOWS,
+    DEADLINE_ARCHIVES,
+    DEADLINE_ARCHIVE_PAGE,
+    ARCHIVE_RECORDS_PER_PAGE,
+    ARCHIVE_MEMORY_PAGES,
+    ARCHIVE_DOWNLOAD_BATCH_PAGES,
+    ARCHIVE_DOWNLOAD_STATE,
+    DEADLINE_EEPROM,
+    DEADLINE_COMMAND,
+    DEADLINE_PIPELINE,
+    READOUT_RETRIES,
+    COMMAND_HILOWS,
+    COMMAND_ARCHIVES,
+    COMMAND_SETUP,
+    EEPROM_SETUP_BITS,
+    TRANSMITTER_SCAN_INTERVAL,
+    TRANSMITTER_SCAN_PACKETS,
+)
+from .commands import (
+    CommandQueue,
+    Command,
+    PRIORITY_SERVICE,
+    PRIORITY_POLL,
+    PRIORITY_BACKGROUND,
+    PRIORITY_STREAM,
+)
+from .archive_store import ArchiveStore
+from .console import (
+    AsyncVantagePro2,
+    Request,
+    HILOWS_REQUEST,
+    LOOP_REQUEST,
+    LOOP2_REQUEST,
+    VERSION_REQUEST,
 )
+from .decoder import (
+    HILOWS_DECODER,
+    LOOP2_DECODER,
+    LOOP2_PACKET_TYPE,
+    LOOP_DECODER,
+    LOOP_REQUIRED,
+    LOOP_REQUIRED_KEYS,
+    Packet,
+    merge_loop2,
+)
+from .pipeline import LOOP2_PIPELINE, READOUT_PIPELINE, SOURCE_ARCHIVE
+from .eeprom import CONFIG_REQUEST, ConsoleConfig
+from .breaker import UNREACHABLE_EXCEPTIONS, CircuitBreaker
+from .scheduler import RefreshScheduler
+from .transmitters import TransmitterScanner
+from .transport import async_link_from_url
+from .workers import StationWorkers
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 
@@ -40,24 +82,66 @@ _LOGGER: logging.Logger = logging.getLogger(__package__)
 class DavisVantageClient:
     """Davis Vantage Client class"""
 
-    _vantagepro2: VantagePro2 = None  # type: ignore
+    _queue: CommandQueue = None  # type: ignore
     _latitude: float = 0.0
     _longitude: float = 0.0
     _elevation: int = 0
     _firmware_version: str | None = None
     _last_readout_duration: float = 0
+    _retry_budget: int = 0
+    _retries: int = 0
 
     def __init__(
-        self, hass: HomeAssistant, protocol: str, link: str, persistent_connection: bool
+        self,
+        hass: HomeAssistant,
+        protocol: str,
+        link: str,
+        persistent_connection: bool,
+        loop_streaming: bool = False,
+        cadences: dict[str, int] | None = None,
+        archive_store: ArchiveStore | None = None,
+        loop2: bool = False,
+        workers: StationWorkers | None = None,
     ) -> None:
         self._hass = hass
         self._protocol = protocol
         self._link = link
         self._rain_collector = ""
-        self._last_data: LoopDataParserRevB = {}  # type: ignore
-        self._last_raw_data: DataParser = {}  # type: ignore
-        self._last_raw_hilows: DataParser = {}  # type: ignore
+        self._last_data: Packet = Packet(b"", {})
+        self._last_raw_data: dict[str, Any] = {}
+        self._last_raw_hilows: dict[str, Any] = {}
+        self._last_hilows: Packet | None = None
+        self._last_loop_time: datetime | None = None
+        self._last_hilows_time: datetime | None = None
+        self._last_decoded: Packet | None = None
+        self._last_inputs: tuple[Any, ...] | None = None
+        self._entity_keys: frozenset[str] | None = None
+        self._consumers: list[frozenset[str]] = []
+        self._loop_decoder = LOOP_DECODER
+        self._pipeline = READOUT_PIPELINE
+        self._loop2_pipeline = LOOP2_PIPELINE
+        self._readout_selected = True
+        self._loop2 = loop2
+        self._last_loop2: Packet | None = None
+        self._poll_loop2 = False
+        self._last_archives: ListDict | None = None
+        self._archive_cursor: datetime | None = None
+        self._archive_listeners: list[Callable[[ListDict], None]] = []
+        self._transmitters = TransmitterScanner(
+            TRANSMITTER_SCAN_INTERVAL, TRANSMITTER_SCAN_PACKETS
+        )
+        self._transmitter_listeners: list[Callable[[frozenset[str]], None]] = []
+        self._archive_store = archive_store
+        self._workers = workers
+        self._archive_download_task: asyncio.Task[None] | None = None
+        self._archive_download_progress: float | None = None
+        self._scheduler = RefreshScheduler(cadences or {})
+        self._breaker = CircuitBreaker()
+        self._config = ConsoleConfig()
         self._persistent_connection = persistent_connection
+        self._loop_streaming = persistent_connection and loop_streaming
+        self._stream_task: asyncio.Task[None] | None = None
+        self._time_zone: ZoneInfo | None = None
 
     @property
     def latitude(self) -> float:
@@ -75,27 +159,85 @@ class DavisVantageClient:
     def firmware_version(self) -> str | None:
         return self._firmware_version
 
-    def get_vantagepro2fromurl(self, url: str) -> VantagePro2 | None:
-        try:
-            vp = VantagePro2.from_url(url)
-            if not self._persistent_connection:
-                vp.link.close()
-            return vp
-        except Exception as e:
-            raise e
+    @property
+    def archive_period(self) -> int:
+        return self._config.archive_period if self._config.loaded else 0
+
+    @property
+    def archive_store(self) -> ArchiveStore | None:
+        return self._archive_store
+
+    @property
+    def archive_needed(self) -> bool:
+        """Return True if the new archive records are used.
+
+        They are stored and passed to the listeners, like the statistics
+        import, or the pipeline in use reads values of the latest record.
+        With LOOP2 the console's wind averages replace most of those.
+        """
+        if not self._readout_selected:
+            self.select_readout()
+        pipeline = self._loop2_pipeline if self._loop2 else self._pipeline
+        return bool(
+            self._archive_store is not None
+            or self._archive_listeners
+            or SOURCE_ARCHIVE in pipeline.sources
+        )
+
+    @property
+    def pipelining(self) -> bool:
+        """Return True if independent commands are sent back-to-back."""
+        return self._queue is not None and self._queue.console.link.pipelining
+
+    @property
+    def streaming(self) -> bool:
+        """Return True if the data is received as a continuous LOOP stream."""
+        return self._loop_streaming
+
+    async def _async_command(
+        self, priority: int, command: Command, deadline: float = DEADLINE_COMMAND
+    ) -> Any:
+        """Run a command once the command queue hands over the link."""
+        if self._queue is None:
+            await self.connect_to_station()
+        return await self._queue.submit(priority, command, deadline)
+
+    async def _async_read_phase(
+        self, priority: int, command: Command, deadline: float
+    ) -> Any:
+        """Run a readout command, again after a bad CRC or incomplete packet.
+
+        The queue resyncs the link before the retry. All reads of a readout
+        share its retry budget, so a noisy line can't stretch a readout much.
+        """
+        while True:
+            try:
+                return await self._async_command(priority, command, deadline)
+            except (BadCRCException, BadDataException) as e:
+                if self._retry_budget <= 0:
+                    raise
+                self._retry_budget -= 1
+                self._retries += 1
+                _LOGGER.debug(
+                    "Retrying %s after %r", getattr(command, "__name__", command), e
+                )
 
-    async def async_get_vantagepro2fromurl(self, url: str) -> VantagePro2 | None:
-        _LOGGER.debug("async_get_vantagepro2fromurl with url=%s", url)
-        vp = None
+    async def connect_to_station(self):
+        _LOGGER.debug("connect_to_station with url=%s", self.get_link())
         try:
-            loop = asyncio.get_event_loop()
-            vp = await loop.run_in_executor(None, self.get_vantagepro2fromurl, url)
+            console = AsyncVantagePro2(
+                async_link_from_url(self._hass, self.get_link(), self._workers)
+            )
+            self._queue = CommandQueue(
+                self._hass, console, self._persistent_connection
+            )
         except Exception as e:
-            _LOGGER.error("Error on opening device from url: %s: %s", url, e)
-        return vp
+            _LOGGER.error("Error on opening device from url: %s: %s", self.get_link(), e)
 
-    async def connect_to_station(self):
-        self._vantagepro2 = await self.async_get_vantagepro2fromurl(self.get_link())  # type: ignore
+    async def async_disconnect(self) -> None:
+        """Stop the command queue and close the link to the weather station."""
+        if self._queue is not None:
+            await self._queue.async_close()
 
     async def get_station_info(self):
         static_info = await self.async_get_static_info()
@@ -112,96 +254,261 @@ class DavisVantageClient:
         if elevation:
             self._elevation = elevation
 
-    def get_current_data(
-        self,
-    ) -> tuple[LoopDataParserRevB | None, ListDict | None, HighLowParserRevB | None]:
-        """Get current date from weather station."""
-        data = None
-        archives = None
-        hilows = None
+    async def async_get_current_data(self) -> Packet | None:
+        """Get current date from weather station async.
 
+        A LOOP packet that stays bad after the retries fails the readout,
+        but the highs and lows and archives are still read. While the
+        station is unreachable only a due probe is done.
+        """
+        if not self._breaker.is_closed and not await self.async_probe():
+            return self.process_error(f"Couldn't reach the station on {self.get_link()}")
         start_readout = datetime.now()
-
-        if not self._vantagepro2:
-            self.get_vantagepro2fromurl(self.get_link())
-
+        self._retry_budget = READOUT_RETRIES
         try:
-            self._vantagepro2.link.open()
             _LOGGER.debug("Start get_current_data")
-            data = self._vantagepro2.get_current_data()
+            # With LOOP2 every other readout is a LOOP2 packet, once a LOOP
+            # packet is there to merge it into
+            poll_loop2 = (
+                self._loop2 and self._poll_loop2 and bool(self._last_data.raw_bytes)
+            )
+            self._poll_loop2 = not poll_loop2
+            new_data = None
+            if poll_loop2:
+                try:
+                    new_data = await self.async_read_loop_packet(
+                        LOOP2_REQUEST, start_readout
+                    )
+                except BadAckException:
+                    self.disable_loop2()
+            if new_data is None:
+                try:
+                    new_data = await self.async_read_loop_packet(
+                        LOOP_REQUEST, start_readout
+                    )
+                except (BadCRCException, BadDataException):
+                    await self.async_get_additional_data(start_readout)
+                    raise
             _LOGGER.debug("End get_current_data:")
+            archives, hilows = await self.async_get_additional_data(start_readout)
+            self._last_readout_duration = (
+                datetime.now() - start_readout
+            ).total_seconds()
+            return self.process_current_data(new_data, archives, hilows)
         except Exception as e:
-            if not self._persistent_connection:
-                self._vantagepro2.link.close()
-            raise e
+            self.record_readout_error(e)
+            return self.process_error(f"Couldn't acquire data on {self.get_link()}: {e}")
+
+    def record_readout_error(self, error: Exception) -> None:
+        """Log a failed readout, back off when the station doesn't answer.
+
+        Once the breaker is open the failures are no longer logged as errors.
+        """
+        if not isinstance(error, UNREACHABLE_EXCEPTIONS):
+            self.record_reachable()
+        elif self._breaker.record_failure(time.monotonic()):
+            _LOGGER.warning(
+                "%s doesn't answer after %d readouts, probing it again in %.0f s",
+                self.get_link(),
+                self._breaker.consecutive_failures,
+                self._breaker.next_probe - time.monotonic(),  # type: ignore
+            )
+        if self._breaker.is_closed:
+            _LOGGER.error("Couldn't acquire data from %s: %s", self.get_link(), error)
+        else:
+            _LOGGER.debug("Couldn't acquire data from %s: %s", self.get_link(), error)
 
-        try:
-            _LOGGER.debug("Start get_hilows")
-            hilows = self._vantagepro2.get_hilows()
-            _LOGGER.debug("End get_hilows")
-        except Exception as e:
-            _LOGGER.error("Couldn't get hilows: %s", e)
+    def record_reachable(self) -> None:
+        if self._breaker.record_success():
+            _LOGGER.info("%s answers again", self.get_link())
 
-        try:
-            end_datetime = datetime.now()
-            start_datetime = end_datetime - timedelta(
-                minutes=self._vantagepro2.archive_period * 2  # type: ignore
-            )
-            _LOGGER.debug("Start get_archives")
-            archives = self._vantagepro2.get_archives(start_datetime, end_datetime)  # type: ignore
-            _LOGGER.debug("End get_archives")
-        except Exception as e:
-            _LOGGER.error("Couldn't get archives: %s", e)
+    async def async_probe(self) -> bool:
+        """Wake up the console when a probe is due, instead of a full readout.
 
+        Returns True if the station answered and the breaker is closed again.
+        """
+        if not self._breaker.is_probe_due(time.monotonic()):
+            return False
+        self._breaker.start_probe()
         try:
-            _LOGGER.debug("Start get_rain_collector")
-            self._rain_collector = self.get_rain_collector()
-            _LOGGER.debug("End get_rain_collector")
+            await self._async_command(PRIORITY_POLL, AsyncVantagePro2.wake_up)
         except Exception as e:
-            _LOGGER.error("Couldn't get rain_collector: %s", e)
-        finally:
-            if not self._persistent_connection:
-                self._vantagepro2.link.close()
+            self._breaker.record_failure(time.monotonic())
+            _LOGGER.debug("Probe of %s failed: %r", self.get_link(), e)
+            return False
+        self.record_reachable()
+        return True
+
+    async def async_read_loop_packet(self, request: Request, now: datetime) -> bytes:
+        """Read a LOOP or LOOP2 packet, on a pipelining link with the due reads."""
+        if self.pipelining:
+            return await self._async_read_phase(
+                PRIORITY_POLL,
+                lambda console: self.async_read_pipelined(console, now, request),
+                DEADLINE_PIPELINE,
+            )
+        return await self._async_read_phase(
+            PRIORITY_POLL,
+            AsyncVantagePro2.get_loop2_packet
+            if request is LOOP2_REQUEST
+            else AsyncVantagePro2.get_loop_packet,
+            DEADLINE_LOOP,
+        )
 
-        self._last_readout_duration = (datetime.now() - start_readout).total_seconds()
+    def get_due_requests(self, now: datetime) -> list[tuple[str, Request]]:
+        """Return the highs and lows and setup reads that can be pipelined."""
+        requests = []
+        if self._scheduler.is_due(COMMAND_HILOWS, now):
+            requests.append((COMMAND_HILOWS, HILOWS_REQUEST))
+        if not self._config.loaded or self._scheduler.is_due(COMMAND_SETUP, now):
+            requests.append((COMMAND_SETUP, CONFIG_REQUEST))
+        return requests
 
-        return data, archives, hilows
+    async def async_read_pipelined(
+        self,
+        console: AsyncVantagePro2,
+        now: datetime,
+        loop_request: Request | None = None,
+    ) -> bytes | None:
+        """Read the due highs and lows and setup and a LOOP packet in one go.
+
+        The LOOP command goes last, so no command sent after it stops the
+        packet. A failed highs and lows or setup read stays due and is read
+        on its own afterwards.
+        """
+        due = self.get_due_requests(now)
+        requests = [request for _, request in due]
+        if loop_request is not None:
+            requests.append(loop_request)
+        replies = await console.pipeline(requests)
+        for (command, _), reply in zip(due, replies):
+            if isinstance(reply, Exception):
+                _LOGGER.debug("Pipelined %s read failed: %r", command, reply)
+            elif command == COMMAND_HILOWS:
+                self.set_hilows(reply, now)
+            else:
+                self._config.set_data(reply)
+                self.apply_config(console)
+        if loop_request is None:
+            return None
+        if isinstance(replies[-1], Exception):
+            raise replies[-1]
+        return replies[-1]
+
+    def set_hilows(self, raw_hilows: bytes, now: datetime) -> None:
+        """Decode a HILOWS packet, unless it equals the last one."""
+        # Unchanged highs and lows keep the processed readout valid
+        if self._last_hilows is None or raw_hilows != self._last_hilows.raw_bytes:
+            self._last_hilows = HILOWS_DECODER.decode(raw_hilows, now)
+        self._last_hilows_time = now
+        self._scheduler.mark_done(COMMAND_HILOWS, now)
+
+    async def async_get_additional_data(
+        self, now: datetime | None = None
+    ) -> tuple[ListDict | None, Packet | None]:
+        """Get hilows, archives and console setup when due.
+
+        Every readout is queued on its own, so service calls can go first.
+        On a pipelining link the highs and lows and setup go together.
+        """
+        now = now or datetime.now()
+
+        if self.pipelining and len(self.get_due_requests(now)) > 1:
+            try:
+                await self._async_command(
+                    PRIORITY_BACKGROUND,
+                    lambda console: self.async_read_pipelined(console, now),
+                    DEADLINE_PIPELINE,
+                )
+            except Exception as e:
+                _LOGGER.error("Couldn't get hilows and console setup: %s", e)
+
+        if self._scheduler.is_due(COMMAND_HILOWS, now):
+            try:
+                _LOGGER.debug("Start get_hilows")
+                raw_hilows = await self._async_read_phase(
+                    PRIORITY_BACKGROUND,
+                    AsyncVantagePro2.get_hilows_packet,
+                    DEADLINE_HILOWS,
+                )
+                self.set_hilows(raw_hilows, now)
+                _LOGGER.debug("End get_hilows")
+            except Exception as e:
+                _LOGGER.error("Couldn't get hilows: %s", e)
+
+        if not self._config.loaded or self._scheduler.is_due(COMMAND_SETUP, now):
+            try:
+                _LOGGER.debug("Start load_config")
+                await self._async_read_phase(
+                    PRIORITY_BACKGROUND, self.async_load_config, DEADLINE_EEPROM
+                )
+                _LOGGER.debug("End load_config")
+            except Exception as e:
+                _LOGGER.error("Couldn't get console setup: %s", e)
 
-    async def async_get_current_data(self) -> LoopDataParserRevB | None:
-        """Get current date from weather station async."""
-        data = self._last_data
         try:
-            loop = asyncio.get_event_loop()
-            new_data, archives, hilows = await loop.run_in_executor(
-                None, self.get_current_data
-            )
-            if new_data:
-                new_raw_data = self.__get_full_raw_data(new_data)
-                self._last_raw_data = new_raw_data
-                self.remove_all_incorrect_data(new_raw_data, new_data)
-                self.add_additional_info(new_data)
-                self.convert_values(new_data)
+            archive_period = self.archive_period
+            if archive_period and self.archive_needed and self._scheduler.is_due(
+                COMMAND_ARCHIVES, now, archive_period, self._archive_cursor
+            ):
+                _LOGGER.debug("Start get_archives")
+                archives = await self._async_read_phase(
+                    PRIORITY_BACKGROUND,
+                    self.async_read_new_archives,
+                    self.get_archive_deadline(now),
+                )
+                self._scheduler.mark_done(COMMAND_ARCHIVES, now)
+                _LOGGER.debug("End get_archives, %d new records", len(archives))
                 if archives:
-                    self.add_archive_info(archives, new_data)
-                if hilows:
-                    new_raw_hilows = self.__get_full_raw_data_hilows(hilows)
-                    self._last_raw_hilows = new_raw_hilows
-                    self.remove_all_incorrect_hilows(new_raw_hilows, hilows)
-                    self.add_hilows_info(hilows, new_data)
-                data = new_data
-                data["Datetime"] = self.get_iso_now()
-                if contains_correct_raw_data(new_raw_data):
-                    data["LastError"] = ""
-                    data["LastSuccessTime"] = self.get_iso_now()
-                else:
-                    data["LastError"] = "Received partly incorrect data"
-            else:
-                data["LastError"] = "Couldn't acquire data, no data received"
-            data["LastReadoutDuration"] = self._last_readout_duration
-
+                    self._last_archives = archives
+                    await self.async_store_archives(archives)
+                    self.notify_archive_listeners(archives)
         except Exception as e:
-            _LOGGER.error("Couldn't acquire data from %s: %s", self.get_link(), e)
-            data["LastError"] = f"Couldn't acquire data on {self.get_link()}: {e}"
+            _LOGGER.error("Couldn't get archives: %s", e)
+
+        return self._last_archives, self._last_hilows
+
+    def process_current_data(
+        self,
+        new_data: bytes | None,
+        archives: ListDict | None,
+        hilows: Packet | None,
+    ) -> Packet:
+        """Turn a readout into the data presented to the coordinator."""
+        data = self._last_data
+        loop_packet = bool(new_data and new_data[4] != LOOP2_PACKET_TYPE)
+        if new_data and not loop_packet:
+            if self._last_loop2 is None or new_data != self._last_loop2.raw_bytes:
+                self._last_loop2 = LOOP2_DECODER.decode(new_data)
+            # The fields shared with LOOP are fresh, the LOOP only fields,
+            # like the extra sensors, come from the last LOOP packet
+            new_data = merge_loop2(data.raw_bytes, new_data) if data.raw_bytes else None
+        if new_data:
+            self.record_reachable()
+            data = self.process_loop_packet(new_data, archives, hilows)
+            if loop_packet and self._transmitters.add_packet(
+                new_data, time.monotonic()
+            ):
+                self.notify_transmitter_listeners()
+            self._last_raw_data = data.raw
+            if hilows:
+                self._last_raw_hilows = hilows.raw
+            now = self.get_iso_now()
+            data["Datetime"] = now
+            data.pop("LastErrorTime", None)
+            self._last_loop_time = datetime.now()
+            if not data.invalid & LOOP_REQUIRED:
+                data["LastError"] = ""
+                data["LastSuccessTime"] = now
+            else:
+                data["LastError"] = "Received partly incorrect data"
+        else:
+            data["LastError"] = "Couldn't acquire data, no data received"
+        data["LastReadoutDuration"] = self._last_readout_duration
+        self.add_queue_info(data)
+        self.add_data_age(data)
+        self.add_breaker_info(data)
+        data["ArchiveDownloadProgress"] = self._archive_download_progress
 
         if data["LastError"]:
             data["LastErrorTime"] = self.get_iso_now()
@@ -209,282 +516,597 @@ class DavisVantageClient:
         self._last_data = data
         return data
 
-    def __get_full_raw_data(self, data: LoopDataParserRevB) -> DataParser:
-        raw_data = DataParser(data.raw_bytes, LoopDataParserRevB.LOOP_FORMAT)  # type: ignore
-        raw_data["HumExtra"] = struct.unpack(b"7B", raw_data["HumExtra"])  # type: ignore
-        raw_data["ExtraTemps"] = struct.unpack(b"7B", raw_data["ExtraTemps"])  # type: ignore
-        raw_data["SoilMoist"] = struct.unpack(b"4B", raw_data["SoilMoist"])  # type: ignore
-        raw_data["SoilTemps"] = struct.unpack(b"4B", raw_data["SoilTemps"])  # type: ignore
-        raw_data["LeafWetness"] = struct.unpack(b"4B", raw_data["LeafWetness"])  # type: ignore
-        raw_data["LeafTemps"] = struct.unpack(b"4B", raw_data["LeafTemps"])  # type: ignore
-        raw_data.tuple_to_dict("ExtraTemps")
-        raw_data.tuple_to_dict("LeafTemps")
-        raw_data.tuple_to_dict("SoilTemps")
-        raw_data.tuple_to_dict("HumExtra")
-        raw_data.tuple_to_dict("LeafWetness")
-        raw_data.tuple_to_dict("SoilMoist")
-        return raw_data
-
-    def __get_full_raw_data_hilows(self, data: HighLowParserRevB) -> DataParser:
-        raw_data = DataParser(data.raw_bytes, HighLowParserRevB.HILOWS_FORMAT)  # type: ignore
-        return raw_data
-
-    def get_davis_time(self) -> datetime | None:
-        """Get time from weather station."""
-        data = None
+    def process_loop_packet(
+        self, raw: bytes, archives: ListDict | None, hilows: Packet | None
+    ) -> Packet:
+        """Decode and process a LOOP packet, redoing only what changed.
+
+        While the hilows, archive record and station setup stay the same, a
+        packet identical to the previous one is not processed at all, and
+        otherwise only the values depending on the changed fields are
+        computed again.
+        """
+        archive = archives[-1] if archives else None
+        station = self.get_station_values()
+        if not self._readout_selected:
+            self.select_readout()
+        loop2 = self._last_loop2 if self._loop2 else None
+        pipeline = self._pipeline if loop2 is None else self._loop2_pipeline
+        previous = self._last_decoded
+        if (
+            previous is None
+            or self._last_inputs is None
+            or hilows is not self._last_inputs[0]
+            or archive is not self._last_inputs[1]
+            or station != self._last_inputs[2]
+            or loop2 is not self._last_inputs[3]
+        ):
+            decoded = self._loop_decoder.decode(raw)
+            data = decoded.copy()
+            pipeline.apply(data, hilows, archive, station, loop2=loop2)
+        elif raw == previous.raw_bytes:
+            return self._last_data
+        else:
+            decoded, changed = self._loop_decoder.decode_changes(raw, None, previous)
+            data = decoded.copy(self._last_data)
+            pipeline.apply(
+                data,
+                hilows,
+                archive,
+                station,
+                changed=changed,
+                decoded=decoded,
+                loop2=loop2,
+            )
+        self._last_decoded = decoded
+        self._last_inputs = (hilows, archive, station, loop2)
+        return data
+
+    def process_error(self, error: str) -> Packet:
+        """Register an error on the last known data."""
+        data = self._last_data
+        data["LastError"] = error
+        data["LastErrorTime"] = self.get_iso_now()
+        self.add_queue_info(data)
+        self.add_data_age(data)
+        self.add_breaker_info(data)
+        self._last_data = data
+        return data
+
+    async def async_read_new_archives(self, console: AsyncVantagePro2) -> ListDict:
+        """Read the archive records after the cursor and move the cursor on.
+
+        The cursor is the timestamp of the last record received, it starts
+        two archive periods before the console time. The console clock is
+        read along to know when the next record is written. A record that
+        isn't there when expected has the clock read again the next time.
+        """
+        clock_read = self._archive_cursor is None or (
+            self._scheduler.is_clock_offset_due(datetime.now())
+        )
+        if clock_read:
+            console_time = await self.async_read_clock_offset(console)
+            if self._archive_cursor is None:
+                self._archive_cursor = console_time - timedelta(
+                    minutes=self.archive_period * 2
+                )
+        archives = await console.get_archives(self._archive_cursor)
+        if archives:
+            self._archive_cursor = archives[-1]["Datetime"]
+        elif not clock_read:
+            self._scheduler.invalidate_clock_offset()
+        return archives
+
+    async def async_read_clock_offset(self, console: AsyncVantagePro2) -> datetime:
+        """Read the console time and register the offset of the console clock."""
+        console_time = await console.gettime()
+        # The console time is truncated to the second
+        self._scheduler.set_clock_offset(
+            console_time + timedelta(seconds=0.5), datetime.now()
+        )
+        return console_time
+
+    def get_next_archive_time(self) -> datetime | None:
+        """Return the local time the next archive record can be read."""
+        return self._scheduler.get_next_archive_time(
+            self._archive_cursor, self.archive_period
+        )
+
+    def align_interval(self, interval: float) -> float:
+        """Shorten the interval to the next readout to end when the next record can be read."""
+        next_archive = self.get_next_archive_time()
+        if next_archive is not None and self.archive_needed:
+            until = (next_archive - datetime.now()).total_seconds()
+            if 0 < until < interval:
+                return until
+        return interval
+
+    async def async_restore_archive_cursor(self) -> None:
+        """Continue after the last stored record, so missed records are backfilled."""
+        if self._archive_store is None:
+            return
         try:
-            self._vantagepro2.link.open()
-            data = self._vantagepro2.gettime()
+            self._archive_cursor = await self._archive_store.async_latest()
         except Exception as e:
-            raise e
-        finally:
-            if not self._persistent_connection:
-                self._vantagepro2.link.close()
-        return data
+            _LOGGER.error("Couldn't read the archive store: %s", e)
+        _LOGGER.debug("Archive cursor restored to %s", self._archive_cursor)
+
+    async def async_store_archives(self, archives: ListDict) -> None:
+        if self._archive_store is None:
+            return
+        try:
+            await self._archive_store.async_append(archives)
+        except Exception as e:
+            _LOGGER.error("Couldn't store archive records: %s", e)
+
+    def get_archive_deadline(self, now: datetime) -> float:
+        """Return the deadline for reading the archive records after the cursor.
+
+        After an outage the backfill can span the whole archive memory. The
+        console clock may be read first.
+        """
+        if self._archive_cursor is None or not self.archive_period:
+            return DEADLINE_ARCHIVES
+        records = (now - self._archive_cursor).total_seconds() / (
+            self.archive_period * 60
+        )
+        pages = min(records / ARCHIVE_RECORDS_PER_PAGE + 1, ARCHIVE_MEMORY_PAGES)
+        deadline = DEADLINE_ARCHIVES + max(pages, 0) * DEADLINE_ARCHIVE_PAGE
+        if self._scheduler.is_clock_offset_due(now):
+            deadline += DEADLINE_COMMAND
+        return deadline
+
+    @property
+    def archive_download_running(self) -> bool:
+        return (
+            self._archive_download_task is not None
+            and not self._archive_download_task.done()
+        )
+
+    def start_archive_download(self, resume: bool = True) -> None:
+        """Start downloading the whole archive memory in the background."""
+        if self._archive_store is None:
+            _LOGGER.error("Couldn't download archive: no local archive store")
+            return
+        if self.archive_download_running:
+            _LOGGER.warning("Archive download is already running")
+            return
+        self._archive_download_task = self._hass.async_create_background_task(
+            self.async_download_archive(resume),
+            f"{__package__} archive download {self._link}",
+        )
+
+    async def async_resume_archive_download(self) -> None:
+        """Resume a download that was interrupted, like by a restart."""
+        if self._archive_store is None:
+            return
+        try:
+            state = await self._archive_store.async_get_state(ARCHIVE_DOWNLOAD_STATE)
+        except Exception as e:
+            _LOGGER.error("Couldn't read archive download state: %s", e)
+            return
+        if state:
+            _LOGGER.info("Resuming archive download after %s", state["cursor"])
+            self.start_archive_download(resume=True)
+
+    async def async_stop_archive_download(self) -> None:
+        """Stop a running download, it can be resumed later."""
+        if not self.archive_download_running:
+            return
+        self._archive_download_task.cancel()  # type: ignore
+        try:
+            await self._archive_download_task  # type: ignore
+        except asyncio.CancelledError:
+            pass
+        self._archive_download_task = None
+
+    async def async_download_archive(self, resume: bool = True) -> None:
+        """Download the whole archive memory into the archive store.
+
+        The archive is read in batches of pages, every batch is a queued
+        command so polling continues in between. Records are stored per
+        batch and the position is saved, so an interrupted download resumes
+        after the last completed batch.
+        """
+        store: ArchiveStore = self._archive_store  # type: ignore
+        state = (
+            await store.async_get_state(ARCHIVE_DOWNLOAD_STATE) if resume else None
+        ) or {}
+        cursor = datetime.fromisoformat(state["cursor"]) if "cursor" in state else None
+        pages_done = state.get("pages_done", 0)
+        self._archive_download_progress = 0.0
+        _LOGGER.info("Start archive download after %s", cursor or "the oldest record")
+        try:
+            while True:
+                records, pages_read, pages_total = await self._async_command(
+                    PRIORITY_BACKGROUND,
+                    lambda console: self._async_read_archive_pages(console, cursor),
+                    DEADLINE_ARCHIVES
+                    + ARCHIVE_DOWNLOAD_BATCH_PAGES * DEADLINE_ARCHIVE_PAGE,
+                )
+                if cursor is not None:
+                    records = [r for r in records if r["Datetime"] > cursor]
+                await store.async_append(records)
+                if records:
+                    self.notify_archive_listeners(ListDict(records))
+                pages_expected = pages_done + pages_total
+                pages_done += pages_read
+                self._archive_download_progress = (
+                    round(100 * pages_done / pages_expected, 1)
+                    if pages_expected
+                    else 100.0
+                )
+                if not records or pages_read >= pages_total:
+                    break
+                cursor = max(record["Datetime"] for record in records)
+                await store.async_set_state(
+                    ARCHIVE_DOWNLOAD_STATE,
+                    {"cursor": cursor.isoformat(), "pages_done": pages_done},
+                )
+                _LOGGER.debug(
+                    "Archive download at %s%%, %d pages",
+                    self._archive_download_progress,
+                    pages_done,
+                )
+            await store.async_set_state(ARCHIVE_DOWNLOAD_STATE, None)
+            self._archive_download_progress = 100.0
+            _LOGGER.info("Archive download finished, %d pages", pages_done)
+        except Exception as e:
+            _LOGGER.error("Archive download interrupted, can be resumed: %s", e)
+
+    async def _async_read_archive_pages(
+        self, console: AsyncVantagePro2, cursor: datetime | None
+    ) -> tuple[list[Any], int, int]:
+        records: list[Any] = []
+        pages_read = pages_total = 0
+        async with aclosing(
+            console.dump_pages(cursor, ARCHIVE_DOWNLOAD_BATCH_PAGES)
+        ) as dump:
+            async for pages_read, pages_total, page_records in dump:
+                records.extend(page_records)
+        return records, pages_read, pages_total
+
+    def async_add_archive_listener(
+        self, listener: Callable[[ListDict], None]
+    ) -> Callable[[], None]:
+        """Call listener with every batch of archive records read.
+
+        Records of the regular readouts are passed exactly once, a full
+        archive download passes the records of every batch it reads.
+        Returns a function to remove the listener.
+        """
+        self._archive_listeners.append(listener)
+        return lambda: self._archive_listeners.remove(listener)
+
+    @property
+    def transmitter_keys(self) -> frozenset[str]:
+        """The keys of the extra, soil and leaf sensors reporting."""
+        return self._transmitters.keys
+
+    @property
+    def transmitters_scanned(self) -> bool:
+        """Whether the first scan for the extra, soil and leaf sensors is done."""
+        return self._transmitters.done
+
+    def async_add_transmitter_listener(
+        self, listener: Callable[[frozenset[str]], None]
+    ) -> Callable[[], None]:
+        """Call listener with the transmitter keys after the first scan and
+        whenever a scan changes them.
+
+        Returns a function to remove the listener.
+        """
+        self._transmitter_listeners.append(listener)
+        return lambda: self._transmitter_listeners.remove(listener)
+
+    def notify_transmitter_listeners(self) -> None:
+        for listener in list(self._transmitter_listeners):
+            try:
+                listener(self._transmitters.keys)
+            except Exception as e:
+                _LOGGER.error("Error in transmitter listener %s: %s", listener, e)
+
+    def disable_loop2(self) -> None:
+        """Fall back to LOOP packets only, for consoles without LOOP2."""
+        _LOGGER.warning(
+            "The console doesn't support LOOP2 packets (firmware 1.90 or later), "
+            "using LOOP packets only"
+        )
+        self._loop2 = False
+
+    def set_entity_keys(self, keys: Iterable[str]) -> None:
+        """Limit the readout to the keys read by the entities.
+
+        Until the entities are known every key is computed. The LOOP fields
+        needed for a successful readout are always decoded. The decoder and
+        pipeline are compiled at the next readout, once for all the entities
+        added or removed before it.
+        """
+        keys = frozenset(keys)
+        if keys != self._entity_keys:
+            self._entity_keys = keys
+            self._readout_selected = False
+
+    def add_consumer(self, keys: Collection[str]) -> Callable[[], None]:
+        """Compute keys as well, whether an entity reads them or not.
+
+        Returns a function to remove the consumer.
+        """
+        consumer = frozenset(keys)
+        self._consumers.append(consumer)
+        self._readout_selected = False
+
+        def remove_consumer() -> None:
+            self._consumers.remove(consumer)
+            self._readout_selected = False
+
+        return remove_consumer
+
+    def select_readout(self) -> None:
+        """Compile the decoder and pipeline for the keys consumed."""
+        if self._entity_keys is None:
+            self._loop_decoder = LOOP_DECODER
+            self._pipeline = READOUT_PIPELINE
+            self._loop2_pipeline = LOOP2_PIPELINE
+        else:
+            keys = self._entity_keys.union(*self._consumers)
+            self._pipeline = READOUT_PIPELINE.select(keys)
+            self._loop2_pipeline = LOOP2_PIPELINE.select(keys)
+            self._loop_decoder = LOOP_DECODER.select(
+                keys
+                | self._pipeline.fields
+                | self._loop2_pipeline.fields
+                | set(LOOP_REQUIRED_KEYS)
+            )
+        self._readout_selected = True
+        # The next packet is processed in full
+        self._last_decoded = None
+
+    def notify_archive_listeners(self, archives: ListDict) -> None:
+        for listener in list(self._archive_listeners):
+            try:
+                listener(archives)
+            except Exception as e:
+                _LOGGER.error("Error in archive listener %s: %s", listener, e)
+
+    def start_streaming(
+        self, callback: Callable[[Packet], None], interval: int
+    ) -> None:
+        """Start streaming LOOP packets, callback is called for every packet."""
+        if not self._loop_streaming or self._stream_task is not None:
+            return
+        self._stream_task = self._hass.async_create_background_task(
+            self.async_stream_current_data(callback, interval),
+            f"{__package__} stream {self._link}",
+        )
+
+    async def async_stop_streaming(self) -> None:
+        """Stop streaming LOOP packets and wait for the stream to end."""
+        if self._stream_task is None:
+            return
+        self._stream_task.cancel()
+        try:
+            await self._stream_task
+        except asyncio.CancelledError:
+            pass
+        self._stream_task = None
+
+    async def async_stream_current_data(
+        self, callback: Callable[[Packet], None], interval: int
+    ) -> None:
+        """Read LOOP packets as the console sends them, until cancelled.
+
+        Each batch covers one interval: the scheduled readouts are done
+        first, then one LOOP command delivers a packet every 2.5 s. A batch
+        has the lowest priority and ends early when another command waits,
+        or when the next archive record can be read.
+        """
+        while True:
+            if not self._breaker.is_closed:
+                await asyncio.sleep(max(self._breaker.next_probe - time.monotonic(), 0))
+                if not await self.async_probe():
+                    callback(
+                        self.process_error(
+                            f"Couldn't reach the station on {self.get_link()}"
+                        )
+                    )
+                    continue
+            packets = max(
+                1, math.ceil(self.align_interval(interval) / LOOP_PACKET_INTERVAL)
+            )
+            self._retry_budget = READOUT_RETRIES
+            try:
+                archives, hilows = await self.async_get_additional_data()
+                await self._async_command(
+                    PRIORITY_STREAM,
+                    lambda console: self._async_stream_batch(
+                        console, callback, packets, archives, hilows
+                    ),
+                    packets * LOOP_PACKET_INTERVAL + DEADLINE_LOOP,
+                )
+            except (BadCRCException, BadDataException) as e:
+                _LOGGER.warning("Restarting LOOP stream after bad packet: %s", e)
+                self.record_reachable()
+            except Exception as e:
+                if isinstance(e, BadAckException) and self._loop2:
+                    self.disable_loop2()
+                    continue
+                self.record_readout_error(e)
+                callback(
+                    self.process_error(f"Couldn't acquire data on {self.get_link()}: {e}")
+                )
+                if self._breaker.is_closed:
+                    await asyncio.sleep(interval)
+
+    async def _async_stream_batch(
+        self,
+        console: AsyncVantagePro2,
+        callback: Callable[[Packet], None],
+        packets: int,
+        archives: ListDict | None,
+        hilows: Packet | None,
+    ) -> None:
+        start_readout = datetime.now()
+        # LOOP2 packets are merged into a LOOP packet, the first batch
+        # streams LOOP packets only
+        loop2 = self._loop2 and bool(self._last_data.raw_bytes)
+        async with aclosing(
+            console.stream_loop_packets(packets, loop2)
+        ) as stream:
+            async for new_data in stream:
+                if start_readout:
+                    self._last_readout_duration = (
+                        datetime.now() - start_readout
+                    ).total_seconds()
+                    start_readout = None
+                if new_data[4] == LOOP2_PACKET_TYPE and not self._last_data.raw_bytes:
+                    # Nothing to merge it into yet, wait for the LOOP packet
+                    _LOGGER.debug("Skipping LOOP2 packet before the first LOOP packet")
+                else:
+                    callback(self.process_current_data(new_data, archives, hilows))
+                if self._queue.has_pending(PRIORITY_STREAM):
+                    break
 
     async def async_get_davis_time(self) -> datetime | None:
         """Get time from weather station async."""
         data = None
         try:
-            loop = asyncio.get_event_loop()
-            data = await loop.run_in_executor(None, self.get_davis_time)
+            data = await self._async_command(
+                PRIORITY_SERVICE, AsyncVantagePro2.gettime
+            )
         except Exception as e:
             _LOGGER.error("Couldn't get davis time: %s", e)
         return data
 
-    def set_davis_time(self, dtime: datetime) -> None:
-        """Set time of weather station."""
-        try:
-            self._vantagepro2.link.open()
-            self._vantagepro2.settime(dtime)
-        except Exception as e:
-            raise e
-        finally:
-            if not self._persistent_connection:
-                self._vantagepro2.link.close()
-
     async def async_set_davis_time(self) -> None:
         """Set time of weather station async."""
         try:
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(None, self.set_davis_time, datetime.now())
+            await self._async_command(
+                PRIORITY_SERVICE, lambda console: console.settime(datetime.now())
+            )
+            self._scheduler.invalidate_clock_offset()
         except Exception as e:
             _LOGGER.error("Couldn't set davis time: %s", e)
 
-    def get_info(self) -> dict[str, Any] | None:
-        try:
-            self._vantagepro2.link.open()
-            firmware_version = self._vantagepro2.firmware_version  # type: ignore
-            firmware_date = self._vantagepro2.firmware_date  # type: ignore
-            diagnostics = self._vantagepro2.diagnostics  # type: ignore
-        except Exception as e:
-            raise e
-        finally:
-            if not self._persistent_connection:
-                self._vantagepro2.link.close()
-        return {
-            "version": firmware_version,
-            "date": firmware_date,
-            "diagnostics": diagnostics,
-        }
-
     async def async_get_info(self) -> dict[str, Any] | None:
+        async def get_info(console: AsyncVantagePro2) -> dict[str, Any]:
+            return {
+                "version": await console.get_firmware_version(),
+                "date": await console.get_firmware_date(),
+                "diagnostics": await console.get_diagnostics(),
+            }
+
         info = None
         try:
-            loop = asyncio.get_event_loop()
-            info = await loop.run_in_executor(None, self.get_info)
+            info = await self._async_command(PRIORITY_SERVICE, get_info)
         except Exception as e:
             _LOGGER.error("Couldn't get firmware info: %s", e)
         return info
 
-    def get_static_info(self) -> dict[str, Any] | None:
-        try:
-            self._vantagepro2.link.open()
-            firmware_version = self._vantagepro2.firmware_version  # type: ignore
-            archive_period = self._vantagepro2.archive_period  # type: ignore
-        except Exception as e:
-            raise e
-        finally:
-            if not self._persistent_connection:
-                self._vantagepro2.link.close()
-        return {"version": firmware_version, "archive_period": archive_period}
-
     async def async_get_static_info(self) -> dict[str, Any] | None:
+        async def get_static_info(console: AsyncVantagePro2) -> str:
+            if console.link.pipelining:
+                replies = await console.pipeline([VERSION_REQUEST, CONFIG_REQUEST])
+                for reply in replies:
+                    if isinstance(reply, Exception):
+                        raise reply
+                self._config.set_data(replies[1])
+                self.apply_config(console)
+                return replies[0].decode()
+            firmware_version = await console.get_firmware_version()
+            await self.async_load_config(console)
+            return firmware_version
+
         info = None
         try:
-            loop = asyncio.get_event_loop()
-            info = await loop.run_in_executor(None, self.get_static_info)
+            firmware_version = await self._async_command(
+                PRIORITY_POLL, get_static_info
+            )
+            info = {"version": firmware_version, "archive_period": self.archive_period}
         except Exception as e:
             _LOGGER.error("Couldn't get static info: %s", e)
         return info
 
-    def set_yearly_rain(self, rain_clicks: int) -> None:
-        """Set yearly rain of weather station."""
-        try:
-            self._vantagepro2.link.open()
-            self._vantagepro2.set_yearly_rain(rain_clicks)
-        except Exception as e:
-            raise e
-        finally:
-            if not self._persistent_connection:
-                self._vantagepro2.link.close()
-
     async def async_set_yearly_rain(self, rain_clicks: int) -> None:
         """Set yearly rain of weather station async."""
         try:
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(None, self.set_yearly_rain, rain_clicks)
+            await self._async_command(
+                PRIORITY_SERVICE, lambda console: console.set_yearly_rain(rain_clicks)
+            )
         except Exception as e:
             _LOGGER.error("Couldn't set yearly rain: %s", e)
 
-    def set_archive_period(self, archive_period: int) -> None:
-        """Set archive periode, this will erase all archive data"""
-        try:
-            self._vantagepro2.link.open()
-            self._vantagepro2.set_archive_period(archive_period)
-        except Exception as e:
-            raise e
-        finally:
-            if not self._persistent_connection:
-                self._vantagepro2.link.close()
-
     async def async_set_archive_period(self, archive_period: int) -> None:
+        """Set archive periode, this will erase all archive data"""
         try:
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(None, self.set_archive_period, archive_period)
+            await self._async_command(
+                PRIORITY_SERVICE,
+                lambda console: console.set_archive_period(archive_period),
+            )
+            self._scheduler.invalidate(COMMAND_ARCHIVES)
+            self._config.invalidate()
+            self._archive_cursor = None
+            self._last_archives = None
         except Exception as e:
             _LOGGER.error("Couldn't set archive period: %s", e)
 
-    def add_additional_info(self, data: dict[str, Any]) -> None:
-        if data["TempOut"] is not None:
-            if data["HumOut"] is not None:
-                data["HeatIndex"] = calc_heat_index(data["TempOut"], data["HumOut"])
-                data["DewPoint"] = calc_dew_point(data["TempOut"], data["HumOut"])
-            if data["WindSpeed"] is not None:
-                data["WindChill"] = calc_wind_chill(data["TempOut"], data["WindSpeed"])
-                if data["HumOut"] is not None:
-                    data["FeelsLike"] = calc_feels_like(
-                        data["TempOut"], data["HumOut"], data["WindSpeed"]
-                    )
-        if data["WindSpeed"] == 0:
-            data["WindDir"] = None
-        if data["WindDir"] is not None:
-            data["WindDirRose"] = get_wind_rose(data["WindDir"])
-        if data["RainRate"] is not None:
-            data["IsRaining"] = data["RainRate"] > 0
-        data["ArchiveInterval"] = self._vantagepro2.archive_period
-
-        data["Latitude"] = self.latitude
-        data["Longitude"] = self.longitude
-        data["Elevation"] = self.elevation
-
-    def convert_values(self, data: dict[str, Any]) -> None:
-        del data["Datetime"]
-        if data["BarTrend"] is not None:
-            data["BarTrend"] = get_baro_trend(data["BarTrend"])
-        if data["UV"] is not None:
-            data["UV"] = get_uv(data["UV"])
-        if data["SolarRad"] is not None:
-            data["SolarRad"] = get_solar_rad(data["SolarRad"])
-        data["RainCollector"] = self._rain_collector
-        data["StormStartDate"] = self.strtodate(data["StormStartDate"])
-        data["SunRise"] = self.strtotime(data["SunRise"])
-        data["SunSet"] = self.strtotime(data["SunSet"])
-        self.correct_rain_values(data)
-
-    def correct_rain_values(self, data: dict[str, Any]):
-        rain_collector_factor: dict[str, float] = {
-            RAIN_COLLECTOR_IMPERIAL: 1.0,
-            RAIN_COLLECTOR_METRIC: 2 / 2.54,
-            RAIN_COLLECTOR_METRIC_0_1: 1 / 2.54,
+    def get_station_values(self) -> dict[str, Any]:
+        """Station setup values the readout pipeline adds or depends on."""
+        return {
+            "ArchiveInterval": self.archive_period,
+            "Latitude": self.latitude,
+            "Longitude": self.longitude,
+            "Elevation": self.elevation,
+            "RainCollector": self._rain_collector,
+            "RainFactor": RAIN_COLLECTOR_FACTOR.get(self._rain_collector, 1.0),
         }
-        factor = rain_collector_factor.get(data["RainCollector"], 1.0)
-        for key in [
-            "RainDay",
-            "RainMonth",
-            "RainYear",
-            "RainRate",
-            "RainStorm",
-            "RainRateDay",
-        ]:
-            if key in data:
-                if data[key] is not None:
-                    data[key] *= factor
-
-    def remove_all_incorrect_data(self, raw_data: DataParser, data: LoopDataParserRevB):
-        data_info = {key: value for key, value in LoopDataParserRevB.LOOP_FORMAT}
-        self.remove_incorrect_data(raw_data, data_info, data)
-
-    def remove_all_incorrect_hilows(
-        self, raw_data: DataParser, data: HighLowParserRevB
-    ):
-        data_info = {key: value for key, value in HighLowParserRevB.HILOWS_FORMAT}
-        self.remove_incorrect_data(raw_data, data_info, data)
-
-    def remove_incorrect_data(
-        self, raw_data: DataParser, data_info: dict[str, str], data: dict[str, Any]
-    ):
-        for key in data.keys():  # type: ignore
-            info_key = re.sub(r"\d+$", "", key)  # type: ignore
-            data_type = data_info.get(info_key, "")
-            raw_value = raw_data.get(info_key, 0)  # type: ignore
-            if self.is_incorrect_value(raw_value, data_type):  # type: ignore
-                data[key] = None  # type: ignore
-
-    def is_incorrect_value(self, raw_value: int, data_type: str) -> bool:
-        if (
-            ((data_type in ["B", "7s"]) and (raw_value == 255))
-            or ((data_type == "H") and (raw_value in [32767, 65535]))
-            or ((data_type == "h") and (raw_value in [32767, -32768]))
-        ):
-            return True
-        else:
-            return False
 
-    def add_archive_info(self, archives: ListDict | None, data: dict[str, Any]):
-        if not archives:
+    def add_queue_info(self, data: dict[str, Any]) -> None:
+        """Add the command queue metrics since the previous readout."""
+        if self._queue is None:
             return
-        latest_archive = archives[-1]
-        data["WindGust"] = latest_archive["WindHi"]
-        data["WindSpeedAvg"] = latest_archive["WindAvg"]
-        if data["WindSpeedAvg"] > 0:
-            if latest_archive["WindAvgDir"] < 255:
-                data["WindAvgDir"] = latest_archive["WindAvgDir"] * 22.5
-                data["WindAvgDirRose"] = get_wind_rose(data["WindAvgDir"])
-        if data["WindSpeedAvg"] is not None:
-            data["WindSpeedBft"] = convert_kmh_to_bft(
-                convert_to_kmh(data["WindSpeedAvg"])
+        stats = self._queue.stats(reset=True)
+        data["CommandQueueDepth"] = stats["max_depth"]
+        data["CommandQueueWait"] = round(stats["max_wait"], 3)
+        data["ReadoutRetries"] = self._retries
+        data["CrcErrors"] = self._queue.console.crc_errors
+        data["CrcErrorRate"] = self._queue.console.crc_error_rate
+        self._retries = 0
+        if self._workers is not None:
+            data["IOWorkerUtilization"] = self._workers.utilization(reset=True)
+
+    def add_breaker_info(self, data: dict[str, Any]) -> None:
+        """Add the circuit breaker state and the time of the next probe."""
+        data["BreakerState"] = self._breaker.state
+        next_probe = self._breaker.next_probe
+        data["NextProbeTime"] = (
+            convert_to_iso_datetime(
+                datetime.now() + timedelta(seconds=next_probe - time.monotonic()),
+                self.time_zone,
             )
+            if next_probe is not None
+            else None
+        )
 
-    def add_hilows_info(self, hilows: HighLowParserRevB | None, data: dict[str, Any]):
-        if not hilows:
-            return
-        data["TempOutHiDay"] = hilows["TempHiDay"]
-        data["TempOutHiTime"] = self.strtotime(hilows["TempHiTime"])  # type: ignore
-        data["TempOutLowDay"] = hilows["TempLoDay"]
-        data["TempOutLowTime"] = self.strtotime(hilows["TempLoTime"])  # type: ignore
-
-        data["DewPointHiDay"] = hilows["DewHiDay"]
-        data["DewPointHiTime"] = self.strtotime(hilows["DewHiTime"])  # type: ignore
-        data["DewPointLowDay"] = hilows["DewLoDay"]
-        data["DewPointLowTime"] = self.strtotime(hilows["DewLoTime"])  # type: ignore
-
-        data["RainRateDay"] = hilows["RainHiDay"]
-        data["RainRateTime"] = self.strtotime(hilows["RainHiTime"])  # type: ignore
-
-        data["BarometerHiDay"] = hilows["BaroHiDay"]
-        data["BarometerHiTime"] = self.strtotime(hilows["BaroHiTime"])  # type: ignore
-        data["BarometerLowDay"] = hilows["BaroLoDay"]
-        data["BarometerLoTime"] = self.strtotime(hilows["BaroLoTime"])  # type: ignore
-
-        data["SolarRadDay"] = hilows["SolarHiDay"]
-        data["SolarRadTime"] = self.strtotime(hilows["SolarHiTime"])  # type: ignore
-
-        data["UVDay"] = hilows["UVHiDay"]
-        data["UVTime"] = self.strtotime(hilows["UVHiTime"])  # type: ignore
-
-        data["WindGustDay"] = hilows["WindHiDay"]
-        data["WindGustTime"] = self.strtotime(hilows["WindHiTime"])  # type: ignore
+    def add_data_age(self, data: dict[str, Any]) -> None:
+        """Add the seconds since the LOOP, highs and lows and archive values were read.
+
+        The archive values are as old as the end of the newest record.
+        """
+        now = datetime.now()
+        ages = {
+            "LoopDataAge": self._last_loop_time,
+            "HilowsDataAge": self._last_hilows_time,
+            "ArchiveDataAge": self._scheduler.to_local(
+                self._last_archives[-1]["Datetime"]
+            )
+            if self._last_archives
+            else None,
+        }
+        for key, moment in ages.items():
+            data[key] = (
+                round(max((now - moment).total_seconds(), 0), 1) if moment else None
+            )
 
     def get_link(self) -> str:
         """Get device link for use with vproweather."""
@@ -492,26 +1114,31 @@ class DavisVantageClient:
             return f"tcp:{self._link}"
         return f"serial:{self._link}:19200:8N1"
 
-    def get_raw_data(self) -> DataParser:
+    def get_raw_data(self) -> dict[str, Any]:
         return self._last_raw_data
 
-    def get_raw_hilows(self) -> DataParser:
+    def get_raw_hilows(self) -> dict[str, Any]:
         return self._last_raw_hilows
 
-    def strtotime(self, time_str: str | None) -> time | None:
-        if time_str is None:
-            return None
-        else:
-            return datetime.strptime(time_str, "%H:%M").time()
-
-    def strtodate(self, date_str: str | None) -> date | None:
-        if date_str is None:
-            return None
-        else:
-            return datetime.strptime(date_str, "%Y-%m-%d").date()
-
-    def clear_cached_property(self, property_name: str):
-        del self._vantagepro2.__dict__[property_name]
+    def get_invalid_fields(self) -> list[str]:
+        """Return the fields of the last readout holding a "no data" value."""
+        raw_bytes = self._last_data.raw_bytes
+        # The readout may be limited to the consumed keys, check every field
+        invalid = LOOP_DECODER.decode(raw_bytes).invalid_keys() if raw_bytes else []
+        if self._last_hilows is not None:
+            invalid += self._last_hilows.invalid_keys()
+        return invalid
+
+    async def async_load_config(self, console: AsyncVantagePro2) -> None:
+        """Read the console setup into the EEPROM mirror."""
+        await self._config.load(console)
+        self.apply_config(console)
+
+    def apply_config(self, console: AsyncVantagePro2) -> None:
+        """Take over the settings of a freshly read console setup."""
+        console.archive_period = self._config.archive_period
+        self._rain_collector = self.get_rain_collector()
+        self._scheduler.mark_done(COMMAND_SETUP, datetime.now())
 
     def get_rain_collector(self) -> str:
         rain_collector_map = {
@@ -519,57 +1146,55 @@ class DavisVantageClient:
             0x10: RAIN_COLLECTOR_METRIC,
             0x20: RAIN_COLLECTOR_METRIC_0_1,
         }
-        self._vantagepro2.wake_up()
-        rain_collector = self._vantagepro2.get_rain_collector()  # type: ignore
-        return rain_collector_map.get(rain_collector, "")  # type: ignore
+        if not self._config.loaded:
+            return ""
+        return rain_collector_map.get(self._config.rain_collector, "")
 
-    async def async_get_rain_collector(self) -> str:
-        info = ""
-        try:
-            loop = asyncio.get_event_loop()
-            info = await loop.run_in_executor(None, self.get_rain_collector)
-        except Exception as e:
-            _LOGGER.error("Couldn't get rain collector: %s", e)
-        return info
-
-    def set_rain_collector(self, rain_collector: str):
+    async def async_set_rain_collector(self, rain_collector: str):
         rain_collector_map = {
             RAIN_COLLECTOR_IMPERIAL: 0x00,
             RAIN_COLLECTOR_METRIC: 0x10,
             RAIN_COLLECTOR_METRIC_0_1: 0x20,
         }
-        self._vantagepro2.set_rain_collector(
-            rain_collector_map.get(rain_collector, 0x00)
-        )
 
-    async def async_set_rain_collector(self, rain_collector: str):
+        async def set_rain_collector(console: AsyncVantagePro2) -> None:
+            if not self._config.loaded:
+                await self.async_load_config(console)
+            setup_bits = (self._config.setup_bits & 0xCF) | rain_collector_map.get(
+                rain_collector, 0x00
+            )
+            await self._config.write(
+                console, EEPROM_SETUP_BITS, struct.pack("B", setup_bits)
+            )
+            await console.newsetup()
+
         try:
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(None, self.set_rain_collector, rain_collector)
+            await self._async_command(PRIORITY_SERVICE, set_rain_collector)
+            self._rain_collector = self.get_rain_collector()
         except Exception as e:
             _LOGGER.error("Couldn't set rain collector: %s", e)
 
-    def get_latitude_longitude_elevation(self) -> tuple[float, float, int]:
-        latitude = longitude = None
-        data = self._vantagepro2.read_from_eeprom("0B", 6)  # type: ignore
-        latitude, longitude, elevation = struct.unpack(b"hhh", data)  # type: ignore
-        latitude /= 10
-        longitude /= 10
-        return latitude, longitude, elevation
-
     async def async_get_latitude_longitude_elevation(self):
         latitude = longitude = elevation = None
         try:
-            loop = asyncio.get_event_loop()
-            latitude, longitude, elevation = await loop.run_in_executor(
-                None, self.get_latitude_longitude_elevation
-            )
+            if not self._config.loaded:
+                await self._async_command(
+                    PRIORITY_POLL, self.async_load_config, DEADLINE_EEPROM
+                )
+            latitude = self._config.latitude
+            longitude = self._config.longitude
+            elevation = self._config.elevation
         except Exception as e:
             _LOGGER.error("Couldn't get latitude longitude: %s", e)
         return latitude, longitude, elevation
 
+    @property
+    def time_zone(self) -> ZoneInfo:
+        """Home Assistant time zone, only looked up again when it changes."""
+        name = self._hass.config.time_zone
+        if self._time_zone is None or self._time_zone.key != name:
+            self._time_zone = ZoneInfo(name)
+        return self._time_zone
+
     def get_iso_now(self) -> datetime:
-        now = convert_to_iso_datetime(
-            datetime.now(), ZoneInfo(self._hass.config.time_zone)
-        )
-        return now
+        return convert_to_iso_datetime(datetime.now(), self.time_zone)
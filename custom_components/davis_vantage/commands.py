@@ -0,0 +1,210 @@
+"""Prioritized command queue owning the link to the console."""
+
+import asyncio
+from collections import Counter
+import itertools
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+from pyvantagepro.device import (
+    BadCRCException,
+    BadDataException,
+    NoDeviceException,
+)
+from homeassistant.core import HomeAssistant
+
+from .console import AsyncVantagePro2
+from .const import DEADLINE_COMMAND, DEADLINE_RESYNC
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+PRIORITY_SERVICE = 0
+PRIORITY_POLL = 1
+PRIORITY_BACKGROUND = 2
+PRIORITY_STREAM = 3
+
+_RESYNC_EXCEPTIONS = (
+    BadCRCException,
+    BadDataException,
+    NoDeviceException,
+    TimeoutError,
+)
+
+type Command = Callable[[AsyncVantagePro2], Awaitable[Any]]
+
+
+@dataclass(order=True)
+class _QueuedCommand:
+    priority: int
+    sequence: int
+    command: Command = field(compare=False)
+    future: asyncio.Future[Any] = field(compare=False)
+    enqueued: float = field(compare=False)
+    deadline: float = field(compare=False)
+
+
+class CommandQueue:
+    """Runs console commands one at a time, lowest priority value first.
+
+    The queue is the only owner of the link: a worker task is started when
+    a command is submitted and ends when the queue has run dry. Commands
+    never interleave on the wire, a pending service call goes before queued
+    background reads.
+
+    Every command has a deadline. A command that runs late, or that the
+    caller gave up on, is cancelled and the link is resynced before the
+    next command gets it.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, console: AsyncVantagePro2, persistent: bool
+    ) -> None:
+        self._hass = hass
+        self._console = console
+        self._persistent = persistent
+        self._queue: asyncio.PriorityQueue[_QueuedCommand] = asyncio.PriorityQueue()
+        # Number of queued commands per priority
+        self._pending: Counter[int] = Counter()
+        self._sequence = itertools.count()
+        self._worker: asyncio.Task[None] | None = None
+        self._max_depth = 0
+        self._max_wait = 0.0
+        self._last_wait = 0.0
+        self._timeouts = 0
+
+    @property
+    def console(self) -> AsyncVantagePro2:
+        return self._console
+
+    @property
+    def depth(self) -> int:
+        """Number of commands waiting for the link."""
+        return self._queue.qsize()
+
+    def has_pending(self, priority: int) -> bool:
+        """Return True if a command with a higher priority is waiting."""
+        return any(
+            count and queued < priority for queued, count in self._pending.items()
+        )
+
+    async def submit(
+        self, priority: int, command: Command, deadline: float = DEADLINE_COMMAND
+    ) -> Any:
+        """Queue a command and return its result once it has run.
+
+        TimeoutError is raised when the command didn't finish in time.
+        """
+        future: asyncio.Future[Any] = self._hass.loop.create_future()
+        self._pending[priority] += 1
+        self._queue.put_nowait(
+            _QueuedCommand(
+                priority,
+                next(self._sequence),
+                command,
+                future,
+                time.monotonic(),
+                deadline,
+            )
+        )
+        self._max_depth = max(self._max_depth, self._queue.qsize())
+        if self._worker is None or self._worker.done():
+            self._worker = self._hass.async_create_background_task(
+                self._async_run(), f"{__package__} command queue"
+            )
+        return await future
+
+    async def _async_run(self) -> None:
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            self._pending[item.priority] -= 1
+            if item.future.cancelled():
+                continue
+            self._last_wait = time.monotonic() - item.enqueued
+            self._max_wait = max(self._max_wait, self._last_wait)
+            try:
+                await self._async_run_command(item)
+            finally:
+                if not self._persistent and self._queue.empty():
+                    await self._console.link.close()
+
+    async def _async_run_command(self, item: _QueuedCommand) -> None:
+        try:
+            await self._console.link.open()
+        except Exception as e:  # pylint: disable=broad-except
+            item.future.set_exception(e)
+            return
+        task = self._hass.loop.create_task(item.command(self._console))
+        # The caller giving up cancels the command as well
+        item.future.add_done_callback(
+            lambda future: task.cancel() if future.cancelled() else None
+        )
+        try:
+            done, _ = await asyncio.wait([task], timeout=item.deadline)
+        except asyncio.CancelledError:
+            task.cancel()
+            item.future.cancel()
+            raise
+        if not done:
+            task.cancel()
+            await asyncio.wait([task])
+            self._timeouts += 1
+            _LOGGER.warning(
+                "Command %s didn't finish within %s s",
+                getattr(item.command, "__name__", item.command),
+                item.deadline,
+            )
+            if not item.future.done():
+                item.future.set_exception(
+                    TimeoutError(f"No reply within {item.deadline} s")
+                )
+            await self._async_resync()
+        elif task.cancelled():
+            await self._async_resync()
+        elif (exception := task.exception()) is not None:
+            if isinstance(exception, _RESYNC_EXCEPTIONS):
+                await self._async_resync()
+            if not item.future.done():
+                item.future.set_exception(exception)
+        elif not item.future.done():
+            item.future.set_result(task.result())
+
+    async def _async_resync(self) -> None:
+        """Drain the link, reconnect when the console doesn't calm down."""
+        try:
+            async with asyncio.timeout(DEADLINE_RESYNC + 1):
+                await self._console.resync(tries=int(DEADLINE_RESYNC / 0.3))
+        except Exception as e:  # pylint: disable=broad-except
+            _LOGGER.debug("Resync failed (%s), closing the link", e)
+            await self._console.link.close()
+
+    def stats(self, reset: bool = False) -> dict[str, Any]:
+        """Return the queue depth and wait time metrics."""
+        stats = {
+            "depth": self.depth,
+            "max_depth": self._max_depth,
+            "last_wait": self._last_wait,
+            "max_wait": self._max_wait,
+            "timeouts": self._timeouts,
+        }
+        if reset:
+            self._max_depth = self.depth
+            self._max_wait = 0.0
+        return stats
+
+    async def async_close(self) -> None:
+        """Stop the worker, fail the pending commands and close the link."""
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            self._pending[item.priority] -= 1
+            if not item.future.done():
+                item.future.cancel()
+        await self._console.link.close()
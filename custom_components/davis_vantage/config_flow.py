@@ -27,6 +27,22 @@ from .const import (
     CONFIG_PROTOCOL,
     CONFIG_LINK,
     CONFIG_PERSISTENT_CONNECTION,
+    CONFIG_LOOP_STREAMING,
+    CONFIG_LOOP2,
+    CONFIG_HILOWS_INTERVAL,
+    CONFIG_ARCHIVE_INTERVAL,
+    CONFIG_SETUP_INTERVAL,
+    DEFAULT_HILOWS_INTERVAL,
+    DEFAULT_ARCHIVE_INTERVAL,
+    DEFAULT_SETUP_INTERVAL,
+    CONFIG_PUBLISH_DEADBAND,
+    CONFIG_PUBLISH_HEARTBEAT,
+    DEFAULT_PUBLISH_HEARTBEAT,
+    CONFIG_ADAPTIVE_INTERVAL,
+    CONFIG_MIN_INTERVAL,
+    CONFIG_MAX_INTERVAL,
+    DEFAULT_MIN_INTERVAL,
+    DEFAULT_MAX_INTERVAL,
 )
 from .client import DavisVantageClient
 
@@ -36,6 +52,28 @@ RECONFIGURE_SCHEMA = vol.Schema(
         vol.Required(CONFIG_INTERVAL, default=DEFAULT_SYNC_INTERVAL): vol.All(
             int, vol.Range(min=CONFIG_MINIMAL_INTERVAL)  # type: ignore
         ),
+        vol.Required(CONFIG_ADAPTIVE_INTERVAL, default=False): bool,
+        vol.Required(CONFIG_MIN_INTERVAL, default=DEFAULT_MIN_INTERVAL): vol.All(
+            int, vol.Range(min=CONFIG_MINIMAL_INTERVAL)  # type: ignore
+        ),
+        vol.Required(CONFIG_MAX_INTERVAL, default=DEFAULT_MAX_INTERVAL): vol.All(
+            int, vol.Range(min=CONFIG_MINIMAL_INTERVAL)  # type: ignore
+        ),
+        vol.Required(CONFIG_LOOP_STREAMING, default=False): bool,
+        vol.Required(CONFIG_LOOP2, default=False): bool,
+        vol.Required(CONFIG_HILOWS_INTERVAL, default=DEFAULT_HILOWS_INTERVAL): vol.All(
+            int, vol.Range(min=0)  # type: ignore
+        ),
+        vol.Required(CONFIG_ARCHIVE_INTERVAL, default=DEFAULT_ARCHIVE_INTERVAL): vol.All(
+            int, vol.Range(min=0)  # type: ignore
+        ),
+        vol.Required(CONFIG_SETUP_INTERVAL, default=DEFAULT_SETUP_INTERVAL): vol.All(
+            int, vol.Range(min=0)  # type: ignore
+        ),
+        vol.Required(CONFIG_PUBLISH_DEADBAND, default=False): bool,
+        vol.Required(CONFIG_PUBLISH_HEARTBEAT, default=DEFAULT_PUBLISH_HEARTBEAT): vol.All(
+            int, vol.Range(min=0)  # type: ignore
+        ),
     }
 )
 
@@ -132,8 +170,7 @@ class DavisVantageConfigFlow(ConfigFlow, domain=DOMAIN):
     ) -> ConfigFlowResult:
         errors: dict[str, str] | None = {}
         if user_input is not None:
-            await self.async_set_unique_id(DOMAIN)
-            self._abort_if_unique_id_configured()
+            self._async_abort_entries_match({CONFIG_LINK: self.link})
             user_input[CONFIG_PROTOCOL] = self.protocol
             user_input[CONFIG_LINK] = self.link
             try:
@@ -146,7 +183,9 @@ class DavisVantageConfigFlow(ConfigFlow, domain=DOMAIN):
                 _LOGGER.exception("Unexpected exception")
                 errors["base"] = "unknown"
             else:
-                return self.async_create_entry(title=info["title"], data=user_input)
+                return self.async_create_entry(
+                    title=self.get_station_title(info["title"]), data=user_input
+                )
 
         step_user_data_schema = vol.Schema(
             {
@@ -157,6 +196,7 @@ class DavisVantageConfigFlow(ConfigFlow, domain=DOMAIN):
                     int, vol.Range(min=CONFIG_MINIMAL_INTERVAL)  # type: ignore
                 ),
                 vol.Required(CONFIG_PERSISTENT_CONNECTION, default=False): bool,
+                vol.Required(CONFIG_LOOP_STREAMING, default=False): bool,
             }
         )
 
@@ -164,6 +204,16 @@ class DavisVantageConfigFlow(ConfigFlow, domain=DOMAIN):
             step_id="setup_other_info", data_schema=step_user_data_schema, errors=errors
         )
 
+    def get_station_title(self, title: str) -> str:
+        """Number the title of every weather station after the first one."""
+        titles = {entry.title for entry in self._async_current_entries()}
+        number = 1
+        station_title = title
+        while station_title in titles:
+            number += 1
+            station_title = f"{title} {number}"
+        return station_title
+
     async def async_step_reconfigure(
         self, _: dict[str, Any] | None = None
     ) -> ConfigFlowResult:
@@ -178,7 +228,11 @@ class DavisVantageConfigFlow(ConfigFlow, domain=DOMAIN):
         """Handle a reconfiguration flow initialized by the user."""
         errors: dict[str, str] | None = {}
 
-        if user_input is not None:
+        if user_input is not None and (
+            user_input[CONFIG_MIN_INTERVAL] > user_input[CONFIG_MAX_INTERVAL]
+        ):
+            errors["base"] = "invalid_interval_bounds"
+        elif user_input is not None:
             self.hass.config_entries.async_update_entry(
                 self.entry, data=self.entry.data | user_input # type: ignore
             )
@@ -0,0 +1,366 @@
+"""Asyncio implementation of the Davis Vantage serial protocol."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import aclosing
+from datetime import datetime, timedelta, date
+import logging
+
+from pyvantagepro.device import (
+    BadAckException,
+    BadCRCException,
+    BadDataException,
+    NoDeviceException,
+)
+from pyvantagepro.parser import (
+    ArchiveDataParserRevB,
+    DmpHeaderParser,
+    DmpPageParser,
+    VantageProCRC,
+    pack_datetime,
+    pack_dmp_date_time,
+    unpack_datetime,
+)
+from pyvantagepro.utils import ListDict
+
+from .const import CRC_RATE_PACKETS, LOOP_PACKET_SIZE, DEADLINE_WAKE_UP
+from .transport import AsyncLink
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+HILOWS_PACKET_SIZE = 438
+DMP_HEADER_SIZE = 6
+DMP_PAGE_SIZE = 267
+DMP_RECORD_SIZE = 52
+DMP_RECORDS_PER_PAGE = 5
+
+# A command and the size of its packet reply, None for an OK and a text line
+type Request = tuple[str, int | None]
+
+LOOP_REQUEST: Request = ("LOOP 1", LOOP_PACKET_SIZE)
+LOOP2_REQUEST: Request = ("LPS 2 1", LOOP_PACKET_SIZE)
+HILOWS_REQUEST: Request = ("HILOWS", HILOWS_PACKET_SIZE)
+VERSION_REQUEST: Request = ("NVER", None)
+
+
+def eeprom_request(address: int, size: int) -> Request:
+    """Request reading size bytes from the EEPROM, the reply ends with a CRC."""
+    return f"EEBRD {address:02X} {size:02X}", size + 2
+
+
+class AsyncVantagePro2:
+    """Communicates with the console over an asyncio link."""
+
+    WAKE_STR = b"\n"
+    WAKE_ACK = b"\n\r"
+    ACK = b"\x06"
+    NACK = b"\x21"
+    CANCEL = b"\x18"
+    ESC = b"\x1b"
+    OK = b"\n\rOK\n\r"
+
+    def __init__(self, link: AsyncLink, timeout: float = 10) -> None:
+        self.link = link
+        self.timeout = timeout
+        self.archive_period: int = 0
+        self.crc_errors = 0
+        self._crc_results: deque[bool] = deque(maxlen=CRC_RATE_PACKETS)
+
+    @property
+    def crc_error_rate(self) -> float:
+        """Percentage of bad CRCs in the last packets received."""
+        if not self._crc_results:
+            return 0.0
+        return round(100 * sum(self._crc_results) / len(self._crc_results), 1)
+
+    async def wake_up(self, tries: int = 3) -> None:
+        """Wake up the console."""
+        async with asyncio.timeout(DEADLINE_WAKE_UP):
+            for attempt in range(tries):
+                await self.link.write(self.WAKE_STR)
+                ack = await self.link.read(len(self.WAKE_ACK), 1.2)
+                if ack == self.WAKE_ACK:
+                    return
+                # The console sometimes is one byte off, realign on the next try
+                await self.link.flush()
+                _LOGGER.debug("Wake up attempt %d failed (%r)", attempt + 1, ack)
+        raise NoDeviceException()
+
+    async def resync(self, quiet: float = 0.3, tries: int = 10) -> None:
+        """Bring the link back to a known state after an aborted command.
+
+        An archive download is cancelled and a LOOP is stopped, then the
+        link is drained until the console stays quiet, so a late reply
+        does not end up in the next command.
+        """
+        await self.link.write(self.ESC)
+        await self.link.write(self.WAKE_STR)
+        for _ in range(tries):
+            if not await self.link.flush(quiet):
+                return
+        raise BadDataException()
+
+    async def send(
+        self, data: str | bytes, wait_ack: bytes | None = None, tries: int = 3
+    ) -> None:
+        """Send a command (a line feed is added) or binary data."""
+        if isinstance(data, str):
+            data = f"{data}\n".encode()
+        for attempt in range(tries):
+            await self.link.write(data)
+            if wait_ack is None:
+                return
+            ack = await self.link.read(len(wait_ack), self.timeout)
+            if ack == wait_ack:
+                return
+            _LOGGER.debug("Check ACK: BAD (%r != %r)", wait_ack, ack)
+            if attempt < tries - 1:
+                await asyncio.sleep(0.5)
+        raise BadAckException()
+
+    async def read_packet(self, size: int) -> bytes:
+        """Read a packet ending with a CRC."""
+        data = await self.link.read(size, self.timeout)
+        if len(data) != size:
+            raise BadDataException()
+        self.check_crc(VantageProCRC(data).check())
+        return data
+
+    def check_crc(self, valid: bool) -> None:
+        """Count a received packet, raise BadCRCException when it is bad."""
+        self._crc_results.append(not valid)
+        if not valid:
+            self.crc_errors += 1
+            raise BadCRCException()
+
+    async def read_line(self) -> bytes:
+        """Read a text response ending with a line feed and carriage return."""
+        data = b""
+        while not data.endswith(self.WAKE_ACK):
+            chunk = await self.link.read(1, self.timeout)
+            if not chunk:
+                raise BadDataException()
+            data += chunk
+        return data[: -len(self.WAKE_ACK)]
+
+    async def pipeline(self, requests: list[Request]) -> list[bytes | Exception]:
+        """Send the commands back-to-back after one wake-up, return the replies.
+
+        The replies are split by their expected size and checked one by one,
+        a reply with a bad CRC fails on its own. A missing ACK or a short
+        reply leaves the rest of the stream misaligned, that reply and the
+        ones after it fail and the link is resynced.
+        """
+        await self.wake_up()
+        await self.link.write(
+            b"".join(f"{command}\n".encode() for command, _ in requests)
+        )
+        replies: list[bytes | Exception] = []
+        error: Exception | None = None
+        for _, size in requests:
+            if error is None:
+                try:
+                    replies.append(await self._read_reply(size))
+                    continue
+                except BadCRCException as e:
+                    replies.append(e)
+                    continue
+                except (BadAckException, BadDataException) as e:
+                    error = e
+            replies.append(error)
+        if error is not None:
+            await self.resync()
+        return replies
+
+    async def _read_reply(self, size: int | None) -> bytes:
+        if size is None:
+            if await self.link.read(len(self.OK), self.timeout) != self.OK:
+                raise BadAckException()
+            return await self.read_line()
+        if await self.link.read(len(self.ACK), self.timeout) != self.ACK:
+            raise BadAckException()
+        return await self.read_packet(size)
+
+    async def read_from_eeprom(self, address: int, size: int) -> bytes:
+        """Read size bytes from the EEPROM starting at address."""
+        await self.wake_up()
+        await self.send(f"EEBRD {address:02X} {size:02X}", self.ACK)
+        return (await self.read_packet(size + 2))[:-2]
+
+    async def write_to_eeprom(self, address: int, data: bytes) -> None:
+        """Write data to the EEPROM starting at address."""
+        await self.wake_up()
+        await self.send(f"EEBWR {address:02X} {len(data):02X}", self.ACK)
+        await self.send(VantageProCRC(data).data_with_checksum, self.ACK)
+
+    async def gettime(self) -> datetime:
+        """Return the current date and time of the console."""
+        await self.wake_up()
+        await self.send("GETTIME", self.ACK)
+        return unpack_datetime(await self.read_packet(8))
+
+    async def settime(self, dtime: datetime) -> None:
+        """Set the date and time of the console."""
+        await self.wake_up()
+        await self.send("SETTIME", self.ACK)
+        await self.send(pack_datetime(dtime), self.ACK)
+
+    async def get_firmware_version(self) -> str:
+        await self.wake_up()
+        await self.send("NVER", self.OK)
+        return (await self.read_line()).decode()
+
+    async def get_firmware_date(self) -> date:
+        await self.wake_up()
+        await self.send("VER", self.OK)
+        data = (await self.read_line()).decode()
+        return datetime.strptime(data, "%b %d %Y").date()
+
+    async def get_diagnostics(self) -> dict[str, int]:
+        """Return the console diagnostics report (RXCHECK)."""
+        await self.wake_up()
+        await self.send("RXCHECK", self.OK)
+        values = [int(i) for i in (await self.read_line()).decode().split()]
+        return dict(
+            total_received=values[0],
+            total_missed=values[1],
+            resyn=values[2],
+            max_received=values[3],
+            crc_errors=values[4],
+        )
+
+    async def get_loop_packet(self) -> bytes:
+        """Return one LOOP packet."""
+        await self.wake_up()
+        await self.send("LOOP 1", self.ACK)
+        return await self.read_packet(LOOP_PACKET_SIZE)
+
+    async def get_loop2_packet(self) -> bytes:
+        """Return one LOOP2 packet."""
+        await self.wake_up()
+        await self.send("LPS 2 1", self.ACK)
+        return await self.read_packet(LOOP_PACKET_SIZE)
+
+    async def stream_loop_packets(
+        self, packets: int, loop2: bool = False
+    ) -> AsyncIterator[bytes]:
+        """Yield the LOOP packets sent every 2.5 s after one LOOP command.
+
+        With loop2 LOOP and LOOP2 packets alternate. When the iteration is
+        stopped early the LOOP command is cancelled.
+        """
+        await self.wake_up()
+        await self.send(f"LPS 3 {packets}" if loop2 else f"LOOP {packets}", self.ACK)
+        received = 0
+        try:
+            for received in range(1, packets + 1):
+                yield await self.read_packet(LOOP_PACKET_SIZE)
+        finally:
+            if received < packets:
+                await self.cancel_loop()
+
+    async def cancel_loop(self) -> None:
+        """Stop the console sending LOOP packets and drain the link."""
+        await self.link.write(self.WAKE_STR)
+        await self.link.flush()
+
+    async def get_hilows_packet(self) -> bytes:
+        """Return the HILOWS packet with the highs and lows."""
+        await self.wake_up()
+        await self.send("HILOWS", self.ACK)
+        return await self.read_packet(HILOWS_PACKET_SIZE)
+
+    async def get_archives(
+        self, start_date: datetime, stop_date: datetime | None = None
+    ) -> ListDict:
+        """Return the archive records after start_date, up to stop_date if given."""
+        archives = ListDict()
+        dates = set()
+        async with aclosing(self.dump_pages(start_date)) as dump:
+            async for _, _, records in dump:
+                for record in records:
+                    r_time = record["Datetime"]
+                    if r_time <= start_date or (stop_date and r_time > stop_date):
+                        continue
+                    if r_time not in dates:
+                        archives.append(record)
+                        dates.add(r_time)
+        return archives.sorted_by("Datetime")
+
+    async def dump_pages(
+        self, start_date: datetime | None, max_pages: int | None = None
+    ) -> AsyncIterator[tuple[int, int, list[ArchiveDataParserRevB]]]:
+        """Yield (page number, total pages, records) of the archive pages.
+
+        Without start_date the whole archive memory is dumped. The dump is
+        cancelled after max_pages pages, or when the iteration is stopped.
+        """
+        await self.wake_up()
+        await self.send("DMPAFT", self.ACK)
+        if start_date is None:
+            date_time = VantageProCRC(b"\x00" * 4).data_with_checksum
+        else:
+            if self.archive_period:
+                start_date -= timedelta(
+                    minutes=start_date.minute % self.archive_period
+                )
+            date_time = pack_dmp_date_time(start_date)
+        await self.send(date_time, self.ACK, tries=1)
+        header = DmpHeaderParser(await self.link.read(DMP_HEADER_SIZE, self.timeout))
+        if header.crc_error:
+            await self.link.write(self.CANCEL)
+        self.check_crc(not header.crc_error)
+        pages = header["Pages"]
+        offset = header["Offset"]
+        await self.link.write(self.ACK)
+        if not pages:
+            return
+        finished = False
+        try:
+            for page in range(pages):
+                dump = DmpPageParser(await self.read_packet(DMP_PAGE_SIZE))
+                raw_records = dump["Records"]
+                records: list[ArchiveDataParserRevB] = []
+                end_reached = False
+                for index in range(offset if page == 0 else 0, DMP_RECORDS_PER_PAGE):
+                    raw_record = raw_records[
+                        index * DMP_RECORD_SIZE : (index + 1) * DMP_RECORD_SIZE
+                    ]
+                    record = ArchiveDataParserRevB(raw_record)
+                    if record["Datetime"] is None:
+                        # Reached the end of the written archive memory
+                        end_reached = True
+                        break
+                    records.append(record)
+                last_page = page + 1 == pages
+                if end_reached or (max_pages and page + 1 >= max_pages):
+                    await self.link.write(self.ESC)
+                    last_page = True
+                else:
+                    await self.link.write(self.ACK)
+                finished = last_page
+                yield page + 1, pages, records
+                if last_page:
+                    return
+        finally:
+            if not finished:
+                # The console is already sending the next page
+                await self.link.write(self.ESC)
+                await self.link.flush()
+
+    async def set_yearly_rain(self, rain_clicks: int) -> None:
+        await self.wake_up()
+        await self.send(f"PUTRAIN {rain_clicks}", self.ACK)
+
+    async def set_archive_period(self, archive_period: int) -> None:
+        """Set the archive period. WARNING: all archive data will be erased!"""
+        await self.wake_up()
+        await self.send(f"SETPER {archive_period}", self.OK)
+
+    async def newsetup(self) -> None:
+        """Re-initialize the console after a configuration change."""
+        await self.wake_up()
+        await self.send("NEWSETUP", self.ACK)
@@ -10,6 +10,11 @@ DEFAULT_NAME = NAME
 RAIN_COLLECTOR_IMPERIAL = '0.01"'
 RAIN_COLLECTOR_METRIC = '0.2 mm'
 RAIN_COLLECTOR_METRIC_0_1 = '0.1 mm'
+RAIN_COLLECTOR_FACTOR = {  # rain values are reported as 0.01" clicks
+    RAIN_COLLECTOR_IMPERIAL: 1.0,
+    RAIN_COLLECTOR_METRIC: 2 / 2.54,
+    RAIN_COLLECTOR_METRIC_0_1: 1 / 2.54,
+}
 
 PROTOCOL_NETWORK = 'Network'
 PROTOCOL_SERIAL = 'Serial'
@@ -21,6 +26,8 @@ SERVICE_GET_INFO = 'get_info'
 SERVICE_SET_YEARLY_RAIN = 'set_yearly_rain'
 SERVICE_SET_ARCHIVE_PERIOD = 'set_archive_period'
 SERVICE_SET_RAIN_COLLECTOR = 'set_rain_collector'
+SERVICE_GET_ARCHIVE = 'get_archive'
+SERVICE_DOWNLOAD_ARCHIVE = 'download_archive'
 
 MODEL_VANTAGE_PRO2 = 'Vantage Pro2'
 MODEL_VANTAGE_PRO2PLUS = 'Vantage Pro2 Plus'
@@ -32,3 +39,81 @@ CONFIG_MINIMAL_INTERVAL = 5
 CONFIG_PROTOCOL = "protocol"
 CONFIG_LINK = "link"
 CONFIG_PERSISTENT_CONNECTION = "persistent_connection"
+CONFIG_LOOP_STREAMING = "loop_streaming"
+CONFIG_LOOP2 = "loop2"
+
+LOOP_PACKET_SIZE = 99  # bytes
+LOOP_PACKET_INTERVAL = 2.5  # seconds between two LOOP packets of the console
+
+# Deadlines in seconds for a complete command, including the wake-up
+DEADLINE_WAKE_UP = 5
+DEADLINE_LOOP = 5
+DEADLINE_HILOWS = 8
+DEADLINE_ARCHIVES = 30
+DEADLINE_ARCHIVE_PAGE = 0.5  # extra time per expected archive page
+DEADLINE_EEPROM = 5
+DEADLINE_COMMAND = 10
+DEADLINE_RESYNC = 3
+DEADLINE_PIPELINE = DEADLINE_LOOP + DEADLINE_HILOWS + DEADLINE_EEPROM
+
+IO_WORKERS = 4  # threads for the blocking I/O of all weather stations together
+
+READOUT_RETRIES = 3  # resends after a bad packet, shared by all reads of a readout
+CRC_RATE_PACKETS = 100  # packets the CRC error rate is taken over
+
+COMMAND_HILOWS = "hilows"
+COMMAND_ARCHIVES = "archives"
+COMMAND_SETUP = "setup"
+
+CONFIG_HILOWS_INTERVAL = "hilows_interval"
+CONFIG_ARCHIVE_INTERVAL = "archive_interval"
+CONFIG_SETUP_INTERVAL = "setup_interval"
+DEFAULT_HILOWS_INTERVAL = 300  # seconds, 0 = every readout
+DEFAULT_ARCHIVE_INTERVAL = 0  # seconds, 0 = after every archive period boundary
+DEFAULT_SETUP_INTERVAL = 0  # seconds, 0 = only at startup or after a change
+ARCHIVE_READ_DELAY = 10  # seconds to give the console to write a new record
+CLOCK_OFFSET_REFRESH = 86400  # seconds between two readouts of the console clock
+
+BREAKER_FAILURES = 3  # failed readouts in a row before backing off
+BREAKER_BACKOFF_MIN = 30  # seconds until the first probe
+BREAKER_BACKOFF_MAX = 900  # seconds between two probes at most
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+
+ARCHIVE_RECORDS_PER_PAGE = 5
+ARCHIVE_MEMORY_PAGES = 512  # 2560 records
+ARCHIVE_DOWNLOAD_BATCH_PAGES = 10  # pages per link claim during a download
+ARCHIVE_DOWNLOAD_STATE = "archive_download"
+STATISTICS_IMPORT_STATE = "statistics_import"
+STATISTICS_IMPORT_BATCH = 2000  # archive records per store query
+
+EEPROM_CONFIG_ADDRESS = 0x00
+EEPROM_CONFIG_SIZE = 0x2E  # up to and including the archive period
+EEPROM_LATITUDE = 0x0B  # followed by longitude and elevation
+EEPROM_SETUP_BITS = 0x2B
+EEPROM_ARCHIVE_PERIOD = 0x2D
+
+CONFIG_PUBLISH_DEADBAND = "publish_deadband"
+CONFIG_PUBLISH_HEARTBEAT = "publish_heartbeat"
+DEFAULT_PUBLISH_HEARTBEAT = 600  # seconds, 0 = only when the value changed
+# Smallest change in the native unit that is published, per device class
+PUBLISH_DEADBANDS = {
+    "temperature": 0.5,  # °F
+    "pressure": 0.01,  # inHg
+    "humidity": 2,  # %
+    "wind_speed": 2,  # mph
+    "wind_direction": 10,  # °
+    "voltage": 0.05,  # V
+}
+
+CONFIG_ADAPTIVE_INTERVAL = "adaptive_interval"
+CONFIG_MIN_INTERVAL = "min_interval"
+CONFIG_MAX_INTERVAL = "max_interval"
+DEFAULT_MIN_INTERVAL = 10  # seconds
+DEFAULT_MAX_INTERVAL = 120  # seconds
+ADAPTIVE_INTERVAL_GROWTH = 1.5  # factor the interval grows by per steady readout
+ADAPTIVE_WIND_RISE = 3  # mph the wind speed rises by between readouts to be active
+
+TRANSMITTER_SCAN_INTERVAL = 3600  # seconds between two scans for extra sensors
+TRANSMITTER_SCAN_PACKETS = 3  # LOOP packets a sensor must be valid in
@@ -1,21 +1,122 @@
+from collections import Counter
+from collections.abc import Callable, Iterable, Mapping
 from datetime import timedelta
+from time import monotonic
 from typing import Any
 import logging
+import random
 
 from homeassistant import config_entries
 from homeassistant.helpers.update_coordinator import UpdateFailed, DataUpdateCoordinator
 from homeassistant.helpers.device_registry import DeviceInfo
-from homeassistant.core import HomeAssistant
-from pyvantagepro.parser import LoopDataParserRevB
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 
 from .client import DavisVantageClient
+from .decoder import Packet
 from .const import (
-    DOMAIN,
+    CONFIG_INTERVAL,
+    DEFAULT_SYNC_INTERVAL,
+    CONFIG_PUBLISH_DEADBAND,
+    CONFIG_PUBLISH_HEARTBEAT,
+    DEFAULT_PUBLISH_HEARTBEAT,
+    PUBLISH_DEADBANDS,
+    CONFIG_ADAPTIVE_INTERVAL,
+    CONFIG_MIN_INTERVAL,
+    CONFIG_MAX_INTERVAL,
+    DEFAULT_MIN_INTERVAL,
+    DEFAULT_MAX_INTERVAL,
+    ADAPTIVE_INTERVAL_GROWTH,
+    ADAPTIVE_WIND_RISE,
 )
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 
 
+class StatePublisher:
+    """Select the keys of a readout to publish to their entities.
+
+    A key is published when its value differs from the value it was last
+    published with, for numbers by at least the deadband of the key, or
+    when that was heartbeat seconds ago (0 is never).
+    """
+
+    def __init__(self, heartbeat: float = 0) -> None:
+        self.heartbeat = heartbeat
+        self.deadbands: dict[str, float] = {}
+        self._published: dict[str, tuple[Any, float]] = {}
+
+    def reset(self) -> None:
+        """Publish all keys the next time."""
+        self._published.clear()
+
+    def select(
+        self, data: Mapping[str, Any], keys: Iterable[str], now: float
+    ) -> set[str]:
+        selected: set[str] = set()
+        for key in keys:
+            value = data.get(key)
+            published = self._published.get(key)
+            if published is not None and not (
+                self.heartbeat and now - published[1] >= self.heartbeat
+            ):
+                last_value = published[0]
+                if value == last_value:
+                    continue
+                deadband = self.deadbands.get(key)
+                if (
+                    deadband
+                    and isinstance(value, (int, float))
+                    and isinstance(last_value, (int, float))
+                    and abs(value - last_value) < deadband
+                ):
+                    continue
+            self._published[key] = (value, now)
+            selected.add(key)
+        return selected
+
+
+class AdaptiveInterval:
+    """Poll interval that follows the weather activity.
+
+    While it rains, the wind speed rises or the barometer changes rapidly
+    the interval drops to the minimum, so the onset of a shower or a gust
+    is caught. Every steady readout grows it towards the maximum again.
+    """
+
+    KEYS = ("RainRate", "WindSpeed", "BarTrend")
+
+    def __init__(self, interval: float, minimum: float, maximum: float) -> None:
+        self.minimum = minimum
+        self.maximum = maximum
+        self.interval = min(max(interval, minimum), maximum)
+        self._wind_speed: float | None = None
+
+    def is_active(self, data: Mapping[str, Any]) -> bool:
+        wind_speed = data.get("WindSpeed")
+        wind_rising = (
+            wind_speed is not None
+            and self._wind_speed is not None
+            and wind_speed - self._wind_speed >= ADAPTIVE_WIND_RISE
+        )
+        self._wind_speed = wind_speed
+        return (
+            (data.get("RainRate") or 0) > 0
+            or wind_rising
+            or data.get("BarTrend") in ("falling_rapidly", "rising_rapidly")
+        )
+
+    def update(self, data: Mapping[str, Any]) -> float:
+        """Return the interval until the readout after the one of data."""
+        if data.get("LastError"):
+            # Nothing is known about the weather, keep the interval
+            return self.interval
+        if self.is_active(data):
+            self.interval = self.minimum
+        else:
+            self.interval = min(self.interval * ADAPTIVE_INTERVAL_GROWTH, self.maximum)
+        return self.interval
+
+
 class DavisVantageDataUpdateCoordinator(DataUpdateCoordinator):
     """Class to manage fetching data from the weather station."""
 
@@ -27,23 +128,112 @@ class DavisVantageDataUpdateCoordinator(DataUpdateCoordinator):
         self.platforms: list[str] = []
         self.last_updated = None
         self.device_info = device_info
-        interval = hass.data[DOMAIN].get("interval", 30)
+        interval = config_entry.data.get(CONFIG_INTERVAL, DEFAULT_SYNC_INTERVAL)
+        self.interval: int = interval
+        self.publisher = StatePublisher(
+            config_entry.data.get(CONFIG_PUBLISH_HEARTBEAT, DEFAULT_PUBLISH_HEARTBEAT)
+        )
+        self._use_deadbands: bool = config_entry.data.get(CONFIG_PUBLISH_DEADBAND, False)
+        self._available: bool | None = None
+        self._listener_keys: Counter[str] = Counter()
+        self.adaptive: AdaptiveInterval | None = None
+        if config_entry.data.get(CONFIG_ADAPTIVE_INTERVAL, False) and not client.streaming:
+            self.adaptive = AdaptiveInterval(
+                interval,
+                config_entry.data.get(CONFIG_MIN_INTERVAL, DEFAULT_MIN_INTERVAL),
+                config_entry.data.get(CONFIG_MAX_INTERVAL, DEFAULT_MAX_INTERVAL),
+            )
+            # The activity is judged on these keys, also without their entities
+            config_entry.async_on_unload(client.add_consumer(AdaptiveInterval.KEYS))
+        # Stations set up together would otherwise all poll on the same tick,
+        # a random delay of the second poll spreads them over the interval
+        self._poll_offset = random.uniform(0, interval)
 
+        # When streaming, the LOOP stream pushes the data instead of polling
         super().__init__(
             hass,
             _LOGGER,
-            name=DOMAIN,
-            update_interval=timedelta(seconds=interval),
+            name=config_entry.title,
+            update_interval=None
+            if client.streaming
+            else timedelta(seconds=interval + self._poll_offset),
             config_entry=config_entry,
         )
 
+    def set_deadband(self, key: str, device_class: str | None) -> None:
+        """Use the deadband of the device class for key, if enabled."""
+        if self._use_deadbands and device_class in PUBLISH_DEADBANDS:
+            self.publisher.deadbands[key] = PUBLISH_DEADBANDS[device_class]
+
+    @callback
+    def async_add_listener(
+        self, update_callback: CALLBACK_TYPE, context: Any = None
+    ) -> Callable[[], None]:
+        """Listen for data updates, limiting the readout to the keys listened to.
+
+        The enabled entities listen with their key as context, so the
+        client only computes the keys of those entities. The listeners are
+        counted per key, the client is only told when the keys change.
+        """
+        remove_listener = super().async_add_listener(update_callback, context)
+        if context is None:
+            return remove_listener
+        self._listener_keys[context] += 1
+        if self._listener_keys[context] == 1:
+            self.client.set_entity_keys(self._listener_keys)
+
+        @callback
+        def remove_entity_listener() -> None:
+            remove_listener()
+            self._listener_keys[context] -= 1
+            if not self._listener_keys[context]:
+                del self._listener_keys[context]
+                self.client.set_entity_keys(self._listener_keys)
+
+        return remove_entity_listener
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Notify only the entities whose value is published.
+
+        The entities listen with their key as context, other listeners are
+        always notified. All are notified when the availability changed.
+        """
+        available = self.last_update_success
+        if available != self._available:
+            self._available = available
+            self.publisher.reset()
+        if not available or self.data is None:
+            super().async_update_listeners()
+            return
+        listeners = list(self._listeners.values())
+        keys = self.publisher.select(self.data, self.async_contexts(), monotonic())  # type: ignore
+        for update_callback, context in listeners:
+            if context is None or context in keys:
+                update_callback()
+
+    def async_start_streaming(self) -> None:
+        """Start feeding the coordinator from the LOOP stream."""
+        self.client.start_streaming(self.async_set_updated_data, self.interval)
+
     async def _async_update_data(self) -> dict[str, Any]:
         """Update data via library."""
         try:
-            data: LoopDataParserRevB = await self.client.async_get_current_data()  # type: ignore
-            return data
+            data: Packet = await self.client.async_get_current_data()  # type: ignore
         except Exception as exception:
             _LOGGER.error(
                 "Error DavisVantageDataUpdateCoordinator _async_update_data: %s", exception
             )
             raise UpdateFailed() from exception
+        if self.update_interval is not None:
+            interval = self.adaptive.update(data) if self.adaptive else self.interval
+            if self.data is None:
+                interval += self._poll_offset
+            # Read a new archive record right after the console wrote it. The
+            # refresh time is rounded to the second, it may come a second early.
+            aligned = self.client.align_interval(interval)
+            if aligned < interval:
+                interval = min(aligned + 1, interval)
+            data["PollInterval"] = round(interval)
+            self.update_interval = timedelta(seconds=interval)
+        return data
@@ -0,0 +1,499 @@
+"""Precompiled decoders for the LOOP and HILOWS packets."""
+
+import copy
+import struct
+from datetime import datetime
+from itertools import compress
+from operator import ne
+from typing import Any, Callable, Collection
+
+from pyvantagepro.parser import HighLowParserRevB, LoopDataParserRevB
+
+type Converter = Callable[[Any], Any]
+
+
+class Packet(dict[str, Any]):
+    """Scaled values of a decoded packet.
+
+    raw holds the unscaled field values, with the byte arrays split into
+    numbered fields, and raw_bytes the packet they were decoded from. The
+    fields holding a "no data" value are None, their bits are set in
+    invalid.
+    """
+
+    __slots__ = ("raw", "raw_bytes", "invalid", "values", "_field_bits")
+
+    def __init__(
+        self,
+        raw_bytes: bytes,
+        raw: dict[str, Any],
+        invalid: int = 0,
+        field_bits: dict[str, int] | None = None,
+        values: tuple[Any, ...] = (),
+    ) -> None:
+        super().__init__()
+        self.raw_bytes = raw_bytes
+        self.raw = raw
+        self.invalid = invalid
+        self.values = values
+        self._field_bits = field_bits or {}
+
+    def copy(self, values: dict[str, Any] | None = None) -> "Packet":  # type: ignore[override]
+        """Return a copy, holding values instead of its own if given."""
+        packet = Packet(
+            self.raw_bytes, self.raw, self.invalid, self._field_bits, self.values
+        )
+        packet.update(self if values is None else values)
+        return packet
+
+    def is_valid(self, key: str) -> bool:
+        return not self.invalid & self._field_bits.get(key, 0)
+
+    def invalid_keys(self) -> list[str]:
+        return [key for key, bit in self._field_bits.items() if self.invalid & bit]
+
+
+# "No data" values per field type, the byte arrays use 255 as well
+SENTINELS: dict[str, frozenset[int]] = {
+    "B": frozenset((255,)),
+    "H": frozenset((32767, 65535)),
+    "h": frozenset((32767, -32768)),
+}
+
+
+def scale(divisor: int) -> Converter:
+    return lambda value: value / divisor
+
+
+def offset(value: int) -> Converter:
+    return lambda raw: raw - value
+
+
+def unpack_time(value: int) -> str:
+    """Unpack a HHMM time field to "HH:MM"."""
+    return "%02d:%02d" % divmod(value, 100)
+
+
+def unpack_storm_date(value: int) -> str:
+    """Unpack a storm date field (month:4 day:5 year:7) to "YYYY-MM-DD"."""
+    return "%d-%0.2d-%0.2d" % ((value & 0x7F) + 2000, value >> 12, (value >> 7) & 0x1F)
+
+
+def unpack_battery_volts(value: int) -> float:
+    return value * 300 / 512 / 100
+
+
+class PacketDecoder:
+    """Decoder compiled once from a pyvantagepro packet format.
+
+    All fields are unpacked by a single struct call on a memoryview of the
+    packet, the byte arrays listed in arrays as separate numbered fields.
+    One pass over the compiled field table then builds the scaled values
+    and sets the fields holding a "no data" value to None. The converter of
+    an array applies to all its fields. Fields in hidden
+    are only kept in the raw view, flags maps a key to the (field, bit) of
+    a flag and no_data overrides the "no data" values of a field.
+    field_bits maps the keys to their bit in Packet.invalid and spans the
+    fields of the format to their byte offset and size.
+    """
+
+    def __init__(
+        self,
+        data_format: tuple[tuple[str, str], ...],
+        converters: dict[str, Converter],
+        arrays: tuple[str, ...] = (),
+        hidden: tuple[str, ...] = (),
+        flags: dict[str, tuple[str, int]] | None = None,
+        no_data: dict[str, frozenset[int]] | None = None,
+    ) -> None:
+        struct_format = "<"
+        raw_keys: list[str] = []
+        raw_names: list[str] = []
+        raw_formats: list[str] = []
+        offsets: dict[str, int] = {}
+        self.spans: dict[str, tuple[int, int]] = {}
+        for name, field_format in data_format:
+            offsets[name] = struct.calcsize(struct_format)
+            self.spans[name] = (offsets[name], struct.calcsize(f"<{field_format}"))
+            if name in arrays:
+                size = int(field_format[:-1])
+                struct_format += f"{size}B"
+                raw_keys += ["%s%.2d" % (name, i + 1) for i in range(size)]
+                raw_names += [name] * size
+                raw_formats += ["B"] * size
+            else:
+                struct_format += field_format
+                raw_keys.append(name)
+                raw_names.append(name)
+                raw_formats.append(field_format)
+        self.size = struct.calcsize(struct_format)
+        self._struct = struct.Struct(struct_format)
+        self._raw_keys = tuple(raw_keys)
+        # key, raw value index, converter, "no data" values, validity bit
+        fields = [
+            (
+                key,
+                index,
+                converters.get(key, converters.get(raw_names[index])),
+                (no_data or {}).get(key, SENTINELS.get(raw_formats[index], ())),
+            )
+            for index, key in enumerate(raw_keys)
+            if key not in hidden
+        ]
+        self.field_bits = {key: 1 << bit for bit, (key, *_) in enumerate(fields)}
+        self._all_fields = tuple(
+            (*field, self.field_bits[field[0]]) for field in fields
+        )
+        # key, byte offset, mask, raw value index
+        self._all_flags = tuple(
+            (key, offsets[field] + bit // 8, 1 << (bit % 8), raw_keys.index(field))
+            for key, (field, bit) in (flags or {}).items()
+        )
+        self._indexes = tuple(range(len(raw_keys)))
+        self.keys = frozenset(self.field_bits) | {flag[0] for flag in self._all_flags}
+        self._compile(None)
+
+    def select(self, keys: Collection[str]) -> "PacketDecoder":
+        """Return a decoder of only the fields and flags in keys.
+
+        The raw view, the validity bits of the fields and the size stay the
+        same; the keys not selected are missing from the packets.
+        """
+        decoder = copy.copy(self)
+        decoder._compile(keys)
+        return decoder
+
+    def _compile(self, keys: Collection[str] | None) -> None:
+        self._fields = tuple(
+            field for field in self._all_fields if keys is None or field[0] in keys
+        )
+        self._flags = tuple(
+            flag[:3] for flag in self._all_flags if keys is None or flag[0] in keys
+        )
+        # What to decode again when the raw value at an index changes
+        self._field_at = {field[1]: field for field in self._fields}
+        self._flags_at: dict[int, list[tuple[str, int, int]]] = {}
+        for flag in self._all_flags:
+            if keys is None or flag[0] in keys:
+                self._flags_at.setdefault(flag[3], []).append(flag[:3])
+
+    def decode(self, data: bytes, dtime: datetime | None = None) -> Packet:
+        view = memoryview(data)
+        values = self._struct.unpack_from(view)
+        packet = Packet(
+            data, dict(zip(self._raw_keys, values)), field_bits=self.field_bits
+        )
+        packet["Datetime"] = dtime
+        invalid = 0
+        for key, index, converter, sentinels, bit in self._fields:
+            value = values[index]
+            if value in sentinels:
+                packet[key] = None
+                invalid |= bit
+            else:
+                packet[key] = value if converter is None else converter(value)
+        for key, offset, mask in self._flags:
+            packet[key] = 1 if view[offset] & mask else 0
+        packet.invalid = invalid
+        packet.values = values
+        return packet
+
+    def decode_changes(
+        self, data: bytes, dtime: datetime | None, previous: Packet
+    ) -> tuple[Packet, frozenset[str]]:
+        """Decode data as changes to the previous packet.
+
+        Only the fields whose raw value differs are converted again, the
+        others are copied. Returns the packet and the keys that changed.
+        """
+        view = memoryview(data)
+        values = self._struct.unpack_from(view)
+        packet = Packet(
+            data,
+            dict(zip(self._raw_keys, values)),
+            previous.invalid,
+            self.field_bits,
+            values,
+        )
+        packet.update(previous)
+        packet["Datetime"] = dtime
+        changed: list[str] = []
+        for index in compress(self._indexes, map(ne, values, previous.values)):
+            if (field := self._field_at.get(index)) is not None:
+                key, _, converter, sentinels, bit = field
+                value = values[index]
+                if value in sentinels:
+                    packet[key] = None
+                    packet.invalid |= bit
+                else:
+                    packet[key] = value if converter is None else converter(value)
+                    packet.invalid &= ~bit
+                changed.append(key)
+            for key, offset, mask in self._flags_at.get(index, ()):
+                packet[key] = 1 if view[offset] & mask else 0
+                changed.append(key)
+        return packet, frozenset(changed)
+
+    def mask(self, *keys: str) -> int:
+        """Return the validity bits of the keys."""
+        mask = 0
+        for key in keys:
+            mask |= self.field_bits[key]
+        return mask
+
+
+def _alarm_flags(field: str, names: list[str]) -> dict[str, tuple[str, int]]:
+    return {name: (field, bit) for bit, name in enumerate(names) if name}
+
+
+def _extra_alarm_flags() -> dict[str, tuple[str, int]]:
+    flags: dict[str, tuple[str, int]] = {}
+    # Byte 0 of the extra temperature/humidity alarms is the outside humidity
+    for i in range(1, 8):
+        for bit, name in enumerate(("LowTemp", "HighTemp", "LowHum", "HighHum")):
+            flags["AlarmEx%.2d%s" % (i, name)] = ("AlarmExTempHum", i * 8 + bit)
+    for i in range(1, 5):
+        for bit, name in enumerate(
+            (
+                "LowLeafWet",
+                "HighLeafWet",
+                "LowSoilMois",
+                "HighSoilMois",
+                "LowLeafTemp",
+                "HighLeafTemp",
+                "LowSoilTemp",
+                "HighSoilTemp",
+            )
+        ):
+            flags["Alarm%.2d%s" % (i, name)] = ("AlarmSoilLeaf", (i - 1) * 8 + bit)
+    return flags
+
+
+LOOP_DECODER = PacketDecoder(
+    LoopDataParserRevB.LOOP_FORMAT,
+    {
+        "Barometer": scale(1000),
+        "TempIn": scale(10),
+        "TempOut": scale(10),
+        "RainRate": scale(100),
+        "RainStorm": scale(100),
+        "UV": scale(10),
+        "StormStartDate": unpack_storm_date,
+        "RainDay": scale(100),
+        "RainMonth": scale(100),
+        "RainYear": scale(100),
+        "ETDay": scale(1000),
+        "ETMonth": scale(100),
+        "ETYear": scale(100),
+        "BatteryVolts": unpack_battery_volts,
+        "SunRise": unpack_time,
+        "SunSet": unpack_time,
+        # The temperatures of the extra sensors are sent as °F + 90
+        "ExtraTemps": offset(90),
+        "SoilTemps": offset(90),
+        "LeafTemps": offset(90),
+    },
+    arrays=(
+        "ExtraTemps",
+        "SoilTemps",
+        "LeafTemps",
+        "HumExtra",
+        "SoilMoist",
+        "LeafWetness",
+    ),
+    hidden=(
+        "LOO",
+        "PacketType",
+        "NextRec",
+        "AlarmIn",
+        "AlarmRain",
+        "AlarmOut",
+        "AlarmExTempHum",
+        "AlarmSoilLeaf",
+        "EOL",
+        "CRC",
+    ),
+    flags={
+        **_alarm_flags(
+            "AlarmIn",
+            [
+                "AlarmInFallBarTrend",
+                "AlarmInRisBarTrend",
+                "AlarmInLowTemp",
+                "AlarmInHighTemp",
+                "AlarmInLowHum",
+                "AlarmInHighHum",
+                "AlarmInTime",
+            ],
+        ),
+        **_alarm_flags(
+            "AlarmRain",
+            [
+                "AlarmRainHighRate",
+                "AlarmRain15min",
+                "AlarmRain24hour",
+                "AlarmRainStormTotal",
+                "AlarmRainETDaily",
+            ],
+        ),
+        **_alarm_flags(
+            "AlarmOut",
+            [
+                "AlarmOutLowTemp",
+                "AlarmOutHighTemp",
+                "AlarmOutWindSpeed",
+                "AlarmOut10minAvgSpeed",
+                "AlarmOutLowDewpoint",
+                "AlarmOutHighDewPoint",
+                "AlarmOutHighHeat",
+                "AlarmOutLowWindChill",
+                "AlarmOutHighTHSW",
+                "AlarmOutHighSolarRad",
+                "AlarmOutHighUV",
+                "AlarmOutUVDose",
+                "AlarmOutUVDoseEnabled",
+            ],
+        ),
+        **_extra_alarm_flags(),
+    },
+)
+
+HILOWS_DECODER = PacketDecoder(
+    HighLowParserRevB.HILOWS_FORMAT,
+    {
+        **{
+            key: scale(1000)
+            for key in (
+                "BaroLoDay",
+                "BaroHiDay",
+                "BaroLoMonth",
+                "BaroHiMonth",
+                "BaroLoYear",
+                "BaroHiYear",
+            )
+        },
+        **{
+            key: scale(10)
+            for key in (
+                "InTempHiDay",
+                "InTempLoDay",
+                "InTempLoMonth",
+                "InTempHiMonth",
+                "InTempLoYear",
+                "InTempHiYear",
+                "TempLoDay",
+                "TempHiDay",
+                "TempHiMonth",
+                "TempLoMonth",
+                "TempHiYear",
+                "TempLoYear",
+                "UVHiDay",
+                "UVHiMonth",
+                "UVHiYear",
+            )
+        },
+        **{
+            key: scale(100)
+            for key in ("RainHiDay", "RainHiHour", "RainHiMonth", "RainHiYear")
+        },
+        **{
+            key: unpack_time
+            for key in (
+                "BaroLoTime",
+                "BaroHiTime",
+                "WindHiTime",
+                "TempLoTime",
+                "TempHiTime",
+                "DewLoTime",
+                "DewHiTime",
+                "SolarHiTime",
+                "UVHiTime",
+                "RainHiTime",
+            )
+        },
+    },
+)
+
+# LOOP2 packet, sent instead of a LOOP packet with "LPS 2" (and alternating
+# with it with "LPS 3") by consoles with firmware 1.90 or later
+LOOP2_PACKET_TYPE = 1
+LOOP2_FORMAT = (
+    ("LOO", "3s"), ("BarTrend", "B"), ("PacketType", "B"),
+    ("Unused1", "2s"), ("Barometer", "H"), ("TempIn", "h"),
+    ("HumIn", "B"), ("TempOut", "h"), ("WindSpeed", "B"),
+    ("Unused2", "B"), ("WindDir", "H"), ("WindSpeed10Min", "H"),
+    ("WindSpeed2Min", "H"), ("WindGust10Min", "H"), ("WindGustDir10Min", "H"),
+    ("Unused3", "4s"), ("DewPoint", "h"), ("Unused4", "B"),
+    ("HumOut", "B"), ("Unused5", "B"), ("HeatIndex", "h"),
+    ("WindChill", "h"), ("THSW", "h"), ("RainRate", "H"),
+    ("UV", "B"), ("SolarRad", "H"), ("RainStorm", "H"),
+    ("StormStartDate", "H"), ("RainDay", "H"), ("Rain15Min", "H"),
+    ("RainHour", "H"), ("ETDay", "H"), ("Rain24Hour", "H"),
+    ("BarReduction", "B"), ("BarOffset", "h"), ("BarCalibration", "h"),
+    ("BarRaw", "H"), ("BarAbsolute", "H"), ("Altimeter", "H"),
+    ("Unused6", "2s"), ("GraphPointers", "10s"), ("Unused7", "12s"),
+    ("EOL", "2s"), ("CRC", "H"),
+)
+
+LOOP2_DECODER = PacketDecoder(
+    LOOP2_FORMAT,
+    {
+        "Barometer": scale(1000),
+        "TempIn": scale(10),
+        "TempOut": scale(10),
+        "WindSpeed10Min": scale(10),
+        "WindSpeed2Min": scale(10),
+        "RainRate": scale(100),
+        "UV": scale(10),
+        "RainStorm": scale(100),
+        "StormStartDate": unpack_storm_date,
+        "RainDay": scale(100),
+        "Rain15Min": scale(100),
+        "RainHour": scale(100),
+        "ETDay": scale(1000),
+        "Rain24Hour": scale(100),
+        "BarAbsolute": scale(1000),
+        "Altimeter": scale(1000),
+    },
+    hidden=(
+        "LOO",
+        "PacketType",
+        "Unused1",
+        "Unused2",
+        "Unused3",
+        "Unused4",
+        "Unused5",
+        "Unused6",
+        "GraphPointers",
+        "Unused7",
+        "EOL",
+        "CRC",
+    ),
+    # The whole degrees of the console calculations are 255 without data
+    no_data={
+        key: frozenset((255, 32767, -32768))
+        for key in ("DewPoint", "HeatIndex", "WindChill", "THSW")
+    },
+)
+
+# Byte spans in a LOOP packet and a LOOP2 packet of the fields they share
+LOOP2_SHARED_SPANS = tuple(
+    (LOOP_DECODER.spans[name], LOOP2_DECODER.spans[name][0])
+    for name in LOOP2_DECODER.spans
+    if name not in ("LOO", "PacketType", "EOL", "CRC")
+    and name in LOOP_DECODER.spans
+    and LOOP_DECODER.spans[name][1] == LOOP2_DECODER.spans[name][1]
+)
+
+
+def merge_loop2(loop: bytes, loop2: bytes) -> bytes:
+    """Return the LOOP packet with the fields it shares with the LOOP2 packet replaced."""
+    packet = bytearray(loop)
+    for (start, size), start2 in LOOP2_SHARED_SPANS:
+        packet[start : start + size] = loop2[start2 : start2 + size]
+    return bytes(packet)
+
+
+# Fields a LOOP packet needs to count as a successful readout
+LOOP_REQUIRED_KEYS = ("TempOut", "RainRate", "WindSpeed", "HumOut", "WindSpeed10Min")
+LOOP_REQUIRED = LOOP_DECODER.mask(*LOOP_REQUIRED_KEYS)
@@ -0,0 +1,80 @@
+"""In-memory mirror of the console configuration EEPROM."""
+
+import struct
+
+from .console import AsyncVantagePro2, eeprom_request
+from .const import (
+    EEPROM_CONFIG_ADDRESS,
+    EEPROM_CONFIG_SIZE,
+    EEPROM_LATITUDE,
+    EEPROM_SETUP_BITS,
+    EEPROM_ARCHIVE_PERIOD,
+)
+
+CONFIG_REQUEST = eeprom_request(EEPROM_CONFIG_ADDRESS, EEPROM_CONFIG_SIZE)
+
+
+class ConsoleConfig:
+    """Mirror of the configuration block of the console EEPROM.
+
+    The whole block is filled by one bulk EEBRD read. Writes go through the
+    mirror, settings changed by other commands invalidate it.
+    """
+
+    def __init__(self) -> None:
+        self._data: bytearray | None = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._data is not None
+
+    async def load(self, console: AsyncVantagePro2) -> None:
+        """Read the configuration block from the console."""
+        self.set_data(
+            await console.read_from_eeprom(EEPROM_CONFIG_ADDRESS, EEPROM_CONFIG_SIZE)
+        )
+
+    def set_data(self, data: bytes) -> None:
+        """Fill the mirror with a configuration block read elsewhere."""
+        self._data = bytearray(data[:EEPROM_CONFIG_SIZE])
+
+    def invalidate(self) -> None:
+        """Forget the mirror, it will be read again on next use."""
+        self._data = None
+
+    async def write(self, console: AsyncVantagePro2, address: int, data: bytes) -> None:
+        """Write data to the console EEPROM and the mirror."""
+        await console.write_to_eeprom(address, data)
+        offset = address - EEPROM_CONFIG_ADDRESS
+        if self._data is not None and 0 <= offset < EEPROM_CONFIG_SIZE:
+            self._data[offset : offset + len(data)] = data
+
+    def _unpack(self, fmt: str, address: int) -> tuple:  # type: ignore
+        if self._data is None:
+            raise ValueError("Console configuration not loaded")
+        return struct.unpack_from(fmt, self._data, address - EEPROM_CONFIG_ADDRESS)
+
+    @property
+    def latitude(self) -> float:
+        return self._unpack("<h", EEPROM_LATITUDE)[0] / 10
+
+    @property
+    def longitude(self) -> float:
+        return self._unpack("<h", EEPROM_LATITUDE + 2)[0] / 10
+
+    @property
+    def elevation(self) -> int:
+        return self._unpack("<h", EEPROM_LATITUDE + 4)[0]
+
+    @property
+    def setup_bits(self) -> int:
+        return self._unpack("B", EEPROM_SETUP_BITS)[0]
+
+    @property
+    def rain_collector(self) -> int:
+        """Rain collector type: 0x00 = 0.01", 0x10 = 0.2 mm, 0x20 = 0.1 mm."""
+        return self.setup_bits & 0x30
+
+    @property
+    def archive_period(self) -> int:
+        return self._unpack("B", EEPROM_ARCHIVE_PERIOD)[0]
@@ -0,0 +1,304 @@
+"""Declarative post-processing of a station readout."""
+
+from dataclasses import dataclass
+from datetime import date, datetime, time
+from functools import lru_cache
+from operator import mul
+from typing import Any, Callable, Collection
+
+from .utils import (
+    calc_dew_point,
+    calc_feels_like,
+    calc_heat_index,
+    calc_wind_chill,
+    convert_kmh_to_bft,
+    convert_to_kmh,
+    get_baro_trend,
+    get_solar_rad,
+    get_uv,
+    get_wind_rose,
+)
+
+SOURCE_DATA = "data"
+SOURCE_HILOWS = "hilows"
+SOURCE_ARCHIVE = "archive"
+SOURCE_STATION = "station"
+SOURCE_LOOP2 = "loop2"
+
+
+@dataclass(frozen=True)
+class Transform:
+    """One output key of the readout.
+
+    inputs are "source.field" names, a plain name is a field of the readout
+    itself: the LOOP values, or the output of another transform, which then
+    runs first. convert gets the input values and is skipped (the output is
+    None) when one is None, unless keep_none is set. Without convert the
+    single input is copied.
+    """
+
+    key: str
+    inputs: tuple[str, ...]
+    convert: Callable[..., Any] | None = None
+    keep_none: bool = False
+
+
+@lru_cache(maxsize=2048)
+def parse_time(value: str | None) -> time | None:
+    """Parse a "HH:MM" time, None if it isn't a valid time."""
+    if value is None:
+        return None
+    try:
+        return datetime.strptime(value, "%H:%M").time()
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=64)
+def parse_date(value: str | None) -> date | None:
+    """Parse a "YYYY-MM-DD" date, None if it isn't a valid date."""
+    if value is None:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+
+def calm_wind_dir(wind_dir: int | None, wind_speed: int | None) -> int | None:
+    """There is no wind direction without wind."""
+    return None if wind_speed == 0 else wind_dir
+
+
+def is_raining(rain_rate: float) -> bool:
+    return rain_rate > 0
+
+
+def wind_avg_dir(wind_avg: int, direction: int) -> float | None:
+    """Average wind direction of the archive period (0-15), 255 is no data."""
+    if wind_avg > 0 and direction < 255:
+        return direction * 22.5
+    return None
+
+
+def wind_speed_bft(wind_speed_avg: float) -> int:
+    return convert_kmh_to_bft(convert_to_kmh(wind_speed_avg))
+
+
+def parse_input(name: str) -> tuple[str, str]:
+    """Split "source.field", a plain field is a field of the readout."""
+    source, _, field = name.rpartition(".")
+    return source or SOURCE_DATA, field
+
+
+class Pipeline:
+    """Transforms compiled into one ordered pass over a readout.
+
+    The transforms are sorted at setup so every transform runs after the
+    ones it reads the output of. A transform reading hilows, archive or
+    LOOP2 values is skipped when that readout is missing.
+
+    Given the keys that changed since the previous readout, only the
+    transforms depending on them run again, on a copy of the previous
+    output. fields are the readout fields the transforms read and sources
+    the readouts they read from.
+    """
+
+    def __init__(self, transforms: tuple[Transform, ...]) -> None:
+        outputs = {transform.key: transform for transform in transforms}
+        # The readouts and readout fields every output needs, including
+        # those of its dependencies
+        sources: dict[str, frozenset[str]] = {}
+        fields: dict[str, frozenset[str]] = {}
+        dependencies: dict[str, frozenset[str]] = {}
+        ordered: list[Transform] = []
+        visiting: set[str] = set()
+
+        def visit(transform: Transform) -> None:
+            if transform.key in sources:
+                return
+            if transform.key in visiting:
+                raise ValueError(f"Circular transform dependency on {transform.key}")
+            visiting.add(transform.key)
+            needed = set()
+            needed_fields = set()
+            needed_outputs = set()
+            for source, field in map(parse_input, transform.inputs):
+                if source != SOURCE_DATA:
+                    needed.add(source)
+                    continue
+                needed_fields.add(field)
+                dependency = outputs.get(field)
+                if dependency is not None and dependency is not transform:
+                    visit(dependency)
+                    needed |= sources[field]
+                    needed_fields |= fields[field]
+                    needed_outputs |= dependencies[field] | {field}
+            visiting.discard(transform.key)
+            sources[transform.key] = frozenset(needed)
+            fields[transform.key] = frozenset(needed_fields)
+            dependencies[transform.key] = frozenset(needed_outputs)
+            ordered.append(transform)
+
+        for transform in transforms:
+            visit(transform)
+
+        self._transforms = tuple(ordered)
+        self._dependencies = dependencies
+        self.keys = frozenset(outputs)
+        # The readout fields read by the whole pipeline
+        self.fields = frozenset().union(*fields.values())
+        self.sources = frozenset().union(*sources.values())
+
+        self._steps = tuple(
+            (
+                transform.key,
+                tuple(map(parse_input, transform.inputs)),
+                tuple(sources[transform.key] - {SOURCE_STATION}),
+                fields[transform.key],
+                # Transforms changing a readout value start from the decoded one
+                (SOURCE_DATA, transform.key) in map(parse_input, transform.inputs),
+                transform.convert,
+                transform.keep_none,
+            )
+            for transform in ordered
+        )
+
+    def select(self, keys: Collection[str]) -> "Pipeline":
+        """Return a pipeline of only the transforms needed for keys."""
+        needed: set[str] = set()
+        for key in keys:
+            if key in self._dependencies:
+                needed |= self._dependencies[key] | {key}
+        return Pipeline(
+            tuple(transform for transform in self._transforms if transform.key in needed)
+        )
+
+    def apply(
+        self,
+        data: dict[str, Any],
+        hilows: dict[str, Any] | None,
+        archive: dict[str, Any] | None,
+        station: dict[str, Any],
+        changed: frozenset[str] | None = None,
+        decoded: dict[str, Any] | None = None,
+        loop2: dict[str, Any] | None = None,
+    ) -> None:
+        """Add the transform outputs to data.
+
+        With changed, data is a copy of the previous output. The changed
+        keys are taken from the decoded readout and only the transforms
+        depending on them run.
+        """
+        sources = {
+            SOURCE_DATA: data,
+            SOURCE_HILOWS: hilows,
+            SOURCE_ARCHIVE: archive,
+            SOURCE_STATION: station,
+            SOURCE_LOOP2: loop2,
+        }
+        if changed is not None and decoded is not None:
+            for key in changed:
+                data[key] = decoded[key]
+        for key, inputs, needed, fields, in_place, convert, keep_none in self._steps:
+            if needed and any(sources[source] is None for source in needed):
+                continue
+            if changed is not None:
+                if fields.isdisjoint(changed):
+                    continue
+                if in_place and decoded is not None:
+                    data[key] = decoded[key]
+            values = [sources[source].get(field) for source, field in inputs]  # type: ignore
+            if convert is None:
+                data[key] = values[0]
+            elif keep_none or None not in values:
+                data[key] = convert(*values)
+            else:
+                data[key] = None
+
+
+def scale_rain(key: str, field: str | None = None) -> Transform:
+    """Rain values are counted in 0.01" clicks of the rain collector."""
+    return Transform(key, (field or f"data.{key}", "station.RainFactor"), mul)
+
+
+def hilows_time(key: str, field: str) -> Transform:
+    return Transform(key, (f"hilows.{field}",), parse_time)
+
+
+READOUT_TRANSFORMS = (
+    # Derived from the LOOP values
+    Transform("HeatIndex", ("TempOut", "HumOut"), calc_heat_index),
+    Transform("DewPoint", ("TempOut", "HumOut"), calc_dew_point),
+    Transform("WindChill", ("TempOut", "WindSpeed"), calc_wind_chill),
+    Transform("FeelsLike", ("TempOut", "HumOut", "WindSpeed"), calc_feels_like),
+    Transform("WindDir", ("WindDir", "WindSpeed"), calm_wind_dir, keep_none=True),
+    Transform("WindDirRose", ("WindDir",), get_wind_rose),
+    Transform("IsRaining", ("RainRate",), is_raining),
+    Transform("BarTrend", ("BarTrend",), get_baro_trend),
+    Transform("UV", ("UV",), get_uv),
+    Transform("SolarRad", ("SolarRad",), get_solar_rad),
+    Transform("StormStartDate", ("StormStartDate",), parse_date),
+    Transform("SunRise", ("SunRise",), parse_time),
+    Transform("SunSet", ("SunSet",), parse_time),
+    scale_rain("RainDay"),
+    scale_rain("RainMonth"),
+    scale_rain("RainYear"),
+    scale_rain("RainRate"),
+    scale_rain("RainStorm"),
+    # Station setup
+    Transform("ArchiveInterval", ("station.ArchiveInterval",)),
+    Transform("Latitude", ("station.Latitude",)),
+    Transform("Longitude", ("station.Longitude",)),
+    Transform("Elevation", ("station.Elevation",)),
+    Transform("RainCollector", ("station.RainCollector",)),
+    # Latest archive record
+    Transform("WindGust", ("archive.WindHi",)),
+    Transform("WindSpeedAvg", ("archive.WindAvg",)),
+    Transform("WindAvgDir", ("archive.WindAvg", "archive.WindAvgDir"), wind_avg_dir),
+    Transform("WindAvgDirRose", ("WindAvgDir",), get_wind_rose),
+    Transform("WindSpeedBft", ("WindSpeedAvg",), wind_speed_bft),
+    # Highs and lows of the day
+    Transform("TempOutHiDay", ("hilows.TempHiDay",)),
+    hilows_time("TempOutHiTime", "TempHiTime"),
+    Transform("TempOutLowDay", ("hilows.TempLoDay",)),
+    hilows_time("TempOutLowTime", "TempLoTime"),
+    Transform("DewPointHiDay", ("hilows.DewHiDay",)),
+    hilows_time("DewPointHiTime", "DewHiTime"),
+    Transform("DewPointLowDay", ("hilows.DewLoDay",)),
+    hilows_time("DewPointLowTime", "DewLoTime"),
+    scale_rain("RainRateDay", "hilows.RainHiDay"),
+    hilows_time("RainRateTime", "RainHiTime"),
+    Transform("BarometerHiDay", ("hilows.BaroHiDay",)),
+    hilows_time("BarometerHiTime", "BaroHiTime"),
+    Transform("BarometerLowDay", ("hilows.BaroLoDay",)),
+    hilows_time("BarometerLoTime", "BaroLoTime"),
+    Transform("SolarRadDay", ("hilows.SolarHiDay",)),
+    hilows_time("SolarRadTime", "SolarHiTime"),
+    Transform("UVDay", ("hilows.UVHiDay",)),
+    hilows_time("UVTime", "UVHiTime"),
+    Transform("WindGustDay", ("hilows.WindHiDay",)),
+    hilows_time("WindGustTime", "WindHiTime"),
+)
+
+READOUT_PIPELINE = Pipeline(READOUT_TRANSFORMS)
+
+# With LOOP2 packets the console calculations and wind averages are used
+LOOP2_TRANSFORMS = (
+    Transform("DewPoint", ("loop2.DewPoint",)),
+    Transform("HeatIndex", ("loop2.HeatIndex",)),
+    Transform("WindChill", ("loop2.WindChill",)),
+    Transform("THSW", ("loop2.THSW",)),
+    Transform("WindGust", ("loop2.WindGust10Min",)),
+    Transform("WindSpeedAvg", ("loop2.WindSpeed10Min",)),
+    Transform("WindSpeed2Min", ("loop2.WindSpeed2Min",)),
+)
+
+LOOP2_PIPELINE = Pipeline(
+    tuple(
+        transform
+        for transform in READOUT_TRANSFORMS
+        if transform.key not in {loop2.key for loop2 in LOOP2_TRANSFORMS}
+    )
+    + LOOP2_TRANSFORMS
+)
@@ -0,0 +1,103 @@
+"""Refresh scheduler for the readouts next to the LOOP packet."""
+
+from datetime import datetime, timedelta
+
+from .const import (
+    ARCHIVE_READ_DELAY,
+    CLOCK_OFFSET_REFRESH,
+    COMMAND_ARCHIVES,
+    COMMAND_HILOWS,
+)
+
+
+class RefreshScheduler:
+    """Keep track of when each console readout is due.
+
+    Every command has its own cadence in seconds. A cadence of 0 means the
+    natural cadence of the command: hilows on every readout, archives after
+    every archive period boundary and setup only once, or after it has been
+    invalidated by a change.
+
+    The archive records are timestamped by the console clock. Once the
+    offset of that clock is known, the next record is expected one archive
+    period after the last one, otherwise after the next period boundary.
+    """
+
+    def __init__(self, cadences: dict[str, int]) -> None:
+        self._cadences = cadences
+        self._last_done: dict[str, datetime] = {}
+        self.clock_offset: timedelta | None = None  # console time - local time
+        self._clock_offset_time: datetime | None = None
+
+    def set_clock_offset(self, console_time: datetime, now: datetime) -> None:
+        """Register the console time read at local time now."""
+        self.clock_offset = console_time - now
+        self._clock_offset_time = now
+
+    def invalidate_clock_offset(self) -> None:
+        """Measure the offset of the console clock again on the next archive read."""
+        self._clock_offset_time = None
+
+    def is_clock_offset_due(self, now: datetime) -> bool:
+        return self._clock_offset_time is None or now - self._clock_offset_time >= (
+            timedelta(seconds=CLOCK_OFFSET_REFRESH)
+        )
+
+    def to_local(self, console_time: datetime) -> datetime:
+        """Convert a console timestamp to local time."""
+        return console_time - (self.clock_offset or timedelta())
+
+    def get_next_archive_time(
+        self, last_record: datetime | None, archive_period: int
+    ) -> datetime | None:
+        """Return the local time the record after last_record can be read."""
+        if last_record is None or self.clock_offset is None or not archive_period:
+            return None
+        return self.to_local(
+            last_record + timedelta(minutes=archive_period)
+        ) + timedelta(seconds=ARCHIVE_READ_DELAY)
+
+    def is_due(
+        self,
+        command: str,
+        now: datetime,
+        archive_period: int | None = None,
+        last_record: datetime | None = None,
+    ) -> bool:
+        """Return True if the command should be executed on this readout."""
+        last_done = self._last_done.get(command)
+        if last_done is None:
+            return True
+        cadence = self._cadences.get(command, 0)
+        if cadence:
+            return now - last_done >= timedelta(seconds=cadence)
+        if command == COMMAND_HILOWS:
+            # Once per readout, the readout time is the same for all its reads
+            return now > last_done
+        if command == COMMAND_ARCHIVES and archive_period:
+            next_record = self.get_next_archive_time(last_record, archive_period)
+            if next_record is not None and now - next_record < timedelta(
+                minutes=archive_period
+            ):
+                return now >= next_record
+            # Not logged for a while, wait for the next period boundary
+            delay = (self.clock_offset or timedelta()) - timedelta(
+                seconds=ARCHIVE_READ_DELAY
+            )
+            return get_period_start(now + delay, archive_period) > last_done + delay
+        return False
+
+    def mark_done(self, command: str, now: datetime) -> None:
+        """Register a successful execution of the command."""
+        self._last_done[command] = now
+
+    def invalidate(self, command: str) -> None:
+        """Make the command due on the next readout."""
+        self._last_done.pop(command, None)
+
+
+def get_period_start(moment: datetime, period: int) -> datetime:
+    """Return the start of the archive period the moment falls in."""
+    moment = moment.replace(second=0, microsecond=0)
+    minutes = moment.hour * 60 + moment.minute
+    return moment - timedelta(minutes=minutes % period)
@@ -1,6 +1,7 @@
 """Sensor setup for our Integration."""
 
 import logging
+from collections.abc import Iterable
 from dataclasses import dataclass
 
 from homeassistant.components.sensor import (
@@ -27,18 +28,23 @@ from homeassistant.const import (
     EntityCategory
 )
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.core import callback
 from homeassistant.helpers.entity_registry import async_get as async_get_entity_registry
 from homeassistant.helpers.typing import StateType
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from . import DavisConfigEntry
 from .const import (
+    DOMAIN,
     DEFAULT_NAME,
     RAIN_COLLECTOR_IMPERIAL,
     RAIN_COLLECTOR_METRIC,
     RAIN_COLLECTOR_METRIC_0_1,
     CONFIG_STATION_MODEL,
     MODEL_VANTAGE_PRO2PLUS,
+    BREAKER_CLOSED,
+    BREAKER_OPEN,
+    BREAKER_HALF_OPEN,
 )
 from .coordinator import DavisVantageDataUpdateCoordinator
 from .utils import make_safe_entity_id
@@ -70,6 +76,23 @@ def get_sensor_descriptions(model: str) -> list[DavisSensorEntityDescription]:
             device_class=SensorDeviceClass.TIMESTAMP,
             entity_category=EntityCategory.DIAGNOSTIC,
         ),
+        DavisSensorEntityDescription(
+            key="BreakerState",
+            translation_key="breaker_state",
+            entity_name="Connection State",
+            icon="mdi:lan-disconnect",
+            device_class=SensorDeviceClass.ENUM,
+            options=[BREAKER_CLOSED, BREAKER_OPEN, BREAKER_HALF_OPEN],
+            entity_category=EntityCategory.DIAGNOSTIC,
+        ),
+        DavisSensorEntityDescription(
+            key="NextProbeTime",
+            translation_key="next_probe_time",
+            entity_name="Next Probe Time",
+            icon="mdi:clock-outline",
+            device_class=SensorDeviceClass.TIMESTAMP,
+            entity_category=EntityCategory.DIAGNOSTIC,
+        ),
         DavisSensorEntityDescription(
             key="LastErrorTime",
             translation_key="last_error_time",
@@ -174,6 +197,17 @@ def get_sensor_descriptions(model: str) -> list[DavisSensorEntityDescription]:
             native_unit_of_measurement=UnitOfTemperature.FAHRENHEIT,
             suggested_display_precision=1,
         ),
+        DavisSensorEntityDescription(
+            key="THSW",
+            translation_key="thsw_index",
+            entity_name="THSW Index",
+            icon="mdi:sun-thermometer-outline",
+            device_class=SensorDeviceClass.TEMPERATURE,
+            state_class=SensorStateClass.MEASUREMENT,
+            native_unit_of_measurement=UnitOfTemperature.FAHRENHEIT,
+            suggested_display_precision=0,
+            entity_registry_enabled_default=False,
+        ),
         DavisSensorEntityDescription(
             key="DewPoint",
             translation_key="dew_point",
@@ -306,6 +340,17 @@ def get_sensor_descriptions(model: str) -> list[DavisSensorEntityDescription]:
             native_unit_of_measurement=UnitOfSpeed.MILES_PER_HOUR,
             suggested_display_precision=1,
         ),
+        DavisSensorEntityDescription(
+            key="WindSpeed2Min",
+            translation_key="wind_speed_average_2min",
+            entity_name="Wind Speed (2 min. Average)",
+            icon="mdi:weather-windy",
+            device_class=SensorDeviceClass.WIND_SPEED,
+            state_class=SensorStateClass.MEASUREMENT,
+            native_unit_of_measurement=UnitOfSpeed.MILES_PER_HOUR,
+            suggested_display_precision=1,
+            entity_registry_enabled_default=False,
+        ),
         DavisSensorEntityDescription(
             key="WindSpeedAvg",
             translation_key="wind_speed_average",
@@ -557,31 +602,6 @@ def get_sensor_descriptions(model: str) -> list[DavisSensorEntityDescription]:
             icon="mdi:calendar-outline",
             device_class=SensorDeviceClass.DATE,
         ),
-        *[
-            DavisSensorEntityDescription(
-                key=f"ExtraTemps0{probe}",
-                translation_key=f"extra_temperature_{probe}",
-                entity_name=f"Extra Temperature {probe}",
-                native_unit_of_measurement=UnitOfTemperature.FAHRENHEIT,
-                device_class=SensorDeviceClass.TEMPERATURE,
-                state_class=SensorStateClass.MEASUREMENT,
-                entity_registry_enabled_default=False,
-                suggested_display_precision=1,
-            )
-            for probe in range(1, 8)
-        ],
-        *[
-            DavisSensorEntityDescription(
-                key=f"HumExtra0{probe}",
-                translation_key=f"extra_humidity_{probe}",
-                entity_name=f"Extra Humidity {probe}",
-                device_class=SensorDeviceClass.HUMIDITY,
-                native_unit_of_measurement=PERCENTAGE,
-                suggested_display_precision=0,
-                entity_registry_enabled_default=False,
-            )
-            for probe in range(1, 8)
-        ],
         DavisSensorEntityDescription(
             key="Latitude",
             translation_key="latitude",
@@ -620,6 +640,120 @@ def get_sensor_descriptions(model: str) -> list[DavisSensorEntityDescription]:
             suggested_display_precision=1,
             entity_registry_enabled_default=False,
         ),
+        DavisSensorEntityDescription(
+            key="PollInterval",
+            translation_key="poll_interval",
+            entity_name="Poll Interval",
+            icon="mdi:timer-sync-outline",
+            state_class=SensorStateClass.MEASUREMENT,
+            entity_category=EntityCategory.DIAGNOSTIC,
+            native_unit_of_measurement=UnitOfTime.SECONDS,
+            suggested_display_precision=0,
+            entity_registry_enabled_default=False,
+        ),
+        DavisSensorEntityDescription(
+            key="LoopDataAge",
+            translation_key="loop_data_age",
+            entity_name="LOOP Data Age",
+            icon="mdi:clock-time-four-outline",
+            state_class=SensorStateClass.MEASUREMENT,
+            entity_category=EntityCategory.DIAGNOSTIC,
+            native_unit_of_measurement=UnitOfTime.SECONDS,
+            suggested_display_precision=0,
+            entity_registry_enabled_default=False,
+        ),
+        DavisSensorEntityDescription(
+            key="HilowsDataAge",
+            translation_key="hilows_data_age",
+            entity_name="Highs/Lows Data Age",
+            icon="mdi:clock-time-four-outline",
+            state_class=SensorStateClass.MEASUREMENT,
+            entity_category=EntityCategory.DIAGNOSTIC,
+            native_unit_of_measurement=UnitOfTime.SECONDS,
+            suggested_display_precision=0,
+            entity_registry_enabled_default=False,
+        ),
+        DavisSensorEntityDescription(
+            key="ArchiveDataAge",
+            translation_key="archive_data_age",
+            entity_name="Archive Data Age",
+            icon="mdi:clock-time-four-outline",
+            state_class=SensorStateClass.MEASUREMENT,
+            entity_category=EntityCategory.DIAGNOSTIC,
+            native_unit_of_measurement=UnitOfTime.SECONDS,
+            suggested_display_precision=0,
+            entity_registry_enabled_default=False,
+        ),
+        DavisSensorEntityDescription(
+            key="CommandQueueDepth",
+            translation_key="command_queue_depth",
+            entity_name="Command Queue Depth",
+            icon="mdi:tray-full",
+            state_class=SensorStateClass.MEASUREMENT,
+            entity_category=EntityCategory.DIAGNOSTIC,
+            entity_registry_enabled_default=False,
+        ),
+        DavisSensorEntityDescription(
+            key="CommandQueueWait",
+            translation_key="command_queue_wait",
+            entity_name="Command Queue Wait Time",
+            icon="mdi:timer-sand",
+            state_class=SensorStateClass.MEASUREMENT,
+            entity_category=EntityCategory.DIAGNOSTIC,
+            native_unit_of_measurement=UnitOfTime.SECONDS,
+            suggested_display_precision=2,
+            entity_registry_enabled_default=False,
+        ),
+        DavisSensorEntityDescription(
+            key="ReadoutRetries",
+            translation_key="readout_retries",
+            entity_name="Readout Retries",
+            icon="mdi:reload-alert",
+            state_class=SensorStateClass.MEASUREMENT,
+            entity_category=EntityCategory.DIAGNOSTIC,
+            entity_registry_enabled_default=False,
+        ),
+        DavisSensorEntityDescription(
+            key="CrcErrors",
+            translation_key="crc_errors",
+            entity_name="CRC Errors",
+            icon="mdi:alert-circle-check-outline",
+            state_class=SensorStateClass.TOTAL_INCREASING,
+            entity_category=EntityCategory.DIAGNOSTIC,
+            entity_registry_enabled_default=False,
+        ),
+        DavisSensorEntityDescription(
+            key="CrcErrorRate",
+            translation_key="crc_error_rate",
+            entity_name="CRC Error Rate",
+            icon="mdi:alert-circle-check-outline",
+            state_class=SensorStateClass.MEASUREMENT,
+            entity_category=EntityCategory.DIAGNOSTIC,
+            native_unit_of_measurement=PERCENTAGE,
+            suggested_display_precision=1,
+            entity_registry_enabled_default=False,
+        ),
+        DavisSensorEntityDescription(
+            key="IOWorkerUtilization",
+            translation_key="io_worker_utilization",
+            entity_name="I/O Worker Utilization",
+            icon="mdi:cogs",
+            state_class=SensorStateClass.MEASUREMENT,
+            entity_category=EntityCategory.DIAGNOSTIC,
+            native_unit_of_measurement=PERCENTAGE,
+            suggested_display_precision=1,
+            entity_registry_enabled_default=False,
+        ),
+        DavisSensorEntityDescription(
+            key="ArchiveDownloadProgress",
+            translation_key="archive_download_progress",
+            entity_name="Archive Download Progress",
+            icon="mdi:archive-arrow-down-outline",
+            entity_category=EntityCategory.DIAGNOSTIC,
+            native_unit_of_measurement=PERCENTAGE,
+            suggested_display_precision=0,
+            entity_registry_enabled_default=False,
+        ),
         DavisSensorEntityDescription(
             key="SunRise",
             translation_key="sunrise",
@@ -636,6 +770,82 @@ def get_sensor_descriptions(model: str) -> list[DavisSensorEntityDescription]:
         ),
     ]
 
+def get_transmitter_descriptions() -> list[DavisSensorEntityDescription]:
+    """Return the sensor descriptions of the extra, soil and leaf sensors."""
+    return [
+        *[
+            DavisSensorEntityDescription(
+                key=f"ExtraTemps0{probe}",
+                translation_key=f"extra_temperature_{probe}",
+                entity_name=f"Extra Temperature {probe}",
+                native_unit_of_measurement=UnitOfTemperature.FAHRENHEIT,
+                device_class=SensorDeviceClass.TEMPERATURE,
+                state_class=SensorStateClass.MEASUREMENT,
+                suggested_display_precision=1,
+            )
+            for probe in range(1, 8)
+        ],
+        *[
+            DavisSensorEntityDescription(
+                key=f"HumExtra0{probe}",
+                translation_key=f"extra_humidity_{probe}",
+                entity_name=f"Extra Humidity {probe}",
+                device_class=SensorDeviceClass.HUMIDITY,
+                state_class=SensorStateClass.MEASUREMENT,
+                native_unit_of_measurement=PERCENTAGE,
+                suggested_display_precision=0,
+            )
+            for probe in range(1, 8)
+        ],
+        *[
+            DavisSensorEntityDescription(
+                key=f"SoilTemps0{probe}",
+                translation_key=f"soil_temperature_{probe}",
+                entity_name=f"Soil Temperature {probe}",
+                native_unit_of_measurement=UnitOfTemperature.FAHRENHEIT,
+                device_class=SensorDeviceClass.TEMPERATURE,
+                state_class=SensorStateClass.MEASUREMENT,
+                suggested_display_precision=1,
+            )
+            for probe in range(1, 5)
+        ],
+        *[
+            DavisSensorEntityDescription(
+                key=f"SoilMoist0{probe}",
+                translation_key=f"soil_moisture_{probe}",
+                entity_name=f"Soil Moisture {probe}",
+                icon="mdi:water-outline",
+                state_class=SensorStateClass.MEASUREMENT,
+                native_unit_of_measurement=UnitOfPressure.CBAR,
+                suggested_display_precision=0,
+            )
+            for probe in range(1, 5)
+        ],
+        *[
+            DavisSensorEntityDescription(
+                key=f"LeafTemps0{probe}",
+                translation_key=f"leaf_temperature_{probe}",
+                entity_name=f"Leaf Temperature {probe}",
+                native_unit_of_measurement=UnitOfTemperature.FAHRENHEIT,
+                device_class=SensorDeviceClass.TEMPERATURE,
+                state_class=SensorStateClass.MEASUREMENT,
+                suggested_display_precision=1,
+            )
+            for probe in range(1, 5)
+        ],
+        *[
+            DavisSensorEntityDescription(
+                key=f"LeafWetness0{probe}",
+                translation_key=f"leaf_wetness_{probe}",
+                entity_name=f"Leaf Wetness {probe}",
+                icon="mdi:leaf",
+                state_class=SensorStateClass.MEASUREMENT,
+                suggested_display_precision=0,
+            )
+            for probe in range(1, 5)
+        ],
+    ]
+
 async def async_setup_entry(
     _,
     config_entry: DavisConfigEntry,
@@ -655,6 +865,12 @@ async def async_setup_entry(
             if entity_registry.async_get(old_entity_id):
                 entity_registry.async_update_entity(old_entity_id, new_entity_id=new_entity_id)
 
+    transmitter_descriptions = {
+        description.key: description for description in get_transmitter_descriptions()
+    }
+    for description in sensor_descriptions + list(transmitter_descriptions.values()):
+        coordinator.set_deadband(description.key, description.device_class)
+
     entities = [
         DavisVantageSensor(
             coordinator=coordinator,
@@ -665,6 +881,63 @@ async def async_setup_entry(
     ]
     async_add_entities(entities)
 
+    # The extra, soil and leaf sensors are added once the station reports
+    # them, or right away when they were added before. A sensor that no
+    # longer reports stays, unavailable until it reports again.
+    entities: dict[str, DavisTransmitterSensor] = {}
+    reporting: set[str] = set()
+
+    @callback
+    def async_add_transmitters(keys: Iterable[str]) -> None:
+        new_entities = [
+            DavisTransmitterSensor(
+                coordinator=coordinator,
+                entry_id=config_entry.entry_id,
+                description=transmitter_descriptions[key],
+            )
+            for key in keys
+            if key not in entities
+        ]
+        entities.update(
+            (entity.entity_description.key, entity) for entity in new_entities
+        )
+        if new_entities:
+            async_add_entities(new_entities)
+
+    @callback
+    def async_update_transmitters(keys: Iterable[str]) -> None:
+        keys = set(keys)
+        for key in reporting ^ keys:
+            entity = entities.get(key)
+            if entity is None or entity.hass is None:
+                continue
+            if key in keys:
+                _LOGGER.info("%s reports again", entity.entity_id)
+            else:
+                _LOGGER.info("%s no longer reports", entity.entity_id)
+            entity.async_write_ha_state()
+        reporting.clear()
+        reporting.update(keys)
+        async_add_transmitters(keys)
+
+    known_keys = {
+        key
+        for key, description in transmitter_descriptions.items()
+        if entity_registry.async_get_entity_id(
+            SENSOR_DOMAIN, DOMAIN, get_unique_id(config_entry.entry_id, description)
+        )
+    }
+    reporting.update(known_keys)
+    async_add_transmitters(known_keys)
+    if coordinator.client.transmitters_scanned:
+        async_update_transmitters(coordinator.client.transmitter_keys)
+    config_entry.async_on_unload(
+        coordinator.client.async_add_transmitter_listener(async_update_transmitters)
+    )
+
+def get_unique_id(entry_id: str, description: DavisSensorEntityDescription) -> str:
+    return f"{entry_id}-{DEFAULT_NAME} {description.entity_name}"
+
 class DavisVantageSensor(CoordinatorEntity[DavisVantageDataUpdateCoordinator], SensorEntity):
     """Defines a Davis Vantage sensor."""
 
@@ -677,13 +950,30 @@ class DavisVantageSensor(CoordinatorEntity[DavisVantageDataUpdateCoordinator], S
         description: DavisSensorEntityDescription,
     ) -> None:
         """Initialize Davis Vantage sensor."""
-        super().__init__(coordinator=coordinator)
+        super().__init__(coordinator=coordinator, context=description.key)
         self.entity_description = description
-        self.entity_id = make_safe_entity_id(f"{SENSOR_DOMAIN}.{DEFAULT_NAME} {description.entity_name}")
-        self._attr_unique_id = f"{entry_id}-{DEFAULT_NAME} {description.entity_name}"
+        # The entry title is the device name, Davis Vantage for the first station
+        self.entity_id = make_safe_entity_id(
+            f"{SENSOR_DOMAIN}.{coordinator.config_entry.title} {description.entity_name}"
+        )
+        self._attr_unique_id = get_unique_id(entry_id, description)
         self._attr_device_info = coordinator.device_info
 
     @property
     def native_value(self) -> StateType:  # type: ignore
         """Return the state of the sensor."""
         return self.coordinator.data.get(self.entity_description.key)
+
+class DavisTransmitterSensor(DavisVantageSensor):
+    """Defines a Davis Vantage extra, soil or leaf sensor.
+
+    It is unavailable while the station doesn't report it.
+    """
+
+    @property
+    def available(self) -> bool:
+        client = self.coordinator.client
+        return super().available and (
+            not client.transmitters_scanned
+            or self.entity_description.key in client.transmitter_keys
+        )
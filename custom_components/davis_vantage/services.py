@@ -1,12 +1,16 @@
 """Global services file."""
 
+from datetime import datetime
 from typing import Any
 from zoneinfo import ZoneInfo
 
 import voluptuous as vol
 
-from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import ATTR_DEVICE_ID
 from homeassistant.core import HomeAssistant, ServiceCall, SupportsResponse
+from homeassistant.exceptions import ServiceValidationError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.device_registry import async_get as async_get_device_registry
 from pyvantagepro.utils import bytes_to_hex  # type: ignore
 
 from .const import (
@@ -18,20 +22,29 @@ from .const import (
     SERVICE_SET_ARCHIVE_PERIOD,
     SERVICE_SET_RAIN_COLLECTOR,
     SERVICE_GET_INFO,
+    SERVICE_GET_ARCHIVE,
+    SERVICE_DOWNLOAD_ARCHIVE,
     RAIN_COLLECTOR_IMPERIAL,
     RAIN_COLLECTOR_METRIC,
     RAIN_COLLECTOR_METRIC_0_1,
 )
-from .coordinator import DataUpdateCoordinator
+from .client import DavisVantageClient
 from .utils import convert_to_iso_datetime
 
-SET_YEARLY_RAIN_SERVICE_SCHEMA = vol.Schema(
+# Every service is for one weather station, selected by its device
+STATION_SERVICE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_DEVICE_ID): cv.string,
+    }
+)
+
+SET_YEARLY_RAIN_SERVICE_SCHEMA = STATION_SERVICE_SCHEMA.extend(
     {
         vol.Required("rain_clicks"): int
     }
 )
 
-SET_ARCHIVE_PERIOD_SERVICE_SCHEMA = vol.Schema(
+SET_ARCHIVE_PERIOD_SERVICE_SCHEMA = STATION_SERVICE_SCHEMA.extend(
     {
         vol.Required("archive_period"): vol.In(
             ["1", "5", "10", "15", "30", "60", "120"]
@@ -39,7 +52,7 @@ SET_ARCHIVE_PERIOD_SERVICE_SCHEMA = vol.Schema(
     }
 )
 
-SET_RAIN_COLLECTOR_SERVICE_SCHEMA = vol.Schema(
+SET_RAIN_COLLECTOR_SERVICE_SCHEMA = STATION_SERVICE_SCHEMA.extend(
     {
         vol.Required("rain_collector"): vol.In(
             [
@@ -51,28 +64,65 @@ SET_RAIN_COLLECTOR_SERVICE_SCHEMA = vol.Schema(
     }
 )
 
+GET_ARCHIVE_SERVICE_SCHEMA = STATION_SERVICE_SCHEMA.extend(
+    {
+        vol.Optional("start"): cv.datetime,
+        vol.Optional("end"): cv.datetime,
+        vol.Optional("limit", default=288): vol.All(int, vol.Range(min=1, max=2560)),
+    }
+)
+
+DOWNLOAD_ARCHIVE_SERVICE_SCHEMA = STATION_SERVICE_SCHEMA.extend(
+    {
+        vol.Optional("resume", default=True): bool,
+    }
+)
+
 class DavisServicesSetup:
     """Class to handle Integration Services."""
 
-    def __init__(self, hass: HomeAssistant, config_entry: ConfigEntry) -> None:
+    def __init__(self, hass: HomeAssistant) -> None:
         """Initialise services."""
         self.hass = hass
-        self.config_entry = config_entry
-        self.coordinator: DataUpdateCoordinator = config_entry.runtime_data.coordinator
 
         self.setup_services()
 
+    def get_client(self, call: ServiceCall) -> DavisVantageClient:
+        """Return the client of the weather station the call is for.
+
+        The device can be left out when only one weather station is set up.
+        """
+        entries = self.hass.config_entries.async_loaded_entries(DOMAIN)
+        device_id = call.data.get(ATTR_DEVICE_ID)
+        if device_id is not None:
+            device = async_get_device_registry(self.hass).async_get(device_id)
+            entries = [
+                entry
+                for entry in entries
+                if device is not None and entry.entry_id in device.config_entries
+            ]
+        elif len(entries) > 1:
+            raise ServiceValidationError(
+                "Multiple weather stations are set up, select the device to use"
+            )
+        if not entries:
+            raise ServiceValidationError("Weather station not found or not loaded")
+        return entries[0].runtime_data.coordinator.client
+
     def setup_services(self):
         """Initialise the services in Hass."""
         self.hass.services.async_register(
             DOMAIN,
             SERVICE_SET_DAVIS_TIME,
-            self.set_davis_time)
+            self.set_davis_time,
+            schema=STATION_SERVICE_SCHEMA,
+        )
 
         self.hass.services.async_register(
             DOMAIN,
             SERVICE_GET_DAVIS_TIME,
             self.get_davis_time,
+            schema=STATION_SERVICE_SCHEMA,
             supports_response=SupportsResponse.ONLY,
         )
 
@@ -80,6 +130,7 @@ class DavisServicesSetup:
             DOMAIN,
             SERVICE_GET_RAW_DATA,
             self.get_raw_data,
+            schema=STATION_SERVICE_SCHEMA,
             supports_response=SupportsResponse.ONLY,
         )
 
@@ -87,6 +138,7 @@ class DavisServicesSetup:
             DOMAIN,
             SERVICE_GET_INFO,
             self.get_info,
+            schema=STATION_SERVICE_SCHEMA,
             supports_response=SupportsResponse.ONLY
         )
 
@@ -111,14 +163,29 @@ class DavisServicesSetup:
             schema=SET_RAIN_COLLECTOR_SERVICE_SCHEMA,
         )
 
-    async def set_davis_time(self, _: ServiceCall) -> None:
+        self.hass.services.async_register(
+            DOMAIN,
+            SERVICE_GET_ARCHIVE,
+            self.get_archive,
+            schema=GET_ARCHIVE_SERVICE_SCHEMA,
+            supports_response=SupportsResponse.ONLY,
+        )
+
+        self.hass.services.async_register(
+            DOMAIN,
+            SERVICE_DOWNLOAD_ARCHIVE,
+            self.download_archive,
+            schema=DOWNLOAD_ARCHIVE_SERVICE_SCHEMA,
+        )
+
+    async def set_davis_time(self, call: ServiceCall) -> None:
         """Set Davis Time service"""
-        client = self.config_entry.runtime_data.coordinator.client
+        client = self.get_client(call)
         await client.async_set_davis_time()
 
-    async def get_davis_time(self, _: ServiceCall) -> dict[str, Any]:
+    async def get_davis_time(self, call: ServiceCall) -> dict[str, Any]:
         """Get Davis Time service"""
-        client = self.config_entry.runtime_data.coordinator.client
+        client = self.get_client(call)
         davis_time = await client.async_get_davis_time()
         if davis_time is not None:
             return {
@@ -129,11 +196,10 @@ class DavisServicesSetup:
         else:
             return {"error": "Couldn't get davis time, please try again later"}
 
-    async def get_raw_data(self, _: ServiceCall) -> dict[str, Any]:
+    async def get_raw_data(self, call: ServiceCall) -> dict[str, Any]:
         """Get Raw Data service"""
-        client = self.config_entry.runtime_data.coordinator.client
-        raw_data = client.get_raw_data()
-        raw_data.update(client.get_raw_hilows())
+        client = self.get_client(call)
+        raw_data = {**client.get_raw_data(), **client.get_raw_hilows()}
         data: dict[str, Any] = {}
         for key in raw_data:  # type: ignore
             value = raw_data[key]  # type: ignore
@@ -141,11 +207,12 @@ class DavisServicesSetup:
                 data[key] = bytes_to_hex(value)
             else:
                 data[key] = value
+        data["InvalidFields"] = client.get_invalid_fields()
         return data
 
-    async def get_info(self, _: ServiceCall) -> dict[str, Any]:
+    async def get_info(self, call: ServiceCall) -> dict[str, Any]:
         """Get Info service"""
-        client = self.config_entry.runtime_data.coordinator.client
+        client = self.get_client(call)
         info = await client.async_get_info()
         if info is not None:
             return info
@@ -156,16 +223,50 @@ class DavisServicesSetup:
 
     async def set_yearly_rain(self, call: ServiceCall) -> None:
         """Set Yearly Rain service"""
-        client = self.config_entry.runtime_data.coordinator.client
+        client = self.get_client(call)
         await client.async_set_yearly_rain(call.data["rain_clicks"])
 
     async def set_archive_period(self, call: ServiceCall) -> None:
         """Set Archive Period service"""
-        client = self.config_entry.runtime_data.coordinator.client
+        client = self.get_client(call)
         await client.async_set_archive_period(call.data["archive_period"])
-        client.clear_cached_property("archive_period")
 
     async def set_rain_collector(self, call: ServiceCall) -> None:
         """Set Rain Collector service"""
-        client = self.config_entry.runtime_data.coordinator.client
+        client = self.get_client(call)
         await client.async_set_rain_collector(call.data["rain_collector"])
+
+    async def get_archive(self, call: ServiceCall) -> dict[str, Any]:
+        """Get Archive service, served from the local archive store"""
+        client = self.get_client(call)
+        if client.archive_store is None:
+            return {"error": "The local archive store is not available"}
+        time_zone = ZoneInfo(self.hass.config.time_zone)
+
+        def to_console_time(value: datetime | None) -> datetime | None:
+            if value is None or value.tzinfo is None:
+                return value
+            return value.astimezone(time_zone).replace(tzinfo=None)
+
+        records = await client.archive_store.async_get_records(
+            to_console_time(call.data.get("start")),
+            to_console_time(call.data.get("end")),
+            call.data["limit"],
+        )
+        return {
+            "records": [
+                {
+                    key: convert_to_iso_datetime(value, time_zone)
+                    if key == "Datetime"
+                    else value
+                    for key, value in record.items()
+                    if key != "raw_datestamp"
+                }
+                for record in records
+            ]
+        }
+
+    async def download_archive(self, call: ServiceCall) -> None:
+        """Download Archive service, runs in the background"""
+        client = self.get_client(call)
+        client.start_archive_download(call.data["resume"])
@@ -0,0 +1,384 @@
+"""Import of console archive records into the long-term statistics."""
+
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timedelta, UTC
+from functools import partial
+import logging
+from typing import Callable
+from zoneinfo import ZoneInfo
+
+from pyvantagepro.parser import ArchiveDataParserRevB
+from pyvantagepro.utils import ListDict
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import StatisticData
+from homeassistant.components.recorder.statistics import (
+    UNIT_CLASS_TO_UNIT_CONVERTER,
+    async_import_statistics,
+    get_metadata,
+    statistics_during_period,
+)
+from homeassistant.components.sensor import DOMAIN as SENSOR_DOMAIN
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import (
+    PERCENTAGE,
+    UnitOfPressure,
+    UnitOfSpeed,
+    UnitOfTemperature,
+    UnitOfVolumetricFlux,
+)
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_registry import async_get as async_get_entity_registry
+
+from .archive_store import ArchiveStore
+from .client import DavisVantageClient
+from .const import (
+    DEFAULT_NAME,
+    DOMAIN,
+    RAIN_COLLECTOR_FACTOR,
+    STATISTICS_IMPORT_STATE,
+    STATISTICS_IMPORT_BATCH,
+)
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+
+@dataclass(frozen=True)
+class ArchiveStatistic:
+    """Hourly statistic taken from the archive records.
+
+    The name is the entity name of the sensor the statistic belongs to.
+    """
+
+    key: str
+    name: str
+    unit: str
+    unit_class: str | None
+    value: Callable[[ArchiveDataParserRevB, float], float | None]
+    low: Callable[[ArchiveDataParserRevB, float], float | None]
+    high: Callable[[ArchiveDataParserRevB, float], float | None]
+
+
+def _temperature(value: float) -> float | None:
+    return None if abs(value) >= 3276.7 else value
+
+
+def _humidity(value: int) -> float | None:
+    return None if value == 255 else value
+
+
+def _barometer(value: float) -> float | None:
+    return value or None
+
+
+def _wind(value: int) -> float | None:
+    return None if value == 255 else value
+
+
+def _rain_rate(record: ArchiveDataParserRevB, hours: float) -> float | None:
+    # 'RainRate' holds the rain clicks of the archive period / 100
+    return record["RainRate"] / hours if hours else None
+
+
+ARCHIVE_STATISTICS = (
+    ArchiveStatistic(
+        "temperature",
+        "Temperature",
+        UnitOfTemperature.FAHRENHEIT,
+        "temperature",
+        lambda r, _: _temperature(r["TempOut"]),
+        lambda r, _: _temperature(r["TempOutLow"]),
+        lambda r, _: _temperature(r["TempOutHi"]),
+    ),
+    ArchiveStatistic(
+        "humidity",
+        "Humidity",
+        PERCENTAGE,
+        None,
+        lambda r, _: _humidity(r["HumOut"]),
+        lambda r, _: _humidity(r["HumOut"]),
+        lambda r, _: _humidity(r["HumOut"]),
+    ),
+    ArchiveStatistic(
+        "barometric_pressure",
+        "Barometric Pressure",
+        UnitOfPressure.INHG,
+        "pressure",
+        lambda r, _: _barometer(r["Barometer"]),
+        lambda r, _: _barometer(r["Barometer"]),
+        lambda r, _: _barometer(r["Barometer"]),
+    ),
+    ArchiveStatistic(
+        "wind_speed",
+        "Wind Speed",
+        UnitOfSpeed.MILES_PER_HOUR,
+        "speed",
+        lambda r, _: _wind(r["WindAvg"]),
+        lambda r, _: _wind(r["WindAvg"]),
+        lambda r, _: _wind(r["WindHi"]) if _wind(r["WindAvg"]) is not None else None,
+    ),
+    ArchiveStatistic(
+        "rain_rate",
+        "Rain Rate",
+        UnitOfVolumetricFlux.INCHES_PER_HOUR,
+        "speed",
+        _rain_rate,
+        _rain_rate,
+        lambda r, hours: max(r["RainRateHi"], _rain_rate(r, hours) or 0),
+    ),
+)
+
+
+def get_hour_start(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+class ArchiveStatisticsImporter:
+    """Fill the gaps in the long-term statistics of the sensors.
+
+    The hourly statistics compiled from the stored archive records are
+    imported into the statistics of the matching sensor entities, only
+    for the hours Home Assistant has no statistics for, like the hours it
+    wasn't running. Hours Home Assistant may still compile itself, those
+    that ended less than an hour ago, are left for later. An archive
+    record covers the period before its timestamp. The start of the last
+    hour imported is kept in the archive store and the next import
+    continues from there.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        config_entry: ConfigEntry,
+        client: DavisVantageClient,
+        store: ArchiveStore,
+    ) -> None:
+        self._hass = hass
+        self._config_entry = config_entry
+        self._client = client
+        self._store = store
+        self._pending_start: datetime | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def _time_zone(self) -> ZoneInfo:
+        return self._client.time_zone
+
+    def get_statistic_id(self, statistic: ArchiveStatistic) -> str | None:
+        """Return the entity id of the sensor of the statistic, if registered."""
+        return async_get_entity_registry(self._hass).async_get_entity_id(
+            SENSOR_DOMAIN,
+            DOMAIN,
+            f"{self._config_entry.entry_id}-{DEFAULT_NAME} {statistic.name}",
+        )
+
+    def to_utc(self, moment: datetime) -> datetime:
+        """Convert a console timestamp to UTC."""
+        return moment.replace(tzinfo=self._time_zone).astimezone(UTC)
+
+    def to_console_time(self, moment: datetime) -> datetime:
+        return moment.astimezone(self._time_zone).replace(tzinfo=None)
+
+    def get_record_hour(self, record: ArchiveDataParserRevB) -> datetime:
+        """Return the UTC hour the period of the record falls in."""
+        return get_hour_start(self.to_utc(record["Datetime"]) - timedelta(minutes=1))
+
+    def async_handle_archives(self, archives: ListDict) -> None:
+        """Archive listener, imports the hours of the new records."""
+        if not archives:
+            return
+        start = min(self.get_record_hour(record) for record in archives)
+        self.async_schedule_import(start)
+
+    def async_schedule_import(self, start: datetime | None = None) -> None:
+        """Import from start (UTC), or after the last imported hour."""
+        if start is not None and (
+            self._pending_start is None or start < self._pending_start
+        ):
+            self._pending_start = start
+        if self._task is None or self._task.done():
+            self._task = self._hass.async_create_background_task(
+                self.async_import(), f"{DOMAIN} statistics import"
+            )
+
+    async def async_stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def async_import(self) -> None:
+        """Import until no more hours are pending."""
+        while True:
+            state = await self._store.async_get_state(STATISTICS_IMPORT_STATE)
+            start = datetime.fromisoformat(state) if state else None
+            if self._pending_start is not None:
+                start = min(start, self._pending_start) if start else self._pending_start
+            self._pending_start = None
+            try:
+                last_hour = await self._async_import_after(start)
+            except Exception as e:
+                _LOGGER.error("Couldn't import archive statistics: %s", e)
+                return
+            if last_hour is not None and (start is None or last_hour > start):
+                await self._store.async_set_state(
+                    STATISTICS_IMPORT_STATE, last_hour.isoformat()
+                )
+            if self._pending_start is None:
+                return
+
+    async def _async_import_after(self, start: datetime | None) -> datetime | None:
+        """Import the stored records from the UTC hour start onwards.
+
+        The records are read in batches. The records of the last hour of a
+        batch are carried to the next one, as that hour may continue there.
+        Returns the last hour imported.
+        """
+        cursor = self.to_console_time(start) if start else None
+        # The records up to the end of the hours Home Assistant compiled
+        stop = self.to_console_time(
+            get_hour_start(datetime.now(UTC)) - timedelta(hours=1)
+        )
+        carry: list[ArchiveDataParserRevB] = []
+        last_hour = None
+        while True:
+            records = await self._store.async_get_records(
+                cursor, stop, STATISTICS_IMPORT_BATCH
+            )
+            if records:
+                cursor = records[-1]["Datetime"]
+            hours = await self._hass.async_add_executor_job(
+                self._group_by_hour, carry + list(records)
+            )
+            if not hours:
+                break
+            if records:
+                last_hour, carry = hours.pop()
+            else:
+                last_hour = hours[-1][0]
+                carry = []
+            if hours:
+                statistics = await self._hass.async_add_executor_job(
+                    self._compile, hours
+                )
+                await self._async_add_statistics(statistics)
+            if not records:
+                break
+        return last_hour
+
+    def _group_by_hour(
+        self, records: list[ArchiveDataParserRevB]
+    ) -> list[tuple[datetime, list[ArchiveDataParserRevB]]]:
+        hours: list[tuple[datetime, list[ArchiveDataParserRevB]]] = []
+        for record in records:
+            hour = self.get_record_hour(record)
+            if hours and hours[-1][0] == hour:
+                hours[-1][1].append(record)
+            else:
+                hours.append((hour, [record]))
+        return hours
+
+    def _compile(
+        self, hours: list[tuple[datetime, list[ArchiveDataParserRevB]]]
+    ) -> dict[str, list[StatisticData]]:
+        """Compile the mean/min/max of every statistic per hour."""
+        period_hours = (self._client.archive_period or 60) / 60
+        rain_factor = RAIN_COLLECTOR_FACTOR.get(self._client.get_rain_collector(), 1.0)
+        statistics: dict[str, list[StatisticData]] = {}
+        for statistic in ARCHIVE_STATISTICS:
+            factor = rain_factor if statistic.key == "rain_rate" else 1.0
+            rows: list[StatisticData] = []
+            for hour, records in hours:
+                values: list[float] = []
+                lows: list[float] = []
+                highs: list[float] = []
+                for record in records:
+                    value = statistic.value(record, period_hours)
+                    if value is None:
+                        continue
+                    values.append(value * factor)
+                    low = statistic.low(record, period_hours)
+                    high = statistic.high(record, period_hours)
+                    lows.append((value if low is None else low) * factor)
+                    highs.append((value if high is None else high) * factor)
+                if values:
+                    rows.append(
+                        StatisticData(
+                            start=hour,
+                            mean=sum(values) / len(values),
+                            min=min(lows),
+                            max=max(highs),
+                        )
+                    )
+            statistics[statistic.key] = rows
+        return statistics
+
+    async def _async_add_statistics(
+        self, statistics: dict[str, list[StatisticData]]
+    ) -> None:
+        """Import the hours the sensors have no statistics for."""
+        statistic_ids = {
+            statistic.key: statistic_id
+            for statistic in ARCHIVE_STATISTICS
+            if statistics.get(statistic.key)
+            and (statistic_id := self.get_statistic_id(statistic)) is not None
+        }
+        if not statistic_ids:
+            return
+        starts = [row["start"] for rows in statistics.values() for row in rows]
+        recorder = get_instance(self._hass)
+        metadata = await recorder.async_add_executor_job(
+            partial(get_metadata, self._hass, statistic_ids=set(statistic_ids.values()))
+        )
+        existing = await recorder.async_add_executor_job(
+            statistics_during_period,
+            self._hass,
+            min(starts),
+            max(starts) + timedelta(hours=1),
+            set(statistic_ids.values()),
+            "hour",
+            None,
+            {"mean"},
+        )
+        imported = 0
+        for statistic in ARCHIVE_STATISTICS:
+            statistic_id = statistic_ids.get(statistic.key)
+            if statistic_id is None or statistic_id not in metadata:
+                # Sensors without long-term statistics are left alone
+                continue
+            meta = metadata[statistic_id][1]
+            unit = meta["unit_of_measurement"]
+            if unit == statistic.unit:
+                convert = None
+            elif (
+                converter := UNIT_CLASS_TO_UNIT_CONVERTER.get(statistic.unit_class)
+            ) is not None and unit in converter.VALID_UNITS:
+                convert = converter.converter_factory(statistic.unit, unit)
+            else:
+                _LOGGER.debug(
+                    "Can't import archive statistics for %s in %s", statistic_id, unit
+                )
+                continue
+            known = {
+                datetime.fromtimestamp(row["start"], UTC)
+                for row in existing.get(statistic_id, [])
+            }
+            rows = [
+                row
+                if convert is None
+                else StatisticData(
+                    start=row["start"],
+                    mean=convert(row["mean"]),
+                    min=convert(row["min"]),
+                    max=convert(row["max"]),
+                )
+                for row in statistics[statistic.key]
+                if row["start"] not in known
+            ]
+            if rows:
+                async_import_statistics(self._hass, meta, rows)
+                imported = max(imported, len(rows))
+        _LOGGER.debug("Imported archive statistics for %d hours", imported)
@@ -0,0 +1,78 @@
+"""Detection of the extra, soil and leaf sensors reporting to the console."""
+
+import logging
+
+from .decoder import LOOP_DECODER
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+# LOOP byte arrays holding a value per sensor slot
+TRANSMITTER_ARRAYS = (
+    "ExtraTemps",
+    "HumExtra",
+    "SoilTemps",
+    "SoilMoist",
+    "LeafTemps",
+    "LeafWetness",
+)
+TRANSMITTER_KEYS = tuple(
+    key for key in LOOP_DECODER.field_bits if key[:-2] in TRANSMITTER_ARRAYS
+)
+TRANSMITTER_MASK = LOOP_DECODER.mask(*TRANSMITTER_KEYS)
+_TRANSMITTER_DECODER = LOOP_DECODER.select(TRANSMITTER_KEYS)
+
+
+class TransmitterScanner:
+    """Find the sensor slots of the LOOP packet holding valid data.
+
+    Every interval seconds a scan decodes the slots of the next packets
+    LOOP packets, the slots valid in all of them are detected. A detected
+    slot is dropped when it isn't valid in any packet of a scan. Between
+    scans the slots cost nothing.
+    """
+
+    def __init__(self, interval: float, packets: int) -> None:
+        self._interval = interval
+        self._packets = packets
+        self._next_scan = 0.0
+        self._scanned = 0
+        self._valid = TRANSMITTER_MASK
+        self._seen = 0
+        self.keys: frozenset[str] = frozenset()
+        self.done = False
+
+    def add_packet(self, raw: bytes, now: float) -> bool:
+        """Scan a LOOP packet.
+
+        Returns True when the first scan is done or a scan changed the keys.
+        """
+        if now < self._next_scan:
+            return False
+        valid = ~_TRANSMITTER_DECODER.decode(raw).invalid
+        self._valid &= valid
+        self._seen |= valid
+        self._scanned += 1
+        if self._scanned < self._packets:
+            return False
+        keys = frozenset(
+            key
+            for key in TRANSMITTER_KEYS
+            if self._valid & LOOP_DECODER.field_bits[key]
+            or (key in self.keys and self._seen & LOOP_DECODER.field_bits[key])
+        )
+        self._next_scan = now + self._interval
+        self._scanned = 0
+        self._valid = TRANSMITTER_MASK
+        self._seen = 0
+        first = not self.done
+        self.done = True
+        if keys == self.keys:
+            return first
+        if new_keys := keys - self.keys:
+            _LOGGER.info("Detected extra sensors: %s", ", ".join(sorted(new_keys)))
+        if lost_keys := self.keys - keys:
+            _LOGGER.info(
+                "Extra sensors no longer reporting: %s", ", ".join(sorted(lost_keys))
+            )
+        self.keys = keys
+        return True
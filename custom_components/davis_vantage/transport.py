@@ -0,0 +1,235 @@
+"""Asyncio links to the weather station."""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+import asyncio
+import logging
+
+from pyvantagepro.link import Link, link_from_url
+
+try:
+    from serial_asyncio_fast import open_serial_connection
+except ImportError:
+    open_serial_connection = None
+
+from homeassistant.core import HomeAssistant
+
+from .workers import StationWorkers
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+MAX_READ_SIZE = 4096
+
+
+class AsyncLink(ABC):
+    """Base class for a link to the weather station."""
+
+    url: str = ""
+    # The console replies of commands sent back-to-back arrive intact
+    pipelining: bool = False
+
+    @property
+    @abstractmethod
+    def is_open(self) -> bool: ...
+
+    @abstractmethod
+    async def open(self) -> None: ...
+
+    @abstractmethod
+    async def close(self) -> None: ...
+
+    @abstractmethod
+    async def write(self, data: bytes) -> None: ...
+
+    @abstractmethod
+    async def read(self, size: int, timeout: float) -> bytes:
+        """Read size bytes, or less when the timeout expires."""
+
+    async def flush(self, timeout: float = 0.2) -> bytes:
+        """Read and return everything that arrives within the timeout."""
+        return await self.read(MAX_READ_SIZE, timeout)
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {self.url}>"
+
+
+class StreamLink(AsyncLink):
+    """Link based on asyncio streams."""
+
+    def __init__(self) -> None:
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._writer is not None
+
+    @abstractmethod
+    async def _async_connect(
+        self,
+    ) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]: ...
+
+    async def open(self) -> None:
+        if self._writer is None:
+            self._reader, self._writer = await self._async_connect()
+            _LOGGER.debug("New %s was initialized", self)
+
+    async def close(self) -> None:
+        if self._writer is None:
+            return
+        writer = self._writer
+        self._reader = self._writer = None
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except Exception:  # pylint: disable=broad-except
+            pass
+        _LOGGER.debug("Connection %s was closed", self)
+
+    async def write(self, data: bytes) -> None:
+        await self.open()
+        assert self._writer is not None
+        self._writer.write(data)
+        await self._writer.drain()
+
+    async def read(self, size: int, timeout: float) -> bytes:
+        await self.open()
+        assert self._reader is not None
+        data = bytearray()
+        try:
+            async with asyncio.timeout(timeout):
+                while len(data) < size:
+                    chunk = await self._reader.read(size - len(data))
+                    if not chunk:
+                        await self.close()
+                        raise ConnectionError(f"Connection {self} closed by peer")
+                    data += chunk
+        except TimeoutError:
+            pass
+        return bytes(data)
+
+
+class TCPLink(StreamLink):
+    """TCP link, like a WeatherLinkIP or a serial to network bridge."""
+
+    pipelining = True
+
+    def __init__(self, host: str, port: int) -> None:
+        super().__init__()
+        self.host = host
+        self.port = port
+        self.url = f"tcp:{host}:{port}"
+
+    async def _async_connect(
+        self,
+    ) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        return await asyncio.open_connection(self.host, self.port)
+
+
+class SerialLink(StreamLink):
+    """Serial link, like a WeatherLink USB or SER."""
+
+    def __init__(
+        self,
+        port: str,
+        baudrate: int = 19200,
+        bytesize: int = 8,
+        parity: str = "N",
+        stopbits: int = 1,
+    ) -> None:
+        super().__init__()
+        self.port = port
+        self.baudrate = baudrate
+        self.bytesize = bytesize
+        self.parity = parity
+        self.stopbits = stopbits
+        self.url = f"serial:{port}:{baudrate}:{bytesize}{parity}{stopbits}"
+
+    async def _async_connect(
+        self,
+    ) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        return await open_serial_connection(  # type: ignore
+            url=self.port,
+            baudrate=self.baudrate,
+            bytesize=self.bytesize,
+            parity=self.parity,
+            stopbits=self.stopbits,
+        )
+
+
+class BlockingLink(AsyncLink):
+    """Fallback running a blocking pyvantagepro link in an executor.
+
+    With the station's I/O workers, a slow link only holds up one worker.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, url: str, workers: StationWorkers | None = None
+    ) -> None:
+        self._hass = hass
+        self._link: Link | None = None
+        self._workers = workers
+        self.url = url
+
+    @property
+    def is_open(self) -> bool:
+        return self._link is not None
+
+    async def _run(self, func, *args):  # type: ignore
+        if self._workers is not None:
+            return await self._workers.async_run(func, *args)
+        return await self._hass.async_add_executor_job(func, *args)
+
+    def _open(self) -> Link:
+        link = link_from_url(self.url)
+        link.settimeout(1)
+        link.open()
+        return link
+
+    async def open(self) -> None:
+        if self._link is None:
+            self._link = await self._run(self._open)
+
+    async def close(self) -> None:
+        if self._link is not None:
+            link = self._link
+            self._link = None
+            await self._run(link.close)
+
+    async def write(self, data: bytes) -> None:
+        await self.open()
+        await self._run(self._link.write, data)  # type: ignore
+
+    async def read(self, size: int, timeout: float) -> bytes:
+        await self.open()
+        return await self._run(self._read, size, timeout)
+
+    def _read(self, size: int, timeout: float) -> bytes:
+        # pyvantagepro multiplies the timeout with the link timeout of 1 s
+        return self._link.read(size, timeout=timeout, binary=True)  # type: ignore
+
+
+def async_link_from_url(
+    hass: HomeAssistant, url: str, workers: StationWorkers | None = None
+) -> AsyncLink:
+    """Return the link for a pyvantagepro style url.
+
+    Serial links fall back to a blocking link when serial_asyncio_fast is
+    not available.
+    """
+    args = url.split(":")
+    mode = args[0].lower()
+    if mode == "tcp" and len(args) == 3:
+        return TCPLink(args[1], int(args[2]))
+    if mode == "serial" and len(args) >= 2:
+        if open_serial_connection is None:
+            return BlockingLink(hass, url, workers)
+        if len(args) == 2:
+            return SerialLink(args[1])
+        if len(args) == 3:
+            return SerialLink(args[1], int(args[2]))
+        return SerialLink(
+            args[1], int(args[2]), int(args[3][0]), args[3][1], int(args[3][2])
+        )
+    raise ValueError(f"Bad url link specified: {url}")
@@ -2,7 +2,6 @@ import math
 from datetime import datetime
 import re
 from zoneinfo import ZoneInfo
-from typing import Any
 
 def convert_to_celcius(value: float) -> float:
     return round((value - 32.0) * (5.0/9.0), 1)
@@ -56,13 +55,6 @@ def convert_ms_to_bft(windspeed: float) -> int:
 def convert_kmh_to_bft(windspeed_kmh: float) -> int:
     return convert_ms_to_bft(convert_kmh_to_ms(windspeed_kmh))
 
-def contains_correct_raw_data(raw_data: dict[str, Any]) -> None:
-    return raw_data['TempOut'] != 32767 \
-        and raw_data['RainRate'] != 32767 \
-        and raw_data['WindSpeed'] != 255 \
-        and raw_data['HumOut'] != 255 \
-        and raw_data['WindSpeed10Min'] != 255
-
 def calc_heat_index(temperature_f: float, humidity: float) -> float:
     if temperature_f < 80.0 or humidity < 40.0:
         return temperature_f
@@ -0,0 +1,139 @@
+"""Worker threads shared by the blocking I/O of all weather stations."""
+
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+import time
+from typing import Any, Callable
+
+from homeassistant.util.hass_dict import HassKey
+
+from .const import DOMAIN
+
+IO_WORKER_POOL: HassKey["IOWorkerPool"] = HassKey(f"{DOMAIN}_io_workers")
+
+
+@dataclass
+class _Job:
+    func: Callable[..., Any]
+    args: tuple[Any, ...]
+    future: asyncio.Future[Any]
+
+
+@dataclass
+class _Station:
+    jobs: deque[_Job] = field(default_factory=deque)
+    running: bool = False
+    busy: float = 0.0  # seconds a worker ran a job since the last reset
+    started: float = 0.0
+    since: float = field(default_factory=time.monotonic)
+
+
+class IOWorkerPool:
+    """Bounded pool of worker threads, handed out fairly to the stations.
+
+    Every station has its own queue of jobs and runs at most one job at a
+    time. A free worker takes the next job of the stations in turn, so a
+    station with a slow serial link can't starve the others, and the
+    stations don't compete with Home Assistant's default executor.
+    """
+
+    def __init__(self, workers: int) -> None:
+        self.workers = workers
+        self._executor: ThreadPoolExecutor | None = None
+        self._stations: dict[str, _Station] = {}
+        self._ready: deque[str] = deque()
+        self._running = 0
+
+    def station(self, name: str) -> "StationWorkers":
+        """Return the handle a station runs its blocking calls through."""
+        return StationWorkers(self, name)
+
+    async def async_run(self, name: str, func: Callable[..., Any], *args: Any) -> Any:
+        """Run func(*args) in a worker once it is the station's turn."""
+        loop = asyncio.get_running_loop()
+        station = self._stations.setdefault(name, _Station())
+        future: asyncio.Future[Any] = loop.create_future()
+        if not station.jobs and not station.running:
+            self._ready.append(name)
+        station.jobs.append(_Job(func, args, future))
+        self._dispatch(loop)
+        return await future
+
+    def _dispatch(self, loop: asyncio.AbstractEventLoop) -> None:
+        while self._running < self.workers and self._ready:
+            name = self._ready.popleft()
+            station = self._stations[name]
+            job = station.jobs.popleft()
+            if job.future.cancelled():
+                if station.jobs:
+                    self._ready.append(name)
+                continue
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    self.workers, thread_name_prefix=__package__
+                )
+            self._running += 1
+            station.running = True
+            station.started = time.monotonic()
+            loop.run_in_executor(self._executor, job.func, *job.args).add_done_callback(
+                partial(self._done, loop, name, job.future)
+            )
+
+    def _done(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        name: str,
+        future: asyncio.Future[Any],
+        result: asyncio.Future[Any],
+    ) -> None:
+        self._running -= 1
+        station = self._stations[name]
+        station.running = False
+        station.busy += time.monotonic() - station.started
+        if station.jobs:
+            # Back in line behind the stations that are waiting already
+            self._ready.append(name)
+        if result.cancelled():
+            future.cancel()
+        elif not future.cancelled():
+            if (exception := result.exception()) is not None:
+                future.set_exception(exception)
+            else:
+                future.set_result(result.result())
+        self._dispatch(loop)
+
+    def utilization(self, name: str, reset: bool = False) -> float:
+        """Return the percentage of time a worker ran jobs of the station."""
+        station = self._stations.get(name)
+        if station is None:
+            return 0.0
+        now = time.monotonic()
+        busy = station.busy + (now - station.started if station.running else 0.0)
+        elapsed = now - station.since
+        if reset:
+            station.busy = -(now - station.started) if station.running else 0.0
+            station.since = now
+        return round(100 * busy / elapsed, 1) if elapsed > 0 else 0.0
+
+    def shutdown(self) -> None:
+        """Stop the worker threads, running jobs are finished first."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+class StationWorkers:
+    """The part of the worker pool of one station."""
+
+    def __init__(self, pool: IOWorkerPool, name: str) -> None:
+        self._pool = pool
+        self.name = name
+
+    async def async_run(self, func: Callable[..., Any], *args: Any) -> Any:
+        return await self._pool.async_run(self.name, func, *args)
+
+    def utilization(self, reset: bool = False) -> float:
+        return self._pool.utilization(self.name, reset)
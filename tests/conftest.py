@@ -0,0 +1,201 @@
+"""Packets shared by the tests.
+
+Run from the repository root: python -m pytest tests
+"""
+
+import struct
+
+import pytest
+from pyvantagepro.parser import (
+    ArchiveDataParserRevB,
+    HighLowParserRevB,
+    LoopDataParserRevB,
+    VantageProCRC,
+)
+from pyvantagepro.utils import hex_to_bytes
+
+from custom_components.davis_vantage.decoder import LOOP2_FORMAT
+
+# LOOP packet of a Vantage Pro2 console without an outside sensor suite,
+# as captured in the pyvantagepro test suite
+CAPTURED_LOOP = hex_to_bytes(
+    "4C4F4FC4006802547B52031EFF7FFFFFFF7FFFFFFFFFFFFF"
+    "FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF7F0000"
+    "FFFF000000003C03000000000000FFFFFFFFFFFFFF000000"
+    "0000000000000000000000000000008C00060C610183070A"
+    "0D2A3C"
+)
+
+
+def pack_packet(data_format, size: int, values: dict[str, int | bytes]) -> bytes:
+    """Pack a packet with the given fields set, the other fields 0."""
+    data = bytearray(size)
+    offset = 0
+    for name, field_format in data_format:
+        if name in values:
+            struct.pack_into("<" + field_format, data, offset, values[name])
+        offset += struct.calcsize("<" + field_format)
+    return VantageProCRC(bytes(data)).data_with_checksum
+
+
+def make_loop_packet(**fields: int | bytes) -> bytes:
+    """LOOP packet of a station with an extra, soil and leaf sensor."""
+    return pack_packet(
+        LoopDataParserRevB.LOOP_FORMAT,
+        97,
+        {
+            "LOO": b"LOO",
+            "BarTrend": 20,
+            "NextRec": 1234,
+            "Barometer": 29921,
+            "TempIn": 702,
+            "HumIn": 45,
+            "TempOut": 615,
+            "WindSpeed": 6,
+            "WindSpeed10Min": 5,
+            "WindDir": 225,
+            "ExtraTemps": bytes((160, 255, 255, 255, 255, 255, 255)),
+            "SoilTemps": bytes((148, 255, 255, 255)),
+            "LeafTemps": bytes((255, 255, 255, 255)),
+            "HumOut": 81,
+            "HumExtra": bytes((55, 255, 255, 255, 255, 255, 255)),
+            "RainRate": 12,
+            "UV": 24,
+            "SolarRad": 310,
+            "RainStorm": 37,
+            "StormStartDate": (5 << 12) | (14 << 7) | 26,
+            "RainDay": 15,
+            "RainMonth": 230,
+            "RainYear": 1270,
+            "ETDay": 43,
+            "ETMonth": 112,
+            "ETYear": 1834,
+            "SoilMoist": bytes((20, 255, 255, 255)),
+            "LeafWetness": bytes((7, 255, 255, 255)),
+            "BatteryVolts": 837,
+            "ForecastIcon": 6,
+            "ForecastRuleNo": 45,
+            "SunRise": 721,
+            "SunSet": 1835,
+            "EOL": b"\n\r",
+            **fields,
+        },
+    )
+
+
+def make_loop2_packet(**fields: int | bytes) -> bytes:
+    """LOOP2 packet of the same station, a little later."""
+    return pack_packet(
+        LOOP2_FORMAT,
+        97,
+        {
+            "LOO": b"LOO",
+            "BarTrend": 20,
+            "PacketType": 1,
+            "Unused1": b"\x7f\x7f",
+            "Barometer": 29925,
+            "TempIn": 703,
+            "HumIn": 45,
+            "TempOut": 618,
+            "WindSpeed": 8,
+            "Unused2": 255,
+            "WindDir": 230,
+            "WindSpeed10Min": 53,
+            "WindSpeed2Min": 61,
+            "WindGust10Min": 14,
+            "WindGustDir10Min": 247,
+            "DewPoint": 56,
+            "HumOut": 80,
+            "HeatIndex": 62,
+            "WindChill": 61,
+            "THSW": 255,
+            "RainRate": 10,
+            "UV": 26,
+            "SolarRad": 315,
+            "RainStorm": 37,
+            "StormStartDate": (5 << 12) | (14 << 7) | 26,
+            "RainDay": 16,
+            "Rain15Min": 2,
+            "RainHour": 4,
+            "ETDay": 44,
+            "Rain24Hour": 21,
+            "BarReduction": 2,
+            "BarOffset": -12,
+            "BarCalibration": 0,
+            "BarRaw": 29410,
+            "BarAbsolute": 29420,
+            "Altimeter": 29930,
+            "EOL": b"\n\r",
+            **fields,
+        },
+    )
+
+
+def make_hilows_packet(**fields: int | bytes) -> bytes:
+    return pack_packet(
+        HighLowParserRevB.HILOWS_FORMAT,
+        436,
+        {
+            "BaroLoDay": 29854,
+            "BaroHiDay": 29930,
+            "BaroLoMonth": 29512,
+            "BaroHiMonth": 30210,
+            "BaroLoYear": 29102,
+            "BaroHiYear": 30480,
+            "BaroLoTime": 412,
+            "BaroHiTime": 1347,
+            "WindHiDay": 17,
+            "WindHiTime": 1422,
+            "WindHiMonth": 34,
+            "WindHiYear": 51,
+            "InTempHiDay": 721,
+            "InTempLoDay": 688,
+            "InTempHiTime": 1503,
+            "InTempLoTime": 615,
+            "TempLoDay": 521,
+            "TempHiDay": 652,
+            "TempLoTime": 603,
+            "TempHiTime": 1412,
+            "TempHiMonth": 781,
+            "TempLoMonth": 402,
+            "DewLoDay": 48,
+            "DewHiDay": 57,
+            "DewLoTime": 545,
+            "DewHiTime": 65535,
+            "SolarHiDay": 642,
+            "SolarHiTime": 1258,
+            "UVHiDay": 41,
+            "UVHiTime": 1304,
+            "RainHiDay": 96,
+            "RainHiTime": 1117,
+            "RainHiHour": 12,
+            "RainHiMonth": 310,
+            "RainHiYear": 32767,
+            **fields,
+        },
+    )
+
+
+def make_archive_record(wind_avg: int = 4, wind_avg_dir: int = 3) -> ArchiveDataParserRevB:
+    data = bytearray(52)
+    struct.pack_into("<HH", data, 0, (26 << 9) | (5 << 5) | 18, 1230)
+    struct.pack_into("<h", data, 4, 612)
+    data[24] = wind_avg
+    data[25] = 12  # WindHi
+    data[27] = wind_avg_dir
+    return ArchiveDataParserRevB(bytes(data))
+
+
+@pytest.fixture
+def loop_packet() -> bytes:
+    return make_loop_packet()
+
+
+@pytest.fixture
+def loop2_packet() -> bytes:
+    return make_loop2_packet()
+
+
+@pytest.fixture
+def hilows_packet() -> bytes:
+    return make_hilows_packet()
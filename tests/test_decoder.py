@@ -0,0 +1,246 @@
+"""The precompiled decoders against the pyvantagepro parsers."""
+
+import struct
+from datetime import datetime
+
+import pytest
+from pyvantagepro.parser import DataParser, HighLowParserRevB, LoopDataParserRevB
+
+from custom_components.davis_vantage.decoder import (
+    HILOWS_DECODER,
+    LOOP2_DECODER,
+    LOOP2_FORMAT,
+    LOOP2_PACKET_TYPE,
+    LOOP_DECODER,
+    LOOP_REQUIRED,
+    merge_loop2,
+)
+
+from conftest import CAPTURED_LOOP, make_loop2_packet, make_loop_packet
+
+# The byte arrays pyvantagepro leaves as separate numbered fields
+LOOP_ARRAYS = ("ExtraTemps", "SoilTemps", "LeafTemps", "HumExtra", "SoilMoist", "LeafWetness")
+# Sent as °F + 90, pyvantagepro leaves the offset in
+OFFSET_ARRAYS = ("ExtraTemps", "SoilTemps", "LeafTemps")
+NO_DATA = {"B": (255,), "H": (32767, 65535), "h": (32767, -32768)}
+
+
+def get_raw_values(data: bytes, data_format, arrays=()) -> dict:
+    """Unscaled values as pyvantagepro unpacks them, arrays split."""
+    raw = DataParser(data, data_format)
+    for name in arrays:
+        raw[name] = struct.unpack(f"{len(raw[name])}B", raw[name])
+        raw.tuple_to_dict(name)
+    del raw["Datetime"]
+    return dict(raw)
+
+
+def get_field_formats(data_format, arrays=()) -> dict[str, str]:
+    formats = {}
+    for name, field_format in data_format:
+        if name in arrays:
+            for i in range(int(field_format[:-1])):
+                formats["%s%.2d" % (name, i + 1)] = "B"
+        else:
+            formats[name] = field_format
+    return formats
+
+
+def assert_same_as_parser(packet, reference, raw, formats, offset_keys=()) -> None:
+    """The decoded values are pyvantagepro's, "no data" values are None."""
+    assert set(packet) == set(reference)
+    for key, value in reference.items():
+        if key == "Datetime" or key not in formats:
+            # The timestamp and the alarm flags
+            assert packet[key] == value, key
+        elif raw[key] in NO_DATA.get(formats[key], ()):
+            assert packet[key] is None, key
+            assert not packet.is_valid(key), key
+        else:
+            expected = value - 90 if key in offset_keys else value
+            assert packet[key] == expected, key
+            assert packet.is_valid(key), key
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        CAPTURED_LOOP,
+        make_loop_packet(),
+        make_loop_packet(TempOut=-123, WindSpeed=0, StormStartDate=0xFFFF),
+        make_loop_packet(TempOut=32767, HumOut=255, RainRate=65535, WindDir=32767),
+    ],
+    ids=["captured", "station", "negative", "no data"],
+)
+def test_loop_packet(data: bytes) -> None:
+    now = datetime(2026, 5, 14, 12, 30)
+    packet = LOOP_DECODER.decode(data, now)
+    reference = LoopDataParserRevB(data, now)
+    raw = get_raw_values(data, LoopDataParserRevB.LOOP_FORMAT, LOOP_ARRAYS)
+    offset_keys = [key for key in raw if key[:-2] in OFFSET_ARRAYS]
+    assert_same_as_parser(
+        packet,
+        reference,
+        raw,
+        get_field_formats(LoopDataParserRevB.LOOP_FORMAT, LOOP_ARRAYS),
+        offset_keys,
+    )
+    assert packet.raw == raw
+    assert packet.raw_bytes == data
+
+
+def test_captured_loop_packet_without_outside_sensors() -> None:
+    packet = LOOP_DECODER.decode(CAPTURED_LOOP)
+    assert packet["Barometer"] == 31.572
+    assert packet["TempIn"] == 85.0
+    assert packet["RainYear"] == 8.28
+    for key in ("TempOut", "HumOut", "WindSpeed", "WindDir", "RainRate", "UV", "SolarRad"):
+        assert packet[key] is None
+    assert packet.invalid & LOOP_REQUIRED == LOOP_REQUIRED
+    assert set(packet.invalid_keys()) >= {"TempOut", "HumOut", "ExtraTemps01", "SoilMoist04"}
+
+
+def test_loop_byte_arrays() -> None:
+    packet = LOOP_DECODER.decode(make_loop_packet())
+    assert packet["ExtraTemps01"] == 70
+    assert packet["SoilTemps01"] == 58
+    assert packet["HumExtra01"] == 55
+    assert packet["SoilMoist01"] == 20
+    assert packet["LeafWetness01"] == 7
+    # Empty slots hold 255, the temperature slots before the offset
+    for key in ("ExtraTemps02", "SoilTemps04", "LeafTemps01", "HumExtra07", "SoilMoist02"):
+        assert packet[key] is None
+        assert not packet.is_valid(key)
+    assert packet.raw["ExtraTemps02"] == 255
+
+
+def test_loop_alarm_flags() -> None:
+    """The alarm bits in the documented order, pyvantagepro fails on them."""
+    data = bytearray(make_loop_packet())
+    data[70] = 0x01  # falling bar trend
+    data[71] = 0x02  # 15 min rain
+    data[73] = 0x01  # high THSW, second byte of the outside alarms
+    data[74] = 0xFF  # outside humidity, not an extra sensor
+    data[76] = 0x08  # high humidity of extra sensor 2
+    data[85] = 0x80  # high soil temperature of station 4
+    packet = LOOP_DECODER.decode(bytes(data))
+    set_flags = {key for key, value in packet.items() if key.startswith("Alarm") and value}
+    assert set_flags == {
+        "AlarmInFallBarTrend",
+        "AlarmRain15min",
+        "AlarmOutHighTHSW",
+        "AlarmEx02HighHum",
+        "Alarm04HighSoilTemp",
+    }
+
+
+def test_hilows_packet(hilows_packet: bytes) -> None:
+    now = datetime(2026, 5, 14, 12, 30)
+    packet = HILOWS_DECODER.decode(hilows_packet, now)
+    reference = HighLowParserRevB(hilows_packet, now)
+    raw = get_raw_values(hilows_packet, HighLowParserRevB.HILOWS_FORMAT)
+    assert_same_as_parser(
+        packet, reference, raw, get_field_formats(HighLowParserRevB.HILOWS_FORMAT)
+    )
+    assert packet.raw == raw
+    assert packet["TempHiDay"] == 65.2
+    assert packet["TempHiTime"] == "14:12"
+    assert packet["DewHiTime"] is None
+    assert packet["RainHiYear"] is None
+    assert packet.invalid_keys() == ["DewHiTime", "RainHiYear"]
+
+
+def test_loop2_packet(loop2_packet: bytes) -> None:
+    packet = LOOP2_DECODER.decode(loop2_packet)
+    raw = get_raw_values(loop2_packet, LOOP2_FORMAT)
+    assert packet.raw == raw
+    assert LOOP2_DECODER.size == LOOP_DECODER.size == len(loop2_packet)
+    assert loop2_packet[4] == LOOP2_PACKET_TYPE
+    assert {key: packet[key] for key in packet if key != "Datetime"} == {
+        "BarTrend": 20,
+        "Barometer": 29.925,
+        "TempIn": 70.3,
+        "HumIn": 45,
+        "TempOut": 61.8,
+        "WindSpeed": 8,
+        "WindDir": 230,
+        "WindSpeed10Min": 5.3,
+        "WindSpeed2Min": 6.1,
+        "WindGust10Min": 14,
+        "WindGustDir10Min": 247,
+        "DewPoint": 56,
+        "HumOut": 80,
+        "HeatIndex": 62,
+        "WindChill": 61,
+        # The console calculations are 255 without data
+        "THSW": None,
+        "RainRate": 0.1,
+        "UV": 2.6,
+        "SolarRad": 315,
+        "RainStorm": 0.37,
+        "StormStartDate": "2026-05-14",
+        "RainDay": 0.16,
+        "Rain15Min": 0.02,
+        "RainHour": 0.04,
+        "ETDay": 0.044,
+        "Rain24Hour": 0.21,
+        "BarReduction": 2,
+        "BarOffset": -12,
+        "BarCalibration": 0,
+        "BarRaw": 29410,
+        "BarAbsolute": 29.42,
+        "Altimeter": 29.93,
+    }
+    assert packet.invalid_keys() == ["THSW"]
+
+
+def test_loop2_no_data() -> None:
+    packet = LOOP2_DECODER.decode(
+        make_loop2_packet(DewPoint=-32768, HeatIndex=32767, WindGust10Min=32767, TempOut=32767)
+    )
+    for key in ("DewPoint", "HeatIndex", "WindGust10Min", "TempOut"):
+        assert packet[key] is None
+        assert not packet.is_valid(key)
+    assert packet["WindChill"] == 61
+
+
+def test_merge_loop2(loop_packet: bytes, loop2_packet: bytes) -> None:
+    """The LOOP2 values replace the LOOP values they share."""
+    loop = LOOP_DECODER.decode(loop_packet)
+    loop2 = LOOP2_DECODER.decode(loop2_packet)
+    merged = LOOP_DECODER.decode(merge_loop2(loop_packet, loop2_packet))
+    shared = {
+        key
+        for key in loop
+        if key in loop2 and key != "Datetime" and key != "WindSpeed10Min"
+    }
+    assert shared >= {"TempOut", "HumOut", "WindSpeed", "WindDir", "RainRate", "Barometer"}
+    for key in merged:
+        assert merged[key] == (loop2[key] if key in shared else loop[key]), key
+    # A different size in LOOP2, 0.1 mph instead of whole mph
+    assert merged["WindSpeed10Min"] == loop["WindSpeed10Min"]
+    assert merged.raw_bytes[4] != LOOP2_PACKET_TYPE
+
+
+def test_decode_changes(loop_packet: bytes) -> None:
+    previous = LOOP_DECODER.decode(loop_packet)
+    changed_packet = make_loop_packet(TempOut=32767, WindSpeed=9)
+    packet, changed = LOOP_DECODER.decode_changes(changed_packet, None, previous)
+    full = LOOP_DECODER.decode(changed_packet)
+    assert changed == {"TempOut", "WindSpeed"}
+    assert dict(packet) == dict(full)
+    assert packet.invalid == full.invalid
+    # And back to valid data
+    packet, changed = LOOP_DECODER.decode_changes(loop_packet, None, packet)
+    assert dict(packet) == dict(previous)
+    assert packet.invalid == previous.invalid
+
+
+def test_select(loop_packet: bytes) -> None:
+    decoder = LOOP_DECODER.select({"TempOut", "ExtraTemps01", "AlarmInLowTemp"})
+    packet = decoder.decode(loop_packet)
+    assert set(packet) == {"Datetime", "TempOut", "ExtraTemps01", "AlarmInLowTemp"}
+    assert packet["ExtraTemps01"] == 70
+    # The raw view and the validity bits are those of the full decoder
+    assert packet.raw == LOOP_DECODER.decode(loop_packet).raw
+    assert decoder.field_bits == LOOP_DECODER.field_bits
@@ -0,0 +1,294 @@
+"""The readout pipeline against the conversions it replaced."""
+
+from datetime import date, datetime, time
+from typing import Any
+
+import pytest
+
+from custom_components.davis_vantage.const import (
+    RAIN_COLLECTOR_FACTOR,
+    RAIN_COLLECTOR_IMPERIAL,
+    RAIN_COLLECTOR_METRIC,
+    RAIN_COLLECTOR_METRIC_0_1,
+)
+from custom_components.davis_vantage.decoder import (
+    HILOWS_DECODER,
+    LOOP2_DECODER,
+    LOOP_DECODER,
+)
+from custom_components.davis_vantage.pipeline import LOOP2_PIPELINE, READOUT_PIPELINE
+from custom_components.davis_vantage.utils import (
+    calc_dew_point,
+    calc_feels_like,
+    calc_heat_index,
+    calc_wind_chill,
+    convert_kmh_to_bft,
+    convert_to_kmh,
+    get_baro_trend,
+    get_solar_rad,
+    get_uv,
+    get_wind_rose,
+)
+
+from conftest import make_archive_record, make_hilows_packet, make_loop_packet
+
+RAIN_COLLECTORS = (RAIN_COLLECTOR_IMPERIAL, RAIN_COLLECTOR_METRIC, RAIN_COLLECTOR_METRIC_0_1)
+RAIN_KEYS = ("RainDay", "RainMonth", "RainYear", "RainRate", "RainStorm")
+
+
+def get_station(rain_collector: str = RAIN_COLLECTOR_IMPERIAL) -> dict[str, Any]:
+    return {
+        "ArchiveInterval": 10,
+        "Latitude": 52.1,
+        "Longitude": 5.2,
+        "Elevation": 12,
+        "RainCollector": rain_collector,
+        "RainFactor": RAIN_COLLECTOR_FACTOR.get(rain_collector, 1.0),
+    }
+
+
+def strtotime(value: str | None) -> time | None:
+    return None if value is None else datetime.strptime(value, "%H:%M").time()
+
+
+def convert_like_before(
+    data: dict[str, Any],
+    hilows: dict[str, Any] | None,
+    archive: dict[str, Any] | None,
+    station: dict[str, Any],
+) -> dict[str, Any]:
+    """The add_additional_info, convert_values, add_archive_info and
+    add_hilows_info steps of the client before the pipeline."""
+    data = dict(data)
+    if data["TempOut"] is not None:
+        if data["HumOut"] is not None:
+            data["HeatIndex"] = calc_heat_index(data["TempOut"], data["HumOut"])
+            data["DewPoint"] = calc_dew_point(data["TempOut"], data["HumOut"])
+        if data["WindSpeed"] is not None:
+            data["WindChill"] = calc_wind_chill(data["TempOut"], data["WindSpeed"])
+            if data["HumOut"] is not None:
+                data["FeelsLike"] = calc_feels_like(
+                    data["TempOut"], data["HumOut"], data["WindSpeed"]
+                )
+    if data["WindSpeed"] == 0:
+        data["WindDir"] = None
+    if data["WindDir"] is not None:
+        data["WindDirRose"] = get_wind_rose(data["WindDir"])
+    if data["RainRate"] is not None:
+        data["IsRaining"] = data["RainRate"] > 0
+    for key in ("ArchiveInterval", "Latitude", "Longitude", "Elevation"):
+        data[key] = station[key]
+
+    if data["BarTrend"] is not None:
+        data["BarTrend"] = get_baro_trend(data["BarTrend"])
+    if data["UV"] is not None:
+        data["UV"] = get_uv(data["UV"])
+    if data["SolarRad"] is not None:
+        data["SolarRad"] = get_solar_rad(data["SolarRad"])
+    data["RainCollector"] = station["RainCollector"]
+    if data["StormStartDate"] is not None:
+        data["StormStartDate"] = datetime.strptime(data["StormStartDate"], "%Y-%m-%d").date()
+    data["SunRise"] = strtotime(data["SunRise"])
+    data["SunSet"] = strtotime(data["SunSet"])
+    for key in RAIN_KEYS:
+        if data[key] is not None:
+            data[key] *= station["RainFactor"]
+
+    if archive:
+        data["WindGust"] = archive["WindHi"]
+        data["WindSpeedAvg"] = archive["WindAvg"]
+        if data["WindSpeedAvg"] > 0 and archive["WindAvgDir"] < 255:
+            data["WindAvgDir"] = archive["WindAvgDir"] * 22.5
+            data["WindAvgDirRose"] = get_wind_rose(data["WindAvgDir"])
+        data["WindSpeedBft"] = convert_kmh_to_bft(convert_to_kmh(data["WindSpeedAvg"]))
+
+    if hilows:
+        for key, field in (
+            ("TempOutHiDay", "TempHiDay"),
+            ("TempOutLowDay", "TempLoDay"),
+            ("DewPointHiDay", "DewHiDay"),
+            ("DewPointLowDay", "DewLoDay"),
+            ("RainRateDay", "RainHiDay"),
+            ("BarometerHiDay", "BaroHiDay"),
+            ("BarometerLowDay", "BaroLoDay"),
+            ("SolarRadDay", "SolarHiDay"),
+            ("UVDay", "UVHiDay"),
+            ("WindGustDay", "WindHiDay"),
+        ):
+            data[key] = hilows[field]
+        for key, field in (
+            ("TempOutHiTime", "TempHiTime"),
+            ("TempOutLowTime", "TempLoTime"),
+            ("DewPointHiTime", "DewHiTime"),
+            ("DewPointLowTime", "DewLoTime"),
+            ("RainRateTime", "RainHiTime"),
+            ("BarometerHiTime", "BaroHiTime"),
+            ("BarometerLoTime", "BaroLoTime"),
+            ("SolarRadTime", "SolarHiTime"),
+            ("UVTime", "UVHiTime"),
+            ("WindGustTime", "WindHiTime"),
+        ):
+            data[key] = strtotime(hilows[field])
+    return data
+
+
+def run_pipeline(pipeline, data, hilows, archive, station, loop2=None) -> dict[str, Any]:
+    output = dict(data)
+    pipeline.apply(output, hilows, archive, station, loop2=loop2)
+    return output
+
+
+def assert_same_as_before(output: dict[str, Any], before: dict[str, Any]) -> None:
+    # The old code only added the derived values it could calculate
+    for key in (set(output) | set(before)) - {"Datetime"}:
+        assert output.get(key) == before.get(key), key
+
+
+@pytest.mark.parametrize("rain_collector", RAIN_COLLECTORS)
+def test_readout_same_as_before(rain_collector: str) -> None:
+    data = LOOP_DECODER.decode(make_loop_packet())
+    hilows = HILOWS_DECODER.decode(make_hilows_packet())
+    archive = make_archive_record()
+    station = get_station(rain_collector)
+    output = run_pipeline(READOUT_PIPELINE, data, hilows, archive, station)
+    before = convert_like_before(data, hilows, archive, station)
+    # The old code scaled the rain values before adding the highs and lows,
+    # so the day's highest rain rate was never scaled
+    assert output["RainRateDay"] == pytest.approx(hilows["RainHiDay"] * station["RainFactor"])
+    before["RainRateDay"] = output["RainRateDay"]
+    assert_same_as_before(output, before)
+    assert output.keys() >= READOUT_PIPELINE.keys
+
+
+@pytest.mark.parametrize(
+    "rain_collector, rain_day",
+    [
+        (RAIN_COLLECTOR_IMPERIAL, 0.15),
+        (RAIN_COLLECTOR_METRIC, 0.15 * 2 / 2.54),
+        (RAIN_COLLECTOR_METRIC_0_1, 0.15 / 2.54),
+        ("", 0.15),
+    ],
+)
+def test_rain_collector(rain_collector: str, rain_day: float) -> None:
+    data = LOOP_DECODER.decode(make_loop_packet(RainRate=0, RainStorm=65535))
+    output = run_pipeline(READOUT_PIPELINE, data, None, None, get_station(rain_collector))
+    assert output["RainDay"] == pytest.approx(rain_day)
+    assert output["RainRate"] == 0
+    assert output["IsRaining"] is False
+    assert output["RainStorm"] is None
+    assert output["RainCollector"] == rain_collector
+
+
+@pytest.mark.parametrize(
+    "wind_dir, wind_speed, wind_dir_rose",
+    [
+        (225, 6, "sw"),
+        (0, 6, "n"),
+        (359, 6, "n"),
+        (90, 0, None),
+        (32767, 6, None),
+    ],
+)
+def test_wind_direction(wind_dir: int, wind_speed: int, wind_dir_rose: str | None) -> None:
+    data = LOOP_DECODER.decode(make_loop_packet(WindDir=wind_dir, WindSpeed=wind_speed))
+    station = get_station()
+    output = run_pipeline(READOUT_PIPELINE, data, None, None, station)
+    assert output["WindDirRose"] == wind_dir_rose
+    if wind_dir_rose is None:
+        assert output["WindDir"] is None
+    assert_same_as_before(output, convert_like_before(data, None, None, station))
+
+
+@pytest.mark.parametrize(
+    "wind_avg, wind_avg_dir, expected",
+    [(4, 2, (45.0, "ne")), (4, 10, (225.0, "sw")), (0, 3, (None, None)), (4, 255, (None, None))],
+)
+def test_wind_avg_direction(wind_avg: int, wind_avg_dir: int, expected: tuple) -> None:
+    data = LOOP_DECODER.decode(make_loop_packet())
+    archive = make_archive_record(wind_avg, wind_avg_dir)
+    station = get_station()
+    output = run_pipeline(READOUT_PIPELINE, data, None, archive, station)
+    assert (output["WindAvgDir"], output["WindAvgDirRose"]) == expected
+    assert output["WindGust"] == 12
+    assert output["WindSpeedAvg"] == wind_avg
+    assert_same_as_before(output, convert_like_before(data, None, archive, station))
+
+
+def test_no_outside_temperature() -> None:
+    data = LOOP_DECODER.decode(make_loop_packet(TempOut=32767))
+    station = get_station()
+    output = run_pipeline(READOUT_PIPELINE, data, None, None, station)
+    for key in ("HeatIndex", "DewPoint", "WindChill", "FeelsLike"):
+        assert output[key] is None
+    assert_same_as_before(output, convert_like_before(data, None, None, station))
+
+
+def test_converted_values() -> None:
+    data = LOOP_DECODER.decode(make_loop_packet())
+    output = run_pipeline(READOUT_PIPELINE, data, None, None, get_station())
+    assert output["StormStartDate"] == date(2026, 5, 14)
+    assert output["SunRise"] == time(7, 21)
+    assert output["SunSet"] == time(18, 35)
+    assert output["BarTrend"] == get_baro_trend(20)
+    # Without the archive record and highs and lows their keys are left out
+    assert "WindGust" not in output
+    assert "TempOutHiDay" not in output
+
+
+def test_select() -> None:
+    """Transforms that aren't selected leave the decoded values alone."""
+    pipeline = READOUT_PIPELINE.select({"WindDirRose", "RainDay", "WindSpeedBft"})
+    assert pipeline.keys == {"WindDir", "WindDirRose", "RainDay", "WindSpeedAvg", "WindSpeedBft"}
+    assert pipeline.fields >= {"WindDir", "WindSpeed", "RainDay"}
+    assert pipeline.sources == {"archive", "station"}
+    data = LOOP_DECODER.decode(make_loop_packet(WindSpeed=0))
+    archive = make_archive_record()
+    station = get_station(RAIN_COLLECTOR_METRIC)
+    output = run_pipeline(pipeline, data, None, archive, station)
+    full = run_pipeline(READOUT_PIPELINE, data, None, archive, station)
+    for key in pipeline.keys:
+        assert output[key] == full[key], key
+    assert output["WindDir"] is None
+    # Not selected: not added, or still the decoded value
+    assert "HeatIndex" not in output
+    assert "WindAvgDir" not in output
+    assert output["RainMonth"] == data["RainMonth"] != full["RainMonth"]
+    assert output["SunRise"] == "07:21"
+    assert READOUT_PIPELINE.select({"WindGust"}).sources == {"archive"}
+    assert READOUT_PIPELINE.select({"TempIn", "ExtraTemps01"}).keys == frozenset()
+
+
+def test_changed_keys() -> None:
+    """Running only the transforms of the changed fields gives the full result."""
+    hilows = HILOWS_DECODER.decode(make_hilows_packet())
+    archive = make_archive_record()
+    station = get_station(RAIN_COLLECTOR_METRIC_0_1)
+    previous = LOOP_DECODER.decode(make_loop_packet())
+    output = run_pipeline(READOUT_PIPELINE, previous, hilows, archive, station)
+    for fields in ({"WindSpeed": 0}, {"TempOut": 32767, "RainDay": 40}, {"BarTrend": 236}):
+        decoded, changed = LOOP_DECODER.decode_changes(make_loop_packet(**fields), None, previous)
+        READOUT_PIPELINE.apply(output, hilows, archive, station, changed=changed, decoded=decoded)
+        assert output == run_pipeline(READOUT_PIPELINE, decoded, hilows, archive, station)
+        previous = decoded
+
+
+def test_loop2_values(loop2_packet: bytes) -> None:
+    data = LOOP_DECODER.decode(make_loop_packet())
+    loop2 = LOOP2_DECODER.decode(loop2_packet)
+    archive = make_archive_record()
+    output = run_pipeline(LOOP2_PIPELINE, data, None, archive, get_station(), loop2)
+    assert output["DewPoint"] == 56
+    assert output["HeatIndex"] == 62
+    assert output["WindChill"] == 61
+    assert output["THSW"] is None
+    assert output["WindGust"] == 14
+    assert output["WindSpeedAvg"] == 5.3
+    assert output["WindSpeed2Min"] == 6.1
+    assert output["WindSpeedBft"] == wind_speed_bft(5.3)
+    # The calculated values and the archive record are still used for the rest
+    assert output["FeelsLike"] == calc_feels_like(61.5, 81, 6)
+    assert output["WindAvgDir"] == 67.5
+
+
+def wind_speed_bft(wind_speed: float) -> int:
+    return convert_kmh_to_bft(convert_to_kmh(wind_speed))